@@ -7,6 +7,7 @@ from flask_jwt_extended import (
     JWTManager,
     create_access_token,
     jwt_required,
+    get_jwt,
     get_jwt_identity,
 )
 from backend.auth.routes import auth_bp as auth_blueprint
@@ -17,11 +18,17 @@ from backend.auth.validators import (
     RegistrationValidator,
 )
 from backend.auth.exceptions import DuplicateEmailError
-from backend.auth.hashing import BcryptPasswordHasher
+from backend.auth.executor import HashingExecutor
+from backend.auth.hashing import BcryptPasswordHasher, build_password_hasher
 from backend.auth.repository import UserRepository
-from backend.utils.db import SQLiteConnection
+from backend.config import settings
+from backend.utils.db import SQLiteConnection, SQLiteConnectionPool
+from backend.vault.decryption import ParallelDecryptor
+from backend.vault.entry_cache import DecryptedEntryCache
+from backend.vault.key_cache import DerivedKeyCache
 from backend.vault.repository import VaultRepository
 from backend.vault.services import VaultService
+from backend.vault.session_index import SessionSearchIndexes
 from backend.vault.interfaces import IVaultRepository, IVaultService
 
 app = Flask(__name__)
@@ -56,6 +63,9 @@ class FlaskJWTAuthProvider:
     def get_identity(self):
         return get_jwt_identity()
 
+    def get_session_id(self):
+        return get_jwt().get("jti")
+
     def create_access_token(self, identity):
         return create_access_token(identity=identity)
 
@@ -64,31 +74,65 @@ def create_app():
     app = Flask(__name__)
 
     # --- Dependency Wiring ---
-    # Database connection (shared for all repositories)
-    db_connection = SQLiteConnection()
+    # Database connection pool (shared for all repositories)
+    db_connection = SQLiteConnectionPool()
+
+    # Bring the schema up to date before serving requests
+    if settings.DB_AUTO_MIGRATE:
+        from database.migrations import run_startup_migrations
+
+        run_startup_migrations(db_connection, app.logger)
 
     # Repositories
     user_repo = UserRepository(db_connection)
     vault_repo = VaultRepository(db_connection)
 
+    # Derived vault key cache (in-memory only)
+    key_cache = DerivedKeyCache()
+
+    # Thread pool decrypting large vault listings
+    vault_decryptor = ParallelDecryptor()
+
+    # Per-session fuzzy search indexes (decrypted, in-memory only)
+    search_indexes = SessionSearchIndexes()
+
+    # Per-session decrypted entries reused across listings (in-memory only)
+    entry_cache = DecryptedEntryCache()
+
     # Services
-    vault_service = VaultService(vault_repo)
+    vault_service = VaultService(
+        vault_repo,
+        key_cache=key_cache,
+        decryptor=vault_decryptor,
+        search_indexes=search_indexes,
+        entry_cache=entry_cache,
+    )
 
     # Validators
     email_validator = EmailValidator()
     password_validator = PasswordValidator()
     registration_validator = RegistrationValidator(email_validator, password_validator)
 
-    # Hasher
-    password_hasher = BcryptPasswordHasher()
+    # Hasher: PASSWORD_HASH_SCHEME for new hashes, bcrypt and Argon2id verified
+    password_hasher = build_password_hasher()
+
+    # Bounded pool running bcrypt off the request threads
+    hashing_executor = HashingExecutor()
 
     # Auth Provider abstraction (simple wrapper for now)
     auth_provider = FlaskJWTAuthProvider()
 
     # Inject dependencies into app config
+    app.config["DB_CONNECTION"] = db_connection
     app.config["USER_REPOSITORY"] = user_repo
+    app.config["VAULT_REPOSITORY"] = vault_repo
     app.config["VAULT_SERVICE"] = vault_service
+    app.config["KEY_CACHE"] = key_cache
+    app.config["VAULT_DECRYPTOR"] = vault_decryptor
+    app.config["SEARCH_INDEXES"] = search_indexes
+    app.config["ENTRY_CACHE"] = entry_cache
     app.config["PASSWORD_HASHER"] = password_hasher
+    app.config["HASHING_EXECUTOR"] = hashing_executor
     app.config["REGISTRATION_VALIDATOR"] = registration_validator
     app.config["AUTH_PROVIDER"] = auth_provider
 
@@ -142,3 +186,5 @@ if __name__ == "__main__":
     app.run(debug=True)
     # Run the Flask application
     # This will start the server with debug mode enabled for development purposes.
+    # For many concurrent (long-polling) clients, serve over ASGI instead:
+    #   uvicorn --factory backend.asgi:create_asgi_app  (see requirements.txt)
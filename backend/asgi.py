@@ -0,0 +1,275 @@
+"""
+ASGI entry point: serves the Flask app from an asyncio event loop.
+
+    uvicorn --factory backend.asgi:create_asgi_app --workers 4
+
+Flask views stay synchronous. a2wsgi's WSGIMiddleware runs them on a bounded
+thread pool (ASGI_REQUEST_WORKERS) and streams request and response bodies,
+so NDJSON imports and exports keep streaming. At most
+ASGI_MAX_PENDING_REQUESTS requests are admitted to the pool; the rest get
+503 instead of queueing without limit.
+
+What runs natively on the loop is waiting. A long-poll on
+GET /api/vault/changes?wait=N that finds nothing new is parked as a
+coroutine, holding no thread and no database connection. It is woken by a
+write from the same user in this process (ChangeNotifier). A periodic
+version check through the async repository catches writes handled by other
+worker processes, so idle syncing clients cost memory, not threads.
+WebSocket connections are refused: no endpoint speaks it yet.
+"""
+
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+from flask import Flask
+
+from backend.auth.session import IDENTITY_SCOPE_KEY
+from backend.config import settings
+from backend.utils.executors import BlockingExecutor
+from backend.vault.change_notifier import ChangeNotifier
+from backend.vault.repository import AsyncVaultRepository
+
+CHANGES_PATH = "/api/vault/changes"
+_READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _long_poll_args(scope: dict) -> tuple[float, int] | None:
+    """(wait, since) of a change long-poll, or None for any other request."""
+    if scope["method"] != "GET" or scope["path"] != CHANGES_PATH:
+        return None
+    args = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    try:
+        wait = float(args["wait"][0])
+        since = int(args.get("since", ["0"])[0])
+    except (KeyError, ValueError):
+        return None  # invalid since is Flask's to report
+    wait = min(wait, settings.ASGI_LONG_POLL_MAX_SECONDS)
+    return (wait, since) if wait > 0 else None
+
+
+def _has_changes(body: bytes) -> bool:
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return True  # not a changes page; answer it as it is
+    return bool(payload.get("entries") or payload.get("deleted"))
+
+
+async def _read_body(receive) -> bytes | None:
+    """The whole request body, or None if the client disconnected."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _until_disconnect(receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+def _terminated_input(wsgi_app):
+    """
+    Mark wsgi.input as terminated: a2wsgi's body stream ends with the request,
+    so Flask can read bodies sent without a Content-Length (chunked uploads).
+    """
+
+    def app(environ, start_response):
+        environ["wsgi.input_terminated"] = True
+        return wsgi_app(environ, start_response)
+
+    return app
+
+
+async def _send_json(send, status: int, payload: dict, headers=()) -> None:
+    body = json.dumps(payload).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *headers,
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class AsgiApp:
+    """
+    ASGI 3 application around a Flask app prepared by create_asgi_app()
+    (async vault repository, DB executor and change notifier in app.config).
+    """
+
+    def __init__(
+        self,
+        flask_app: Flask,
+        max_pending: int = settings.ASGI_MAX_PENDING_REQUESTS,
+        workers: int = settings.ASGI_REQUEST_WORKERS,
+    ) -> None:
+        if max_pending < 1:
+            raise ValueError("max_pending must be >= 1.")
+        self.flask_app = flask_app
+        self._wsgi = WSGIMiddleware(_terminated_input(flask_app), workers=workers)
+        self._vault_repo = flask_app.config["ASYNC_VAULT_REPOSITORY"]
+        self._notifier = flask_app.config["CHANGE_NOTIFIER"]
+        self._max_pending = max_pending
+        self._pending = 0
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        else:
+            # Closing before accepting answers the handshake with 403.
+            await send({"type": "websocket.close"})
+
+    def close(self) -> None:
+        """Stop the thread pools; running jobs finish first."""
+        self._wsgi.executor.shutdown(wait=False)
+        self.flask_app.config["ASGI_DB_EXECUTOR"].shutdown(wait=False)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send) -> None:
+        if self._pending >= self._max_pending:
+            await _send_json(
+                send,
+                503,
+                {"error": "Server is overloaded; retry later."},
+                headers=[(b"retry-after", b"1")],
+            )
+            return
+        long_poll = _long_poll_args(scope)
+        if long_poll is None:
+            await self._run_flask(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        if body is None:
+            return
+        user_id, messages = await self._run_buffered(scope, body)
+        # Long-poll: the worker is free again while the request is parked.
+        wait, since = long_poll
+        status = messages[0]["status"]
+        content = b"".join(m.get("body", b"") for m in messages)
+        if status == 200 and user_id is not None and not _has_changes(content):
+            changed = await self._wait_for_change(user_id, since, wait, receive)
+            if changed is None:
+                return  # client went away
+            # When saturated, the empty page already produced is a valid answer.
+            if changed and self._pending < self._max_pending:
+                _, messages = await self._run_buffered(scope, body)
+        for message in messages:
+            await send(message)
+
+    async def _run_flask(self, scope, receive, send) -> int | None:
+        """
+        Run the Flask app through a2wsgi, counted against max_pending, and
+        wake the user's parked long-polls after a successful write.
+        Returns:
+            int | None: The user id recorded by the view (see record_identity).
+        """
+        scope = {**scope, IDENTITY_SCOPE_KEY: None}
+        status = []
+
+        async def send_and_watch(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+            await send(message)
+
+        self._pending += 1
+        try:
+            await self._wsgi(scope, receive, send_and_watch)
+        finally:
+            self._pending -= 1
+        user_id = scope[IDENTITY_SCOPE_KEY]
+        succeeded = bool(status) and status[0] < 400
+        if scope["method"] not in _READ_METHODS and succeeded and user_id is not None:
+            self._notifier.notify(user_id)
+        return user_id
+
+    async def _run_buffered(self, scope, body: bytes) -> tuple[int | None, list]:
+        """Run a read request with a known body; (user id, response messages)."""
+        messages = []
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def collect(message):
+            messages.append(message)
+
+        user_id = await self._run_flask(scope, receive, collect)
+        return user_id, messages
+
+    async def _wait_for_change(self, user_id, since, wait, receive) -> bool | None:
+        """
+        Park until the user's vault version passes `since` or `wait` seconds pass.
+        Returns:
+            bool | None: True on a change, False on timeout, None if the
+                client disconnected.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        disconnected = asyncio.ensure_future(_until_disconnect(receive))
+        try:
+            while True:
+                # Also covers writes between the first response and parking.
+                if await self._vault_repo.get_vault_version(user_id) > since:
+                    return True
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                notified = asyncio.ensure_future(
+                    self._notifier.wait(
+                        user_id, min(remaining, settings.ASGI_LONG_POLL_RECHECK_SECONDS)
+                    )
+                )
+                await asyncio.wait(
+                    {notified, disconnected}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if disconnected.done():
+                    notified.cancel()
+                    return None
+        finally:
+            disconnected.cancel()
+
+
+def create_asgi_app(flask_app: Flask | None = None) -> AsgiApp:
+    """
+    Build the ASGI application (by default around create_app()) and wire the
+    async vault repository and change notifier into app.config.
+    """
+    if flask_app is None:
+        from backend.app import create_app
+
+        flask_app = create_app()
+    db_executor = BlockingExecutor(settings.ASGI_DB_WORKERS, "asgi-db")
+    flask_app.config["ASGI_DB_EXECUTOR"] = db_executor
+    flask_app.config["ASYNC_VAULT_REPOSITORY"] = AsyncVaultRepository(
+        flask_app.config["VAULT_REPOSITORY"], db_executor
+    )
+    flask_app.config["CHANGE_NOTIFIER"] = ChangeNotifier()
+    return AsgiApp(flask_app)
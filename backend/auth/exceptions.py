@@ -20,3 +20,9 @@ class HashingError(Exception):
     """Raised when password hashing fails."""
 
     pass
+
+
+class HashingUnavailableError(Exception):
+    """Raised when the password hashing executor is saturated or times out."""
+
+    pass
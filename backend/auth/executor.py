@@ -0,0 +1,138 @@
+"""
+Bounded executor for password hashing.
+
+bcrypt is deliberately slow (~250 ms per call) and releases the GIL, so it runs
+on a dedicated thread pool instead of the request thread. At most
+`max_workers + max_queue` jobs are admitted at once; further requests fail
+fast with HashingUnavailableError (HTTP 503) instead of queueing without limit.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from backend.auth.exceptions import HashingUnavailableError
+from backend.config import settings
+
+
+@dataclass
+class HashingExecutorStats:
+    """
+    Executor counters; queue-wait figures cover the most recent jobs.
+    `completed` counts only jobs whose result reached the caller; jobs that
+    raised are `failed` and jobs the caller gave up on are `timed_out`.
+    """
+
+    completed: int
+    failed: int
+    rejected: int
+    timed_out: int
+    in_flight: int
+    capacity: int
+    queue_wait_avg_ms: float
+    queue_wait_p95_ms: float
+    queue_wait_max_ms: float
+
+
+class HashingExecutor:
+    def __init__(
+        self,
+        max_workers: int = settings.HASH_WORKERS,
+        max_queue: int = settings.HASH_MAX_QUEUE,
+        timeout: float = settings.HASH_TIMEOUT_SECONDS,
+        wait_samples: int = 1024,
+    ) -> None:
+        if max_workers < 1 or max_queue < 0:
+            raise ValueError("max_workers must be >= 1 and max_queue >= 0.")
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hashing"
+        )
+        self._capacity = max_workers + max_queue
+        self._slots = threading.BoundedSemaphore(self._capacity)
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._waits: "deque[float]" = deque(maxlen=wait_samples)
+        self._local = threading.local()
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._in_flight = 0
+
+    def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run `fn(*args, **kwargs)` on the pool and wait for its result.
+        Raises:
+            HashingUnavailableError: If the executor is saturated or the job
+                does not finish within the timeout.
+            Exception: Whatever `fn` raises.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HashingUnavailableError("Password hashing is overloaded; retry later.")
+        with self._lock:
+            self._in_flight += 1
+        submitted = time.perf_counter()
+        wait = [0.0]
+
+        def job():
+            wait[0] = time.perf_counter() - submitted
+            with self._lock:
+                self._waits.append(wait[0])
+            return fn(*args, **kwargs)
+
+        try:
+            future = self._pool.submit(job)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        try:
+            result = future.result(timeout=self._timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._timed_out += 1
+            raise HashingUnavailableError("Password hashing timed out; retry later.")
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        with self._lock:
+            self._completed += 1
+        self._local.last_queue_wait = wait[0]
+        return result
+
+    def last_queue_wait(self) -> float:
+        """Seconds the calling thread's most recent job waited for a worker."""
+        return getattr(self._local, "last_queue_wait", 0.0)
+
+    def stats(self) -> HashingExecutorStats:
+        with self._lock:
+            waits = sorted(self._waits)
+            completed, failed = self._completed, self._failed
+            rejected = self._rejected
+            timed_out, in_flight = self._timed_out, self._in_flight
+        p95 = waits[min(int(len(waits) * 0.95), len(waits) - 1)] if waits else 0.0
+        return HashingExecutorStats(
+            completed=completed,
+            failed=failed,
+            rejected=rejected,
+            timed_out=timed_out,
+            in_flight=in_flight,
+            capacity=self._capacity,
+            queue_wait_avg_ms=(sum(waits) / len(waits) * 1000) if waits else 0.0,
+            queue_wait_p95_ms=p95 * 1000,
+            queue_wait_max_ms=(waits[-1] * 1000) if waits else 0.0,
+        )
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
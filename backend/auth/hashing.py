@@ -14,12 +14,64 @@ def verify_password(password: str, password_hash: str) -> bool:
 from .interfaces import (
     IPasswordHasher,
 )  # import from interfaces to avoid circular import
+import os
+import time
 import bcrypt
+from cryptography.exceptions import InvalidKey
+from cryptography.hazmat.primitives.kdf.argon2 import Argon2id
+from backend.config import settings
+
+ARGON2ID_PREFIX = "$argon2id$"
+
+
+def get_bcrypt_cost(password_hash: str) -> int | None:
+    """Return the cost factor stored in a bcrypt hash ("$2b$12$..."), or None."""
+    parts = password_hash.split("$") if isinstance(password_hash, str) else []
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def calibrate_bcrypt_cost(
+    target_ms: float = settings.BCRYPT_TARGET_MS,
+    min_rounds: int = settings.BCRYPT_MIN_ROUNDS,
+    max_rounds: int = settings.BCRYPT_MAX_ROUNDS,
+) -> int:
+    """
+    Benchmark this host and pick the highest bcrypt cost whose hash time stays
+    within `target_ms` (never below `min_rounds`).
+    Each extra round doubles the work, so timing stops as soon as the next
+    round would overshoot the target.
+    """
+    rounds = min_rounds
+    while rounds < max_rounds:
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", bcrypt.gensalt(rounds=rounds))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms * 2 > target_ms:
+            break
+        rounds += 1
+    return rounds
+
+
+def resolve_bcrypt_rounds(value: str = settings.BCRYPT_ROUNDS) -> int:
+    """Turn the BCRYPT_ROUNDS setting into a cost factor ("auto" calibrates)."""
+    if str(value).lower() == "auto":
+        return calibrate_bcrypt_cost()
+    return int(value)
 
 
 class BcryptPasswordHasher(IPasswordHasher):
     """Password hasher implementation using bcrypt."""
 
+    def __init__(self, rounds: int | None = None) -> None:
+        """
+        Args:
+            rounds (int | None): bcrypt cost factor for new hashes; defaults to
+                the BCRYPT_ROUNDS setting.
+        """
+        self.rounds = rounds if rounds is not None else resolve_bcrypt_rounds()
+
     def hash(self, password: str) -> str:
         """
         Hash a plaintext password using bcrypt.
@@ -38,9 +90,184 @@ class BcryptPasswordHasher(IPasswordHasher):
 
         try:
             password_bytes = password.encode("utf-8")
-            salt = bcrypt.gensalt()
+            salt = bcrypt.gensalt(rounds=self.rounds)
             hashed = bcrypt.hashpw(password_bytes, salt)
             return hashed.decode("utf-8")
         except Exception as e:
             # Log the error in production
             raise HashingError(f"Password hashing failed: {e}")
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        """
+        Verify a plaintext password against a bcrypt hash.
+        Args:
+            password (str): The plaintext password.
+            password_hash (str): The stored bcrypt hash.
+        Returns:
+            bool: True if the password matches, False otherwise.
+        """
+        return verify_password(password, password_hash)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """
+        True if a stored hash was made with a lower cost than configured.
+        Hashes are only ever upgraded: with BCRYPT_ROUNDS="auto" each host
+        calibrates its own cost, and rehashing downwards too would make hosts
+        with different costs rehash the same user back and forth.
+        """
+        cost = get_bcrypt_cost(password_hash)
+        return cost is not None and cost < self.rounds
+
+
+def get_argon2_params(password_hash: str) -> dict | None:
+    """
+    Return {"m": KiB, "t": passes, "p": lanes} from an Argon2id PHC string
+    ("$argon2id$v=19$m=65536,t=3,p=4$salt$hash"), or None.
+    """
+    if not isinstance(password_hash, str) or not password_hash.startswith(
+        ARGON2ID_PREFIX
+    ):
+        return None
+    parts = password_hash.split("$")
+    if len(parts) != 6:
+        return None
+    try:
+        return {
+            name: int(value)
+            for name, value in (item.split("=", 1) for item in parts[3].split(","))
+        }
+    except ValueError:
+        return None
+
+
+class Argon2idPasswordHasher(IPasswordHasher):
+    """Password hasher implementation using Argon2id (PHC string format)."""
+
+    def __init__(
+        self,
+        memory_kib: int = settings.ARGON2_MEMORY_KIB,
+        time_cost: int = settings.ARGON2_TIME_COST,
+        parallelism: int = settings.ARGON2_PARALLELISM,
+    ) -> None:
+        """
+        Args:
+            memory_kib (int): Memory cost per hash in KiB.
+            time_cost (int): Number of passes over the memory.
+            parallelism (int): Lanes; only shortens wall time on multi-core hosts.
+        """
+        self.memory_kib = memory_kib
+        self.time_cost = time_cost
+        self.parallelism = parallelism
+
+    def hash(self, password: str) -> str:
+        """
+        Hash a plaintext password using Argon2id.
+        Args:
+            password (str): The plaintext password to hash.
+        Returns:
+            str: The PHC-encoded Argon2id hash of the password.
+        Raises:
+            ValueError: If the password is empty or not a string.
+            HashingError: For unexpected hashing errors.
+        """
+        if not isinstance(password, str) or not password:
+            raise ValueError("Password must be a non-empty string.")
+
+        from backend.auth.exceptions import HashingError
+
+        try:
+            kdf = Argon2id(
+                salt=os.urandom(16),
+                length=32,
+                iterations=self.time_cost,
+                lanes=self.parallelism,
+                memory_cost=self.memory_kib,
+            )
+            return kdf.derive_phc_encoded(password.encode("utf-8"))
+        except Exception as e:
+            raise HashingError(f"Password hashing failed: {e}")
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        """
+        Verify a plaintext password against an Argon2id PHC string.
+        Returns:
+            bool: True if the password matches, False otherwise.
+        """
+        if not isinstance(password, str) or not isinstance(password_hash, str):
+            return False
+        try:
+            Argon2id.verify_phc_encoded(password.encode("utf-8"), password_hash)
+            return True
+        except (InvalidKey, ValueError):
+            return False
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True if a stored hash was made with different cost parameters."""
+        params = get_argon2_params(password_hash)
+        return params is not None and params != {
+            "m": self.memory_kib,
+            "t": self.time_cost,
+            "p": self.parallelism,
+        }
+
+
+def identify_hash_scheme(password_hash: str) -> str | None:
+    """Return "argon2id" or "bcrypt" from a stored hash's prefix, or None."""
+    if not isinstance(password_hash, str):
+        return None
+    if password_hash.startswith(ARGON2ID_PREFIX):
+        return "argon2id"
+    if password_hash.startswith(("$2a$", "$2b$", "$2y$")):
+        return "bcrypt"
+    return None
+
+
+class MultiSchemePasswordHasher(IPasswordHasher):
+    """
+    Hashes with one primary scheme and verifies hashes of every known scheme,
+    so the scheme can be switched without invalidating stored hashes. Hashes
+    of another scheme report needs_rehash and are upgraded on login.
+    """
+
+    def __init__(self, primary: str, hashers: dict[str, IPasswordHasher]) -> None:
+        """
+        Args:
+            primary (str): Scheme used for new hashes; a key of `hashers`.
+            hashers (dict): Scheme name -> hasher, as named by identify_hash_scheme.
+        Raises:
+            ValueError: If `primary` is not one of `hashers`.
+        """
+        if primary not in hashers:
+            raise ValueError(f"Unknown password hash scheme: {primary}")
+        self.primary = primary
+        self.hashers = hashers
+
+    def hash(self, password: str) -> str:
+        return self.hashers[self.primary].hash(password)
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        hasher = self.hashers.get(identify_hash_scheme(password_hash))
+        return hasher is not None and hasher.verify(password, password_hash)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        scheme = identify_hash_scheme(password_hash)
+        if scheme is None:
+            return False
+        if scheme != self.primary:
+            return True
+        return self.hashers[scheme].needs_rehash(password_hash)
+
+
+def build_password_hasher(
+    scheme: str = settings.PASSWORD_HASH_SCHEME,
+) -> MultiSchemePasswordHasher:
+    """Hasher for the app: `scheme` for new hashes, bcrypt and Argon2id verified."""
+    return MultiSchemePasswordHasher(
+        scheme,
+        {"bcrypt": BcryptPasswordHasher(), "argon2id": Argon2idPasswordHasher()},
+    )
+
+
+if __name__ == "__main__":
+    cost = calibrate_bcrypt_cost()
+    print(f"Recommended BCRYPT_ROUNDS for {settings.BCRYPT_TARGET_MS:.0f} ms: {cost}")
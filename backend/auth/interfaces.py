@@ -26,6 +26,10 @@ class IUserRepository(ABC):
     def get_user_by_email(self, email: str) -> dict | None:
         pass
 
+    @abstractmethod
+    def update_password_hash(self, user_id: int, password_hash: str) -> None:
+        pass
+
 
 class IPasswordHasher(ABC):
     """Interface for password hashing."""
@@ -34,6 +38,14 @@ class IPasswordHasher(ABC):
     def hash(self, password: str) -> str:
         pass
 
+    @abstractmethod
+    def verify(self, password: str, password_hash: str) -> bool:
+        pass
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Whether a stored hash should be replaced using current parameters."""
+        return False
+
 
 # --- SOLID: Auth Provider Abstraction ---
 class IAuthProvider(ABC):
@@ -48,3 +60,7 @@ class IAuthProvider(ABC):
     def get_identity(self) -> Any:
         """Get the current user's identity (user_id, etc)."""
         pass
+
+    def get_session_id(self) -> Any:
+        """Get an id for the current authenticated session, if any."""
+        return None
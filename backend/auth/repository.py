@@ -1,16 +1,17 @@
 # backend/auth/repository.py
-from ..utils.db import SQLiteConnection
+from ..utils.db import IDatabaseConnection
 from .interfaces import IUserRepository
 
 
 class UserRepository(IUserRepository):
     """Concrete implementation of IUserRepository using SQLite."""
 
-    def __init__(self, db_connection: SQLiteConnection) -> None:
+    def __init__(self, db_connection: IDatabaseConnection) -> None:
         """
         Initialize UserRepository with a database connection.
         Args:
-            db_connection (SQLiteConnection): The database connection abstraction.
+            db_connection (IDatabaseConnection): The database connection abstraction
+                (e.g. SQLiteConnectionPool; closing a pooled connection returns it).
         """
         self._db_connection = db_connection
 
@@ -111,3 +112,34 @@ class UserRepository(IUserRepository):
                     conn.close()
                 except Exception:
                     pass
+
+    def update_password_hash(self, user_id: int, password_hash: str) -> None:
+        """
+        Replace a user's stored password hash (e.g. after a cost change).
+        Args:
+            user_id (int): The user's id.
+            password_hash (str): The new hash.
+        Raises:
+            ValueError: If password_hash is not a string.
+            DatabaseError: If a database error occurs.
+        """
+        if not isinstance(password_hash, str):
+            raise ValueError("password_hash must be a string.")
+        conn = None
+        from backend.auth.exceptions import DatabaseError
+
+        try:
+            conn = self._db_connection.get_connection()
+            conn.execute(
+                "UPDATE users SET password_hash = ? WHERE id = ?",
+                (password_hash, user_id),
+            )
+            conn.commit()
+        except Exception as e:
+            raise DatabaseError(f"Database error during password update: {e}")
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
@@ -3,11 +3,50 @@ from backend.auth.validators import (
     ValidationError,
     validate_login_data,
 )
-from backend.auth.exceptions import DuplicateEmailError, DatabaseError, HashingError
+from backend.auth.exceptions import (
+    DuplicateEmailError,
+    DatabaseError,
+    HashingError,
+    HashingUnavailableError,
+)
+from backend.auth.session import current_session_id
 
 auth_bp = Blueprint("auth", __name__)
 
 
+def _run_hashing(fn, *args):
+    """Run a hashing call on the bounded executor (inline if none is configured)."""
+    executor = current_app.config.get("HASHING_EXECUTOR")
+    if executor is None:
+        return fn(*args)
+    return executor.run(fn, *args)
+
+
+def _with_hash_timing(response):
+    """Report the hashing queue wait to the client via a Server-Timing header."""
+    executor = current_app.config.get("HASHING_EXECUTOR")
+    if executor is not None:
+        wait_ms = executor.last_queue_wait() * 1000
+        response.headers["Server-Timing"] = f"hash-queue;dur={wait_ms:.1f}"
+    return response
+
+
+def _rehash_password(user_repo, hasher, user_id, password):
+    """Store a fresh hash for a verified password; failures never block login."""
+    try:
+        new_hash = _run_hashing(hasher.hash, password)
+        user_repo.update_password_hash(user_id, new_hash)
+    except (HashingError, HashingUnavailableError, DatabaseError) as e:
+        current_app.logger.warning(f"Rehash on login failed for user {user_id}: {e}")
+
+
+def _hashing_unavailable(error):
+    current_app.logger.warning(f"Hashing unavailable: {error}")
+    response = jsonify({"error": "Service busy, please retry shortly."})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
 @auth_bp.route("/login", methods=["POST"])
 def login_user_route():
     """
@@ -18,6 +57,7 @@ def login_user_route():
         400: Validation error or malformed input
         401: Invalid credentials
         500: Internal error
+        503: Password hashing saturated, retry later
     """
     user_repo = current_app.config["USER_REPOSITORY"]
     hasher = current_app.config["PASSWORD_HASHER"]
@@ -40,21 +80,25 @@ def login_user_route():
         from backend.auth.exceptions import InvalidCredentialsError
 
         user = user_repo.get_user_by_email(email)
-        if not user or not hasher.verify(password, user["password_hash"]):
+        if not user or not _run_hashing(hasher.verify, password, user["password_hash"]):
             raise InvalidCredentialsError("Invalid email or password.")
 
+        # Transparently move the hash to the current cost factor
+        if hasher.needs_rehash(user["password_hash"]):
+            _rehash_password(user_repo, hasher, user["id"], password)
+
         # Create JWT via auth provider abstraction
         access_token = auth_provider.create_access_token(identity=user["id"])
-        return (
-            jsonify(
-                {
-                    "access_token": access_token,
-                    "user": {"id": user["id"], "email": user["email"]},
-                }
-            ),
-            200,
+        response = jsonify(
+            {
+                "access_token": access_token,
+                "user": {"id": user["id"], "email": user["email"]},
+            }
         )
+        return _with_hash_timing(response), 200
 
+    except HashingUnavailableError as e:
+        return _hashing_unavailable(e)
     except DatabaseError as e:
         current_app.logger.error(f"Login DB error: {str(e)}")
         return jsonify({"error": f"Login error: {str(e)}"}), 500
@@ -70,6 +114,7 @@ def register_user_route():
         400: Validation error or malformed input
         409: Email already exists
         500: Internal error
+        503: Password hashing saturated, retry later
     """
     validator = current_app.config["REGISTRATION_VALIDATOR"]
     user_repo = current_app.config["USER_REPOSITORY"]
@@ -94,13 +139,46 @@ def register_user_route():
             return jsonify({"error": "Email already registered."}), 409
 
         # Hash password and create user
-        password_hash = hasher.hash(password)
+        password_hash = _run_hashing(hasher.hash, password)
         user_repo.create_user(email, password_hash)
 
-        return jsonify({"message": "User registered successfully."}), 201
+        response = jsonify({"message": "User registered successfully."})
+        return _with_hash_timing(response), 201
 
+    except HashingUnavailableError as e:
+        return _hashing_unavailable(e)
     except DuplicateEmailError:
         return jsonify({"error": "Email already registered."}), 409
     except (DatabaseError, HashingError) as e:
         current_app.logger.error(f"Registration error: {str(e)}")
         return jsonify({"error": f"Registration error: {str(e)}"}), 500
+
+
+@auth_bp.route("/logout", methods=["POST"])
+def logout_user_route():
+    """
+    User logout endpoint.
+    Drops every derived vault key, decrypted entry and search index cached
+    for the current session.
+    Returns:
+        200: Success
+        401: Missing or invalid token
+    """
+    auth_provider = current_app.config["AUTH_PROVIDER"]
+    key_cache = current_app.config.get("KEY_CACHE")
+    search_indexes = current_app.config.get("SEARCH_INDEXES")
+    entry_cache = current_app.config.get("ENTRY_CACHE")
+
+    @auth_provider.require_auth
+    def inner():
+        user_id = auth_provider.get_identity()
+        session_id = current_session_id(auth_provider)
+        if key_cache is not None:
+            key_cache.invalidate_session(user_id, session_id)
+        if search_indexes is not None:
+            search_indexes.invalidate_session(user_id, session_id)
+        if entry_cache is not None:
+            entry_cache.invalidate_session(user_id, session_id)
+        return jsonify({"message": "Logged out."}), 200
+
+    return inner()
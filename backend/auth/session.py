@@ -0,0 +1,41 @@
+"""
+Helpers for identifying the authenticated session of the current request.
+"""
+
+from typing import Any
+
+from flask import request
+
+# ASGI scope key carrying the authenticated user id back to the server
+# (see record_identity and backend/asgi.py).
+IDENTITY_SCOPE_KEY = "password_manager.identity"
+
+
+def current_session_id(auth_provider: Any) -> Any:
+    """
+    Return the session id (JWT `jti`) of the current request.
+    Auth providers that do not expose sessions yield None.
+    """
+    get_session_id = getattr(auth_provider, "get_session_id", None)
+    if get_session_id is None:
+        return None
+    return get_session_id()
+
+
+def record_identity(auth_provider: Any) -> None:
+    """
+    Store the current request's user id in its ASGI scope (a2wsgi exposes it
+    as environ["asgi.scope"]), where the ASGI server can read it once the
+    response is produced. A no-op under plain WSGI and for requests that
+    were never authenticated.
+    """
+    scope = request.environ.get("asgi.scope")
+    if scope is None:
+        return
+    try:
+        identity = auth_provider.get_identity()
+    except RuntimeError:
+        # flask_jwt_extended: no JWT was verified for this request.
+        return
+    if identity is not None:
+        scope[IDENTITY_SCOPE_KEY] = identity
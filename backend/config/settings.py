@@ -0,0 +1,178 @@
+"""
+Application settings.
+Every value can be overridden through an environment variable of the same name.
+"""
+
+import os
+
+# --- Vault key cache ---
+# Upper bound on cached derived vault keys (one per user session).
+KEY_CACHE_MAX_ENTRIES = int(os.environ.get("KEY_CACHE_MAX_ENTRIES", "1024"))
+# Seconds a cached key may sit unused before it is evicted.
+KEY_CACHE_TTL_SECONDS = float(os.environ.get("KEY_CACHE_TTL_SECONDS", "900"))
+
+# --- Database connection pool ---
+# Maximum number of open SQLite connections per process.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+# Seconds to wait for a free connection before failing.
+DB_POOL_TIMEOUT_SECONDS = float(os.environ.get("DB_POOL_TIMEOUT_SECONDS", "30"))
+# Run "SELECT 1" on checkout and replace broken connections.
+DB_POOL_HEALTH_CHECK = os.environ.get("DB_POOL_HEALTH_CHECK", "1") == "1"
+
+# --- Database performance profile ---
+# PRAGMAs applied to every new connection and at database initialization.
+DB_PROFILES = {
+    # SQLite defaults: rollback journal, fsync on every commit.
+    "legacy": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+    },
+    # WAL lets readers proceed alongside a writer; NORMAL sync is durable in WAL
+    # mode except for the last transactions before a power loss.
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,  # 256 MiB
+        "cache_size": -65536,  # negative = KiB, i.e. 64 MiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+DB_PROFILE = os.environ.get("DB_PROFILE", "production")
+
+# --- Schema migrations ---
+# Apply pending migrations when the app starts.
+DB_AUTO_MIGRATE = os.environ.get("DB_AUTO_MIGRATE", "1") == "1"
+# Rows per transaction for batched backfills; keeps write-lock hold times short.
+MIGRATION_BATCH_SIZE = int(os.environ.get("MIGRATION_BATCH_SIZE", "1000"))
+# Pause between backfill batches so request traffic can take the write lock.
+MIGRATION_BATCH_PAUSE_SECONDS = float(
+    os.environ.get("MIGRATION_BATCH_PAUSE_SECONDS", "0.01")
+)
+
+# --- Vault API ---
+# Largest page size GET /api/vault/ accepts for ?limit=.
+VAULT_PAGE_MAX_LIMIT = int(os.environ.get("VAULT_PAGE_MAX_LIMIT", "500"))
+# Rows fetched per batch while streaming GET /api/vault/export.
+VAULT_EXPORT_BATCH_SIZE = int(os.environ.get("VAULT_EXPORT_BATCH_SIZE", "500"))
+# Entries encrypted and inserted per transaction by POST /api/vault/import.
+VAULT_IMPORT_CHUNK_SIZE = int(os.environ.get("VAULT_IMPORT_CHUNK_SIZE", "500"))
+# Worker threads encrypting imported entries.
+VAULT_IMPORT_WORKERS = int(os.environ.get("VAULT_IMPORT_WORKERS", "4"))
+# Upper bound on entries accepted by a single import request.
+VAULT_IMPORT_MAX_ENTRIES = int(os.environ.get("VAULT_IMPORT_MAX_ENTRIES", "50000"))
+# Largest number of changed entries one GET /api/vault/changes page returns.
+VAULT_SYNC_MAX_CHANGES = int(os.environ.get("VAULT_SYNC_MAX_CHANGES", "1000"))
+# Upper bound on operations in one POST /api/vault/batch request.
+VAULT_BATCH_MAX_OPERATIONS = int(os.environ.get("VAULT_BATCH_MAX_OPERATIONS", "100"))
+
+# --- Vault search (blind index) ---
+# Longest prefix, in characters, that gets its own search token.
+VAULT_SEARCH_MAX_PREFIX = int(os.environ.get("VAULT_SEARCH_MAX_PREFIX", "16"))
+# Largest number of entries one GET /api/vault/search returns.
+VAULT_SEARCH_MAX_RESULTS = int(os.environ.get("VAULT_SEARCH_MAX_RESULTS", "100"))
+# Entries indexed per transaction when a search finds unindexed entries.
+VAULT_SEARCH_REINDEX_BATCH = int(os.environ.get("VAULT_SEARCH_REINDEX_BATCH", "500"))
+
+# --- Vault search (per-session fuzzy index) ---
+# Sessions holding a decrypted in-memory search index at once.
+VAULT_SEARCH_INDEX_MAX_SESSIONS = int(
+    os.environ.get("VAULT_SEARCH_INDEX_MAX_SESSIONS", "256")
+)
+# Idle lifetime of a session's index (defaults to the vault key cache TTL).
+VAULT_SEARCH_INDEX_TTL_SECONDS = float(
+    os.environ.get("VAULT_SEARCH_INDEX_TTL_SECONDS", str(KEY_CACHE_TTL_SECONDS))
+)
+# Share of the query's trigrams an entry needs to count as a fuzzy match.
+VAULT_SEARCH_FUZZY_MIN_SIMILARITY = float(
+    os.environ.get("VAULT_SEARCH_FUZZY_MIN_SIMILARITY", "0.5")
+)
+
+# --- Decrypted entry cache ---
+# Sessions keeping decrypted entries between listings at once.
+VAULT_ENTRY_CACHE_MAX_SESSIONS = int(
+    os.environ.get("VAULT_ENTRY_CACHE_MAX_SESSIONS", "256")
+)
+# Decrypted entries kept per session; further rows are decrypted every time.
+VAULT_ENTRY_CACHE_MAX_ENTRIES = int(
+    os.environ.get("VAULT_ENTRY_CACHE_MAX_ENTRIES", "20000")
+)
+# Idle lifetime of a session's decrypted entries (defaults to the key cache TTL).
+VAULT_ENTRY_CACHE_TTL_SECONDS = float(
+    os.environ.get("VAULT_ENTRY_CACHE_TTL_SECONDS", str(KEY_CACHE_TTL_SECONDS))
+)
+
+# --- Vault listing decryption ---
+# Worker threads decrypting large GET /api/vault/ pages; 1 decrypts inline.
+VAULT_DECRYPT_WORKERS = int(
+    os.environ.get("VAULT_DECRYPT_WORKERS", str(min(os.cpu_count() or 1, 8)))
+)
+# Listings with fewer entries are decrypted on the request thread.
+VAULT_DECRYPT_PARALLEL_THRESHOLD = int(
+    os.environ.get("VAULT_DECRYPT_PARALLEL_THRESHOLD", "256")
+)
+# Most entries one worker task decrypts.
+VAULT_DECRYPT_CHUNK_SIZE = int(os.environ.get("VAULT_DECRYPT_CHUNK_SIZE", "256"))
+
+# --- Salt cache ---
+# Per-user vault salts kept in memory (salts never change once created).
+SALT_CACHE_MAX_ENTRIES = int(os.environ.get("SALT_CACHE_MAX_ENTRIES", "10000"))
+
+# --- ASGI serving (backend/asgi.py) ---
+# a2wsgi threads running the synchronous Flask views when served over ASGI.
+ASGI_REQUEST_WORKERS = int(os.environ.get("ASGI_REQUEST_WORKERS", "32"))
+# Requests admitted to those threads (running or queued); beyond this 503.
+# Parked long-polls do not count.
+ASGI_MAX_PENDING_REQUESTS = int(os.environ.get("ASGI_MAX_PENDING_REQUESTS", "256"))
+# Threads running the async vault repository's SQLite calls (the version
+# checks of parked long-polls).
+ASGI_DB_WORKERS = int(os.environ.get("ASGI_DB_WORKERS", "8"))
+# Longest ?wait= a GET /api/vault/changes long-poll may ask for.
+ASGI_LONG_POLL_MAX_SECONDS = float(os.environ.get("ASGI_LONG_POLL_MAX_SECONDS", "60"))
+# Parked long-polls re-check the vault version this often, to see writes
+# handled by other worker processes.
+ASGI_LONG_POLL_RECHECK_SECONDS = float(
+    os.environ.get("ASGI_LONG_POLL_RECHECK_SECONDS", "5")
+)
+
+# --- Password hashing executor ---
+# Worker threads running bcrypt (it releases the GIL while hashing).
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", str(os.cpu_count() or 2)))
+# Extra jobs allowed to wait for a worker; beyond this requests fail with 503.
+HASH_MAX_QUEUE = int(os.environ.get("HASH_MAX_QUEUE", "16"))
+# Seconds a request waits for its hash before giving up with 503.
+HASH_TIMEOUT_SECONDS = float(os.environ.get("HASH_TIMEOUT_SECONDS", "10"))
+
+# --- Password hash cost ---
+# bcrypt cost factor for new hashes, or "auto" to calibrate at startup so one
+# hash takes about BCRYPT_TARGET_MS on this host. Users whose stored cost
+# differs are transparently rehashed on their next successful login.
+BCRYPT_ROUNDS = os.environ.get("BCRYPT_ROUNDS", "12")
+BCRYPT_TARGET_MS = float(os.environ.get("BCRYPT_TARGET_MS", "250"))
+BCRYPT_MIN_ROUNDS = int(os.environ.get("BCRYPT_MIN_ROUNDS", "10"))
+BCRYPT_MAX_ROUNDS = int(os.environ.get("BCRYPT_MAX_ROUNDS", "16"))
+
+# --- Password hash scheme ---
+# Scheme for new password hashes: "bcrypt" or "argon2id". Hashes of the other
+# scheme still verify and are upgraded on the next successful login.
+PASSWORD_HASH_SCHEME = os.environ.get("PASSWORD_HASH_SCHEME", "bcrypt")
+# Argon2id cost for password hashes: memory (KiB), passes, lanes.
+ARGON2_MEMORY_KIB = int(os.environ.get("ARGON2_MEMORY_KIB", "65536"))
+ARGON2_TIME_COST = int(os.environ.get("ARGON2_TIME_COST", "3"))
+ARGON2_PARALLELISM = int(os.environ.get("ARGON2_PARALLELISM", "4"))
+
+# --- Vault key derivation ---
+# KDF recorded for new vaults: "pbkdf2-sha256" or "argon2id". Existing vaults
+# keep the KDF stored with them in user_vault_keys.
+VAULT_KDF = os.environ.get("VAULT_KDF", "pbkdf2-sha256")
+VAULT_PBKDF2_ITERATIONS = int(os.environ.get("VAULT_PBKDF2_ITERATIONS", "390000"))
+VAULT_ARGON2_MEMORY_KIB = int(os.environ.get("VAULT_ARGON2_MEMORY_KIB", "65536"))
+VAULT_ARGON2_TIME_COST = int(os.environ.get("VAULT_ARGON2_TIME_COST", "3"))
+VAULT_ARGON2_PARALLELISM = int(os.environ.get("VAULT_ARGON2_PARALLELISM", "4"))
+
+# --- Vault entry cipher ---
+# Cipher recorded for new vaults: "fernet" (AES-128-CBC + HMAC-SHA256),
+# "aes-256-gcm" or "chacha20-poly1305". Existing vaults keep the cipher stored
+# with them and move to this one on their next vault password change.
+VAULT_CIPHER = os.environ.get("VAULT_CIPHER", "fernet")
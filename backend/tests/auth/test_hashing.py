@@ -0,0 +1,85 @@
+"""
+Tests for password hashing: bcrypt cost calibration and rehash checks,
+Argon2id hashes and the multi-scheme hasher.
+"""
+
+from backend.auth import hashing
+from backend.auth.hashing import (
+    Argon2idPasswordHasher,
+    BcryptPasswordHasher,
+    MultiSchemePasswordHasher,
+    calibrate_bcrypt_cost,
+    get_bcrypt_cost,
+    resolve_bcrypt_rounds,
+)
+
+
+def test_hash_uses_configured_cost_and_verifies():
+    hasher = BcryptPasswordHasher(rounds=5)
+    hashed = hasher.hash("Password123")
+    assert get_bcrypt_cost(hashed) == 5
+    assert hasher.verify("Password123", hashed)
+    assert not hasher.verify("wrong", hashed)
+
+
+def test_needs_rehash_compares_stored_cost():
+    hasher = BcryptPasswordHasher(rounds=5)
+    assert not hasher.needs_rehash(hasher.hash("Password123"))
+    assert hasher.needs_rehash(BcryptPasswordHasher(rounds=4).hash("Password123"))
+    assert not hasher.needs_rehash(BcryptPasswordHasher(rounds=6).hash("Password123"))
+    assert not hasher.needs_rehash("not-a-hash")
+
+
+def test_calibration_stops_before_overshooting(monkeypatch):
+    # Pretend each hash takes 2 ** rounds microseconds.
+    clock = {"now": 0.0}
+
+    def fake_hashpw(password, salt):
+        clock["now"] += (2 ** int(salt.split(b"$")[2])) / 1_000_000
+        return b""
+
+    monkeypatch.setattr(hashing.bcrypt, "hashpw", fake_hashpw)
+    monkeypatch.setattr(hashing.time, "perf_counter", lambda: clock["now"])
+    # 2**12 us = 4.1 ms, 2**13 us = 8.2 ms: a 5 ms budget lands on 12.
+    assert calibrate_bcrypt_cost(target_ms=5, min_rounds=4, max_rounds=16) == 12
+    assert calibrate_bcrypt_cost(target_ms=0.001, min_rounds=4, max_rounds=16) == 4
+    assert calibrate_bcrypt_cost(target_ms=10**9, min_rounds=4, max_rounds=8) == 8
+
+
+def test_resolve_bcrypt_rounds(monkeypatch):
+    assert resolve_bcrypt_rounds("11") == 11
+    monkeypatch.setattr(hashing, "calibrate_bcrypt_cost", lambda: 13)
+    assert resolve_bcrypt_rounds("auto") == 13
+
+
+def _argon2(**overrides):
+    params = {"memory_kib": 64, "time_cost": 1, "parallelism": 1}
+    params.update(overrides)
+    return Argon2idPasswordHasher(**params)
+
+
+def test_argon2id_hash_verifies_and_encodes_params():
+    hasher = _argon2(parallelism=2)
+    hashed = hasher.hash("Password123")
+    assert hashed.startswith("$argon2id$v=19$m=64,t=1,p=2$")
+    assert hasher.verify("Password123", hashed)
+    assert not hasher.verify("wrong", hashed)
+    assert not hasher.verify("Password123", "not-a-hash")
+    assert not hasher.needs_rehash(hashed)
+    assert _argon2(time_cost=2).needs_rehash(hashed)
+
+
+def test_multi_scheme_verifies_both_and_flags_other_scheme():
+    bcrypt_hasher = BcryptPasswordHasher(rounds=4)
+    argon2 = _argon2()
+    hasher = MultiSchemePasswordHasher(
+        "argon2id", {"bcrypt": bcrypt_hasher, "argon2id": argon2}
+    )
+    legacy = bcrypt_hasher.hash("Password123")
+    current = hasher.hash("Password123")
+    assert current.startswith("$argon2id$")
+    assert hasher.verify("Password123", legacy)
+    assert hasher.verify("Password123", current)
+    assert not hasher.verify("Password123", "plaintext")
+    assert hasher.needs_rehash(legacy)
+    assert not hasher.needs_rehash(current)
@@ -0,0 +1,100 @@
+"""
+Tests for the bounded password hashing executor and its 503 backpressure.
+"""
+
+import threading
+
+import pytest
+from unittest.mock import MagicMock
+
+from backend.auth.exceptions import HashingUnavailableError
+from backend.auth.executor import HashingExecutor
+
+
+def test_run_returns_result_and_records_queue_wait():
+    executor = HashingExecutor(max_workers=1, max_queue=0)
+    assert executor.run(lambda a, b: a + b, 2, 3) == 5
+    assert executor.last_queue_wait() >= 0
+    stats = executor.stats()
+    assert stats.completed == 1 and stats.in_flight == 0
+
+
+def test_run_propagates_job_errors():
+    executor = HashingExecutor(max_workers=1, max_queue=0)
+
+    def boom():
+        raise ValueError("bad")
+
+    with pytest.raises(ValueError):
+        executor.run(boom)
+    stats = executor.stats()
+    assert (stats.completed, stats.failed, stats.in_flight) == (0, 1, 0)
+
+
+def test_saturated_executor_fails_fast():
+    executor = HashingExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+
+    callers = [threading.Thread(target=executor.run, args=(slow,)) for _ in range(2)]
+    for t in callers:
+        t.start()
+    started.wait(5)
+    with pytest.raises(HashingUnavailableError):
+        executor.run(lambda: None)
+    release.set()
+    for t in callers:
+        t.join()
+    stats = executor.stats()
+    assert stats.rejected == 1
+    assert stats.completed == 2
+
+
+def test_timeout_raises_unavailable():
+    executor = HashingExecutor(max_workers=1, max_queue=0, timeout=0.01)
+    release = threading.Event()
+    with pytest.raises(HashingUnavailableError):
+        executor.run(release.wait, 5)
+    release.set()
+    executor.shutdown()
+    stats = executor.stats()
+    assert (stats.timed_out, stats.completed, stats.failed) == (1, 0, 0)
+
+
+def test_login_returns_503_when_hashing_saturated(app, client):
+    user_repo = MagicMock()
+    user_repo.get_user_by_email.return_value = {
+        "id": 1,
+        "email": "user@example.com",
+        "password_hash": "$2b$12$abcdefghijklmnopqrstuv",
+    }
+    executor = MagicMock()
+    executor.run.side_effect = HashingUnavailableError("busy")
+    app.config["USER_REPOSITORY"] = user_repo
+    app.config["HASHING_EXECUTOR"] = executor
+    resp = client.post(
+        "/api/auth/login",
+        json={"email": "user@example.com", "password": "correctpassword"},
+    )
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+
+
+def test_register_hashes_on_executor_and_reports_wait(app, client):
+    hasher = MagicMock()
+    hasher.hash.return_value = "hashed"
+    user_repo = MagicMock()
+    user_repo.is_email_taken.return_value = False
+    app.config["PASSWORD_HASHER"] = hasher
+    app.config["USER_REPOSITORY"] = user_repo
+    resp = client.post(
+        "/api/auth/register",
+        json={"email": "new@example.com", "password": "Password123"},
+    )
+    assert resp.status_code == 201
+    assert resp.headers["Server-Timing"].startswith("hash-queue;dur=")
+    user_repo.create_user.assert_called_once_with("new@example.com", "hashed")
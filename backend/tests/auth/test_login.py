@@ -7,6 +7,11 @@ Uses pytest and unittest.mock for DB mocking.
 import pytest
 from unittest.mock import patch, MagicMock
 from backend.app import create_app
+from backend.auth.hashing import (
+    Argon2idPasswordHasher,
+    BcryptPasswordHasher,
+    MultiSchemePasswordHasher,
+)
 
 
 @pytest.fixture
@@ -99,3 +104,76 @@ def test_login_missing_fields(client):
     data = resp.get_json()
     assert "error" in data
     assert "Missing" in data["error"] or "required" in data["error"]
+
+
+def test_login_rehashes_outdated_cost(app, client):
+    import bcrypt
+
+    old_hash = bcrypt.hashpw(b"correctpassword", bcrypt.gensalt(rounds=4)).decode()
+    mock_user_repo = MagicMock()
+    mock_user_repo.get_user_by_email.return_value = {
+        "id": 1,
+        "email": "user@example.com",
+        "password_hash": old_hash,
+    }
+    with app.app_context():
+        app.config["USER_REPOSITORY"] = mock_user_repo
+        app.config["PASSWORD_HASHER"] = BcryptPasswordHasher(rounds=5)
+    resp = client.post(
+        "/api/auth/login",
+        json={"email": "user@example.com", "password": "correctpassword"},
+    )
+    assert resp.status_code == 200
+    user_id, new_hash = mock_user_repo.update_password_hash.call_args.args
+    assert user_id == 1
+    assert new_hash.startswith("$2b$05$")
+    assert bcrypt.checkpw(b"correctpassword", new_hash.encode())
+
+
+def test_login_rehash_failure_does_not_block_login(app, client):
+    import bcrypt
+    from backend.auth.exceptions import DatabaseError
+
+    old_hash = bcrypt.hashpw(b"correctpassword", bcrypt.gensalt(rounds=4)).decode()
+    mock_user_repo = MagicMock()
+    mock_user_repo.get_user_by_email.return_value = {
+        "id": 1,
+        "email": "user@example.com",
+        "password_hash": old_hash,
+    }
+    mock_user_repo.update_password_hash.side_effect = DatabaseError("locked")
+    with app.app_context():
+        app.config["USER_REPOSITORY"] = mock_user_repo
+        app.config["PASSWORD_HASHER"] = BcryptPasswordHasher(rounds=5)
+    resp = client.post(
+        "/api/auth/login",
+        json={"email": "user@example.com", "password": "correctpassword"},
+    )
+    assert resp.status_code == 200
+
+
+def test_login_upgrades_bcrypt_hash_to_argon2id(app, client):
+    import bcrypt
+
+    old_hash = bcrypt.hashpw(b"correctpassword", bcrypt.gensalt(rounds=4)).decode()
+    mock_user_repo = MagicMock()
+    mock_user_repo.get_user_by_email.return_value = {
+        "id": 1,
+        "email": "user@example.com",
+        "password_hash": old_hash,
+    }
+    argon2 = Argon2idPasswordHasher(memory_kib=64, time_cost=1, parallelism=1)
+    with app.app_context():
+        app.config["USER_REPOSITORY"] = mock_user_repo
+        app.config["PASSWORD_HASHER"] = MultiSchemePasswordHasher(
+            "argon2id",
+            {"bcrypt": BcryptPasswordHasher(rounds=4), "argon2id": argon2},
+        )
+    resp = client.post(
+        "/api/auth/login",
+        json={"email": "user@example.com", "password": "correctpassword"},
+    )
+    assert resp.status_code == 200
+    _, new_hash = mock_user_repo.update_password_hash.call_args.args
+    assert new_hash.startswith("$argon2id$")
+    assert argon2.verify("correctpassword", new_hash)
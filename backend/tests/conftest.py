@@ -1,6 +1,7 @@
 # conftest.py -- shared test fixtures for dependency injection
 import pytest
 from backend.app import create_app
+from backend.vault.salt_utils import clear_salt_cache
 
 
 class NoOpAuthProvider:
@@ -16,6 +17,14 @@ class NoOpAuthProvider:
         return "test-token"
 
 
+@pytest.fixture(autouse=True)
+def reset_salt_cache():
+    """Salts are cached process-wide; keep tests that swap databases isolated."""
+    clear_salt_cache()
+    yield
+    clear_salt_cache()
+
+
 @pytest.fixture
 def app():
     app = create_app()
@@ -0,0 +1,152 @@
+import sqlite3
+
+import pytest
+
+from database import migrations
+from database.migrations import Migration, get_schema_version, migrate, run_batched
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "migrate.db")
+    yield conn
+    conn.close()
+
+
+def table_names(conn):
+    return {
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'index')"
+        )
+    }
+
+
+def test_migrate_fresh_database_to_latest(conn):
+    applied = migrate(conn)
+    assert applied == [m.version for m in migrations.MIGRATIONS]
+    assert get_schema_version(conn) == migrations.latest_version()
+    assert {"users", "vault", "user_salts", "idx_vault_user_id_id"} <= table_names(conn)
+    # Re-running is a no-op.
+    assert migrate(conn) == []
+
+
+def test_migrate_respects_target(conn):
+    assert migrate(conn, target=1) == [1]
+    assert "idx_vault_user_id_id" not in table_names(conn)
+    assert migrate(conn, target=2) == [2]
+
+
+def test_failed_migration_rolls_back_and_keeps_version(conn):
+    def broken(c):
+        c.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    steps = [
+        Migration(1, "ok", lambda c: c.execute("CREATE TABLE t (id INTEGER)")),
+        Migration(2, "broken", broken),
+    ]
+    with pytest.raises(RuntimeError):
+        migrate(conn, migrations=steps)
+    assert get_schema_version(conn) == 1
+    assert "half_done" not in table_names(conn)
+
+
+def test_run_batched_backfill_commits_in_chunks(conn):
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value INTEGER)")
+    conn.executemany("INSERT INTO items (id) VALUES (?)", [(i,) for i in range(1, 26)])
+    conn.commit()
+    batches = []
+
+    def backfill(c):
+        def apply_batch(c, ids):
+            batches.append(len(ids))
+            c.executemany(
+                "UPDATE items SET value = id * 2 WHERE id = ?", [(i,) for i in ids]
+            )
+
+        run_batched(
+            c,
+            "SELECT id FROM items WHERE id > ? AND value IS NULL ORDER BY id LIMIT ?",
+            apply_batch,
+            batch_size=10,
+            pause_seconds=0,
+        )
+
+    migrate(conn, migrations=[Migration(1, "backfill", backfill, transactional=False)])
+    assert batches == [10, 10, 5]
+    done = conn.execute("SELECT COUNT(*) FROM items WHERE value = id * 2").fetchone()
+    assert done[0] == 25
+    assert get_schema_version(conn) == 1
+
+
+def test_duplicate_versions_rejected(conn):
+    steps = [Migration(1, "a", lambda c: None), Migration(1, "b", lambda c: None)]
+    with pytest.raises(ValueError):
+        migrate(conn, migrations=steps)
+
+
+def test_vault_ciphertext_text_rows_become_blobs(conn):
+    import base64
+
+    migrate(conn, target=4)
+    raw = bytes([0x80]) + b"\x00\xff" * 20
+    conn.executemany(
+        "INSERT INTO vault (user_id, encrypted_entry) VALUES (1, ?)",
+        [(base64.urlsafe_b64encode(raw).decode(),), ("not base64!",)],
+    )
+    conn.commit()
+    assert 5 in migrate(conn)
+    rows = conn.execute("SELECT encrypted_entry FROM vault ORDER BY id").fetchall()
+    assert rows[0][0] == raw
+    assert rows[1][0] == "not base64!"
+
+
+def test_change_tracking_numbers_existing_rows(conn):
+    migrate(conn, target=7)
+    conn.executemany(
+        "INSERT INTO vault (user_id, encrypted_entry) VALUES (?, x'00')",
+        [(1,), (2,), (1,)],
+    )
+    conn.commit()
+    assert migrate(conn, target=8) == [8]
+    rows = conn.execute("SELECT id, change_seq, deleted FROM vault").fetchall()
+    assert rows == [(1, 0, 0), (2, 0, 0), (3, 0, 0)]  # columns only, no rewrite
+    conn.execute("UPDATE vault SET change_seq = 7 WHERE id = 3")
+    conn.commit()
+    assert migrate(conn, target=10) == [9, 10]
+    rows = conn.execute("SELECT id, change_seq, deleted FROM vault").fetchall()
+    assert rows == [(1, 1, 0), (2, 2, 0), (3, 7, 0)]
+
+
+def test_writes_during_the_backfill_stay_above_it(conn):
+    from backend.vault.repository import VaultRepository
+
+    migrate(conn, target=7)
+    conn.executemany(
+        "INSERT INTO vault (user_id, encrypted_entry) VALUES (?, x'00')",
+        [(1,), (2,), (2,), (2,), (2,), (2,), (1,)],
+    )
+    conn.commit()
+    assert migrate(conn, target=9) == [8, 9]  # the backfill has not run yet
+    conn.row_factory = sqlite3.Row
+    repo = VaultRepository(conn)
+    for n in range(3):
+        repo.update_entry(1, 7, {"encrypted_entry": b"%d" % n})
+    repo.update_entry(2, 2, {"encrypted_entry": b"x"})
+
+    full = repo.list_changes(1)
+    assert [row["id"] for row in full] == [1, 7]
+    assert migrate(conn, target=10) == [10]
+    assert repo.list_changes(1, since=full[-1]["change_seq"]) == []
+    assert [row["id"] for row in repo.list_changes(2)] == [3, 4, 5, 6, 2]
+
+
+def test_existing_vaults_stay_server_side(conn):
+    migrate(conn, target=8)
+    conn.execute(
+        "INSERT INTO user_vault_keys (user_id, kdf, kdf_params) VALUES (1, 'k', '{}')"
+    )
+    conn.commit()
+    assert migrate(conn, target=9) == [9]
+    assert conn.execute("SELECT client_side FROM user_vault_keys").fetchall() == [(0,)]
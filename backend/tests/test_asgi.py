@@ -0,0 +1,168 @@
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("a2wsgi")
+
+from backend.asgi import AsgiApp, create_asgi_app  # noqa: E402
+
+
+class VersionStub:
+    """Stand-in for the async vault repository's version lookups."""
+
+    def __init__(self, version):
+        self.version = version
+
+    async def get_vault_version(self, user_id):
+        return self.version
+
+
+@pytest.fixture
+def asgi(app):
+    asgi_app = create_asgi_app(app)
+    yield asgi_app
+    asgi_app.close()
+
+
+async def request(app, method, path, query=b"", body=(b"",), disconnect=None):
+    """Drive one HTTP request through an ASGI app; (status, headers, body)."""
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(body) - 1}
+        for i, chunk in enumerate(body)
+    ]
+    disconnect = disconnect or asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": [(b"content-type", b"application/json")],
+        "http_version": "1.1",
+        "scheme": "http",
+        "server": ("testserver", 80),
+    }
+    await app(scope, receive, send)
+    if not sent:
+        return None
+    return (
+        sent[0]["status"],
+        dict(sent[0]["headers"]),
+        b"".join(m.get("body", b"") for m in sent[1:]),
+    )
+
+
+@patch("backend.vault.services.VaultService.add_entry")
+def test_request_body_streams_to_the_flask_view(mock_add, asgi):
+    mock_add.return_value = {"id": 3, "encrypted_entry": b"\x02ab"}
+    body = (b'{"encrypted_', b'entry": "AmFi"}')
+    status, headers, content = asyncio.run(
+        request(asgi, "POST", "/api/vault/", body=body)
+    )
+    assert status == 201 and headers[b"content-type"] == b"application/json"
+    assert json.loads(content)["id"] == 3
+    assert mock_add.call_args.args[1] == {"encrypted_entry": b"\x02ab"}
+
+
+@patch("backend.vault.services.VaultService.add_entry")
+@patch("backend.vault.services.VaultService.changes")
+def test_long_poll_parks_until_the_user_writes(mock_changes, mock_add, app, asgi):
+    mock_add.return_value = {"id": 6, "encrypted_entry": b"\x02ab"}
+    idle = {"entries": [], "deleted": [], "sync_token": 5, "has_more": False}
+    changed = {
+        "entries": [{"id": 6}], "deleted": [], "sync_token": 6, "has_more": False
+    }
+    mock_changes.side_effect = [idle, changed]
+    versions = VersionStub(5)
+    app.config["ASYNC_VAULT_REPOSITORY"] = versions
+    server = AsgiApp(app)
+    notifier = app.config["CHANGE_NOTIFIER"]
+
+    async def scenario():
+        poll = asyncio.ensure_future(
+            request(server, "GET", "/api/vault/changes", b"since=5&wait=30")
+        )
+        while not notifier.waiting():
+            await asyncio.sleep(0.01)
+        versions.version = 6
+        body = (b'{"encrypted_entry": "AmFi"}',)
+        assert (await request(server, "POST", "/api/vault/", body=body))[0] == 201
+        return await asyncio.wait_for(poll, 5)
+
+    started = time.monotonic()
+    status, _, content = asyncio.run(scenario())
+    assert time.monotonic() - started < 5
+    assert status == 200 and json.loads(content) == changed
+    assert mock_changes.call_count == 2
+
+
+@patch("backend.vault.services.VaultService.changes")
+def test_long_poll_times_out_or_ends_on_disconnect(mock_changes, app, asgi):
+    idle = {"entries": [], "deleted": [], "sync_token": 5, "has_more": False}
+    mock_changes.return_value = idle
+    app.config["ASYNC_VAULT_REPOSITORY"] = VersionStub(5)
+    server = AsgiApp(app)
+
+    status, _, content = asyncio.run(
+        request(server, "GET", "/api/vault/changes", b"since=5&wait=0.1")
+    )
+    assert status == 200 and json.loads(content) == idle
+
+    async def leave():
+        disconnect = asyncio.Event()
+        poll = asyncio.ensure_future(
+            request(
+                server,
+                "GET",
+                "/api/vault/changes",
+                b"since=5&wait=30",
+                disconnect=disconnect,
+            )
+        )
+        await asyncio.sleep(0.05)
+        disconnect.set()
+        return await asyncio.wait_for(poll, 5)
+
+    assert asyncio.run(leave()) is None
+    assert app.config["CHANGE_NOTIFIER"].waiting() == 0
+
+
+@patch("backend.vault.services.VaultService.vault_version", return_value=1)
+@patch("backend.vault.services.VaultService.list_entries")
+def test_requests_beyond_capacity_get_503(mock_list, mock_version, app, asgi):
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_list(*args, **kwargs):
+        entered.set()
+        release.wait(5)
+        return []
+
+    mock_list.side_effect = slow_list
+    server = AsgiApp(app, max_pending=1)
+
+    async def scenario():
+        first = asyncio.ensure_future(request(server, "GET", "/api/vault/"))
+        while not entered.is_set():
+            await asyncio.sleep(0.01)
+        second = await request(server, "GET", "/api/vault/")
+        release.set()
+        return (await first)[0], second[0], second[1]
+
+    first, second, headers = asyncio.run(scenario())
+    assert (first, second) == (200, 503)
+    assert headers[b"retry-after"] == b"1"
@@ -0,0 +1,148 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from backend.utils.db import PoolTimeoutError, SQLiteConnectionPool
+from backend.utils.executors import BlockingExecutor
+from backend.vault.repository import AsyncVaultRepository, VaultRepository
+from database.migrations import migrate
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "pool.db"
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.close()
+    return str(path)
+
+
+def test_pool_reuses_connections(db_path):
+    pool = SQLiteConnectionPool(db_path, pool_size=2)
+    for _ in range(5):
+        conn = pool.get_connection()
+        conn.execute("SELECT 1")
+        conn.close()
+        conn.close()  # idempotent
+    stats = pool.stats()
+    assert stats.creations == 1
+    assert stats.checkouts == 5
+    assert stats.in_use == 0 and stats.idle == 1
+
+
+def test_closed_proxy_rejects_use(db_path):
+    pool = SQLiteConnectionPool(db_path, pool_size=1)
+    conn = pool.get_connection()
+    conn.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_pool_waits_then_times_out(db_path):
+    pool = SQLiteConnectionPool(db_path, pool_size=1, timeout=0.05)
+    held = pool.get_connection()
+    with pytest.raises(PoolTimeoutError):
+        pool.get_connection()
+    assert pool.stats().waits == 1
+
+    # A waiter is served as soon as the connection is returned.
+    threading.Timer(0.01, held.close).start()
+    pool._timeout = 2
+    with pool.connection() as conn:
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+
+
+def test_release_rolls_back_open_transaction(db_path):
+    pool = SQLiteConnectionPool(db_path, pool_size=1)
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO vault (user_id, encrypted_entry) VALUES (1, 'x')")
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM vault").fetchone()[0] == 0
+
+
+def test_health_check_replaces_broken_connection(db_path):
+    pool = SQLiteConnectionPool(db_path, pool_size=1)
+    conn = pool.get_connection()
+    raw = conn._conn
+    conn.close()
+    raw.close()  # simulate a dead connection sitting in the pool
+    with pool.connection() as conn:
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+    stats = pool.stats()
+    assert stats.health_check_failures == 1
+    assert stats.creations == 2
+
+
+def test_vault_repository_on_pool(db_path):
+    pool = SQLiteConnectionPool(db_path, pool_size=2)
+    repo = VaultRepository(pool)
+    entry = repo.add_entry(1, {"encrypted_entry": "token"})
+    assert repo.get_entry(1, entry["id"]) == entry
+    assert repo.list_entries(1) == [entry]
+    assert repo.delete_entry(1, entry["id"]) is True
+    assert pool.stats().in_use == 0
+
+
+def test_async_vault_repository_runs_on_executor(db_path):
+    pool = SQLiteConnectionPool(db_path, pool_size=2)
+    executor = BlockingExecutor(2, "test-db")
+    repo = VaultRepository(pool)
+    async_repo = AsyncVaultRepository(repo, executor)
+    repo.add_entry(1, {"encrypted_entry": b"a"})
+    repo.add_entry(2, {"encrypted_entry": b"b"})
+    repo.add_entry(2, {"encrypted_entry": b"c"})
+
+    async def versions():
+        return await asyncio.gather(
+            *(async_repo.get_vault_version(user_id) for user_id in (1, 2, 3))
+        )
+
+    try:
+        assert asyncio.run(versions()) == [1, 3, 0]
+    finally:
+        executor.shutdown()
+    assert pool.stats().in_use == 0
+
+
+def test_unlock_and_list_need_one_connection_at_a_time(db_path):
+    from flask import Flask
+
+    from backend.vault import salt_utils
+    from backend.vault.services import VaultService
+
+    pool = SQLiteConnectionPool(db_path, pool_size=1, timeout=2)
+    app = Flask(__name__)
+    app.config["DB_CONNECTION"] = pool
+    service = VaultService(VaultRepository(pool))
+    salt_utils.clear_salt_cache()
+    try:
+        with app.app_context():
+            service.add_entry(1, {"service": "GitHub"}, password="pw")
+            (entry,) = service.list_entries(1, password="pw")
+    finally:
+        salt_utils.clear_salt_cache()
+    assert entry["decrypted"] == {"service": "GitHub"}
+    stats = pool.stats()
+    assert (stats.in_use, stats.waits) == (0, 0)
+
+
+def test_pool_applies_db_profile(db_path):
+    from backend.utils.db import get_db_profile
+
+    pool = SQLiteConnectionPool(db_path, profile=get_db_profile("production"))
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+
+
+def test_apply_db_profile_rejects_unsafe_values():
+    from backend.utils.db import apply_db_profile
+
+    conn = sqlite3.connect(":memory:")
+    with pytest.raises(ValueError):
+        apply_db_profile(conn, {"journal_mode": "WAL; DROP TABLE vault"})
+    with pytest.raises(ValueError):
+        apply_db_profile(conn, {"foreign_keys": 1})
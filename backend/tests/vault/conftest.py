@@ -0,0 +1,65 @@
+import sqlite3
+from contextlib import ExitStack, contextmanager
+from unittest.mock import patch
+
+import pytest
+
+from backend.vault.crypto_utils import CIPHER_AES_GCM, CIPHER_FERNET, LEGACY_KDF
+from backend.vault.entry_cache import DecryptedEntryCache
+from backend.vault.repository import VaultRepository
+from backend.vault.services import VaultService
+from backend.vault.session_index import SessionSearchIndexes
+from database.migrations import migrate
+
+
+@contextmanager
+def patched_key_material(salt=b"s" * 16, kdf=LEGACY_KDF, cipher=CIPHER_FERNET):
+    """
+    Serve VaultService's key material from memory instead of the app database
+    (also used by the benchmarks): the salt, KDF and cipher of every vault
+    (and of new ones), the client-side flag, and wrapped data keys with the
+    compare-and-set of salt_utils.swap_wrapped_data_key.
+    Yields:
+        dict: user_id -> wrapped data key.
+    """
+    wrapped_keys = {}
+    client_side = {}
+
+    def swap(user_id, expected, wrapped_key, kdf=None, cipher=None):
+        if wrapped_keys.get(user_id) != expected:
+            return False
+        wrapped_keys[user_id] = wrapped_key
+        return True
+
+    target = "backend.vault.services."
+    patches = {
+        "get_or_create_user_salt": {"return_value": salt},
+        "get_or_create_user_kdf": {"return_value": kdf},
+        "default_vault_kdf": {"return_value": kdf},
+        "get_or_create_user_cipher": {"return_value": cipher},
+        "default_vault_cipher": {"return_value": cipher},
+        "get_wrapped_data_key": {"side_effect": wrapped_keys.get},
+        "swap_wrapped_data_key": {"side_effect": swap},
+        "is_client_side_vault": {
+            "side_effect": lambda user_id: client_side.get(user_id, False)
+        },
+        "set_client_side_vault": {"side_effect": client_side.__setitem__},
+    }
+    with ExitStack() as stack:
+        for name, kwargs in patches.items():
+            stack.enter_context(patch(target + name, **kwargs))
+        yield wrapped_keys
+
+
+@pytest.fixture
+def db_service():
+    """VaultService on a migrated in-memory database, key material in memory."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    with patched_key_material(cipher=CIPHER_AES_GCM):
+        yield VaultService(
+            VaultRepository(conn),
+            search_indexes=SessionSearchIndexes(),
+            entry_cache=DecryptedEntryCache(),
+        )
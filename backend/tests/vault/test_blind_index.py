@@ -0,0 +1,64 @@
+import pytest
+
+from backend.vault import blind_index
+from backend.vault.crypto_utils import VaultKey, generate_data_key
+
+
+@pytest.fixture
+def key():
+    return VaultKey(generate_data_key(), generate_data_key())
+
+
+def test_normalize_folds_case_whitespace_and_url_noise():
+    assert blind_index.normalize("service", "  GitHub   Inc ") == "github inc"
+    assert blind_index.normalize("url", "https://www.GitHub.com/") == "github.com"
+    assert blind_index.normalize("username", None) == ""
+
+
+def test_tokens_are_keyed_per_user(key):
+    entry = {"service": "GitHub", "notes": "not indexed"}
+    tokens = blind_index.entry_tokens(key, entry)
+    # One exact token plus one per prefix of "github".
+    assert len(tokens) == 1 + len("github")
+    exact = blind_index.query_tokens(key, "GITHUB", ["service"], "exact")
+    prefix = blind_index.query_tokens(key, "git", ["service"], "prefix")
+    assert set(exact + prefix) <= set(tokens)
+    other = VaultKey(generate_data_key(), generate_data_key())
+    assert not set(blind_index.entry_tokens(other, entry)) & set(tokens)
+
+
+def test_search_touches_only_matching_rows(db_service):
+    for name in ("GitHub", "GitLab", "Google"):
+        db_service.add_entry(1, {"service": name, "username": "me"}, password="pw")
+    db_service.add_entry(2, {"service": "GitHub"}, password="pw2")
+
+    found = db_service.search(1, "pw", "git")
+    assert [e["decrypted"]["service"] for e in found] == ["GitHub", "GitLab"]
+    assert db_service.search(1, "pw", "git", mode="exact") == []
+    assert len(db_service.search(1, "pw", "ME", field="username", mode="exact")) == 3
+
+    entry_id = found[0]["id"]
+    db_service.update_entry(1, entry_id, {"service": "Bitbucket"}, password="pw")
+    assert [e["id"] for e in db_service.search(1, "pw", "bit")] == [entry_id]
+    db_service.delete_entry(1, entry_id)
+    assert db_service.search(1, "pw", "bit") == []
+
+
+def test_search_indexes_entries_written_without_tokens(db_service):
+    key = db_service._vault_key(1, "pw")
+    (entry_id,) = db_service.repo.add_sealed_entries(
+        1, 1, lambda ids: [key.encrypt({"url": "https://example.org/"}, 1, ids[0])]
+    )
+    found = db_service.search(1, "pw", "example.org", field="url", mode="exact")
+    assert [e["id"] for e in found] == [entry_id]
+    assert db_service.repo.list_unindexed_entries(1, 10) == []
+
+
+def test_long_prefix_queries_are_filtered(db_service, monkeypatch):
+    from backend.config import settings
+
+    monkeypatch.setattr(settings, "VAULT_SEARCH_MAX_PREFIX", 3)
+    db_service.add_entry(1, {"service": "github"}, password="pw")
+    db_service.add_entry(1, {"service": "gitlab"}, password="pw")
+    found = db_service.search(1, "pw", "gitl", limit=1)
+    assert [e["decrypted"]["service"] for e in found] == ["gitlab"]
@@ -1,4 +1,5 @@
 import pytest
+from contextlib import nullcontext
 from backend.vault.crypto_utils import encrypt_entry, decrypt_entry, derive_key
 from backend.vault.salt_utils import get_or_create_user_salt
 import os
@@ -13,7 +14,7 @@ def test_fernet_encrypt_decrypt_roundtrip(test_data):
     password = "userpassword123"
     salt = os.urandom(16)
     encrypted = encrypt_entry(test_data, password, salt)
-    assert isinstance(encrypted, str)
+    assert isinstance(encrypted, bytes)
     decrypted = decrypt_entry(encrypted, password, salt)
     assert decrypted == test_data
 
@@ -43,8 +44,144 @@ def test_derive_key_consistency():
     assert key1 == key2
 
 
+def test_derive_key_default_is_legacy_pbkdf2():
+    from backend.vault.crypto_utils import LEGACY_KDF
+
+    salt = b"1234567890123456"
+    assert derive_key("abc123", salt) == derive_key("abc123", salt, LEGACY_KDF)
+
+
+def test_envelope_key_wrap_and_format():
+    from cryptography.fernet import InvalidToken
+    from backend.vault import crypto_utils
+
+    salt = os.urandom(16)
+    old = crypto_utils.derive_vault_key("old", salt)
+    wrapped = old.wrap(crypto_utils.generate_data_key())
+    key = old.unwrap(wrapped)
+    token = key.encrypt({"a": 1})
+    assert crypto_utils.ciphertext_format(token) == crypto_utils.FORMAT_FERNET_ENVELOPE
+    assert crypto_utils.ciphertext_format(old.encrypt({"a": 1})) == 0x80
+
+    new = crypto_utils.derive_vault_key("new", salt)
+    assert new.unwrap(key.rewrap(new)).decrypt(token) == {"a": 1}
+    with pytest.raises(InvalidToken):
+        crypto_utils.derive_vault_key("wrong", salt).unwrap(wrapped)
+    with pytest.raises(InvalidToken):
+        old.decrypt(token)  # envelope tokens need the data key
+
+
+def test_raw_ciphertext_is_fernet_compatible(test_data):
+    import base64
+    import json
+    from cryptography.fernet import Fernet
+    from backend.vault.crypto_utils import VaultKey, encode_ciphertext
+
+    fernet_key = Fernet.generate_key()
+    key = VaultKey(fernet_key)
+    token = key.encrypt(test_data)
+    assert json.loads(Fernet(fernet_key).decrypt(encode_ciphertext(token))) == test_data
+    # Stored Fernet tokens, raw or still base64 text, read back alike.
+    legacy = Fernet(fernet_key).encrypt(json.dumps(test_data).encode())
+    assert key.decrypt(base64.urlsafe_b64decode(legacy)) == test_data
+    assert key.decrypt(legacy.decode()) == test_data
+    assert key.decrypt(memoryview(token)) == test_data
+
+
+def test_stored_fernet_tokens_keep_fernet_semantics(test_data):
+    import base64
+    import json
+    import time
+    from cryptography.fernet import Fernet, InvalidToken
+    from backend.vault.crypto_utils import VaultKey, encode_ciphertext
+
+    data_key = Fernet.generate_key()
+    key = VaultKey(Fernet.generate_key(), data_key)
+    token = key.encrypt(test_data)  # format byte + raw Fernet token
+    fernet_token = encode_ciphertext(token[1:]).encode()
+    fernet = Fernet(data_key)
+    assert json.loads(fernet.decrypt(fernet_token, ttl=60)) == test_data
+    assert abs(fernet.extract_timestamp(fernet_token) - time.time()) < 60
+    with pytest.raises(InvalidToken):
+        fernet.decrypt_at_time(
+            fernet_token, ttl=60, current_time=int(time.time()) + 120
+        )
+    # Tokens Fernet wrote at another time read back once stored raw.
+    old = fernet.encrypt_at_time(json.dumps(test_data).encode(), current_time=0)
+    assert key.decrypt(b"\x02" + base64.urlsafe_b64decode(old)) == test_data
+    for tampered in (
+        token[:-1] + bytes([token[-1] ^ 1]),  # MAC
+        token[:20] + bytes([token[20] ^ 1]) + token[21:],  # IV
+        token[:1] + b"\x81" + token[2:],  # Fernet version byte
+        token[:40],  # truncated
+    ):
+        with pytest.raises(InvalidToken):
+            key.decrypt(tampered)
+
+
+def test_argon2id_vault_kdf_roundtrip(test_data):
+    from backend.vault.crypto_utils import KdfParams, derive_vault_key
+
+    kdf = KdfParams(scheme="argon2id", iterations=1, memory_kib=64, parallelism=2)
+    assert KdfParams.from_record(kdf.scheme, kdf.params_json()) == kdf
+    salt = os.urandom(16)
+    token = derive_vault_key("pw", salt, kdf).encrypt(test_data)
+    assert derive_vault_key("pw", salt, kdf).decrypt(token) == test_data
+    with pytest.raises(Exception):
+        derive_vault_key("pw", salt).decrypt(token)
+
+
+def test_user_kdf_defaults_for_new_vaults_and_keeps_existing(tmp_path, monkeypatch):
+    import sqlite3
+    from backend.config import settings
+    from backend.vault import salt_utils
+    from backend.vault.crypto_utils import LEGACY_KDF
+    from database.migrations import migrate
+
+    conn = sqlite3.connect(tmp_path / "kdf.db")
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT, password_hash TEXT)")
+    conn.execute("CREATE TABLE user_salts (user_id INTEGER PRIMARY KEY, salt BLOB NOT NULL)")
+    conn.execute("INSERT INTO user_salts (user_id, salt) VALUES (1, ?)", (b"s" * 16,))
+    migrate(conn)  # backfills existing vaults with the legacy KDF
+    monkeypatch.setattr(salt_utils, "db_connection", lambda: nullcontext(conn))
+    monkeypatch.setattr(settings, "VAULT_KDF", "argon2id")
+
+    assert salt_utils.get_or_create_user_kdf(1) == LEGACY_KDF
+    created = salt_utils.get_or_create_user_kdf(2)
+    assert created.scheme == "argon2id"
+    assert created.memory_kib == settings.VAULT_ARGON2_MEMORY_KIB
+    assert salt_utils.get_or_create_user_kdf(2) == created
+    # A password change in another worker re-pins the KDF; it is seen here.
+    conn.execute(
+        "UPDATE user_vault_keys SET kdf = ?, kdf_params = ? WHERE user_id = 1",
+        (created.scheme, created.params_json()),
+    )
+    conn.commit()
+    assert salt_utils.get_or_create_user_kdf(1) == created
+
+
+def test_user_cipher_follows_changes_from_other_workers(tmp_path, monkeypatch):
+    import sqlite3
+    from backend.config import settings
+    from backend.vault import salt_utils
+    from backend.vault.crypto_utils import CIPHER_AES_GCM, CIPHER_FERNET
+    from database.migrations import migrate
+
+    conn = sqlite3.connect(tmp_path / "cipher.db")
+    migrate(conn)
+    monkeypatch.setattr(salt_utils, "db_connection", lambda: nullcontext(conn))
+    monkeypatch.setattr(settings, "VAULT_CIPHER", CIPHER_FERNET)
+
+    assert salt_utils.get_or_create_user_cipher(1) == CIPHER_FERNET  # new vault
+    conn.execute(
+        "UPDATE user_vault_keys SET cipher = ? WHERE user_id = 1", (CIPHER_AES_GCM,)
+    )
+    conn.commit()
+    assert salt_utils.get_or_create_user_cipher(1) == CIPHER_AES_GCM
+
+
 def test_get_or_create_user_salt(tmp_path, monkeypatch):
-    # Patch get_db to use a temp sqlite file
+    # Patch db_connection to use a temp sqlite file
     import sqlite3
     from backend.vault import salt_utils
 
@@ -54,10 +191,74 @@ def test_get_or_create_user_salt(tmp_path, monkeypatch):
         "CREATE TABLE user_salts (user_id INTEGER PRIMARY KEY, salt BLOB NOT NULL)"
     )
     conn.commit()
-    monkeypatch.setattr(salt_utils, "get_db", lambda: conn)
+    monkeypatch.setattr(salt_utils, "db_connection", lambda: nullcontext(conn))
     salt1 = salt_utils.get_or_create_user_salt(42)
     assert isinstance(salt1, bytes)
     salt2 = salt_utils.get_or_create_user_salt(42)
     assert salt1 == salt2
     salt3 = salt_utils.get_or_create_user_salt(99)
     assert salt1 != salt3
+
+
+def test_vault_key_roundtrip_matches_one_shot_helpers(test_data):
+    from backend.vault.crypto_utils import derive_vault_key
+
+    password = "userpassword123"
+    salt = os.urandom(16)
+    key = derive_vault_key(password, salt)
+    token = key.encrypt(test_data)
+    assert key.decrypt(token) == test_data
+    # Tokens are interchangeable with the one-shot helpers.
+    assert decrypt_entry(token, password, salt) == test_data
+    assert key.decrypt(encrypt_entry(test_data, password, salt)) == test_data
+
+
+def test_user_salt_is_cached_and_race_safe(tmp_path, monkeypatch):
+    import sqlite3
+    from backend.vault import salt_utils
+
+    conn = sqlite3.connect(tmp_path / "salts.db")
+    conn.execute(
+        "CREATE TABLE user_salts (user_id INTEGER PRIMARY KEY, salt BLOB NOT NULL)"
+    )
+    # Another worker created the salt between our SELECT and INSERT.
+    conn.execute("INSERT INTO user_salts (user_id, salt) VALUES (7, ?)", (b"w" * 16,))
+    conn.commit()
+    calls = []
+    monkeypatch.setattr(
+        salt_utils, "db_connection", lambda: calls.append(1) or nullcontext(conn)
+    )
+    monkeypatch.setattr(salt_utils, "_select_salt", _first_miss(salt_utils._select_salt))
+
+    assert salt_utils.get_or_create_user_salt(7) == b"w" * 16
+    assert salt_utils.get_or_create_user_salt(7) == b"w" * 16
+    assert len(calls) == 1  # second call served from cache
+    assert salt_utils.salt_cache_stats().hits == 1
+
+
+def _first_miss(select):
+    state = {"first": True}
+
+    def wrapper(db, user_id):
+        if state.pop("first", False):
+            return None
+        return select(db, user_id)
+
+    return wrapper
+
+
+def test_client_side_flag_is_recorded_per_vault(tmp_path, monkeypatch):
+    import sqlite3
+    from backend.vault import salt_utils
+    from database.migrations import migrate
+
+    conn = sqlite3.connect(tmp_path / "mode.db")
+    migrate(conn)
+    monkeypatch.setattr(salt_utils, "db_connection", lambda: nullcontext(conn))
+
+    assert not salt_utils.is_client_side_vault(1)
+    salt_utils.set_client_side_vault(1, True)  # creates the vault record
+    assert salt_utils.is_client_side_vault(1)
+    assert not salt_utils.is_client_side_vault(2)
+    salt_utils.set_client_side_vault(1, False)
+    assert not salt_utils.is_client_side_vault(1)
@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from backend.vault.crypto_utils import CIPHER_AES_GCM, VaultKey, generate_data_key
+from backend.vault.decryption import ParallelDecryptor
+
+
+@pytest.fixture
+def key():
+    return VaultKey(generate_data_key(), generate_data_key(), CIPHER_AES_GCM)
+
+
+def make_entries(key, n):
+    return [
+        {"id": i, "encrypted_entry": key.encrypt({"n": i}, 1, i)} for i in range(n)
+    ]
+
+
+def test_parallel_decrypt_keeps_order_and_isolates_failures(key):
+    entries = make_entries(key, 50)
+    entries[7]["encrypted_entry"] = b"\x03garbage"
+    entries[8]["id"] = 999  # ciphertext moved to another row
+    decryptor = ParallelDecryptor(max_workers=4, threshold=10, chunk_size=8)
+    decryptor.decrypt_entries(key, 1, entries)
+    decryptor.shutdown()
+    expected = [{"n": i} for i in range(50)]
+    expected[7] = expected[8] = None
+    assert [e["decrypted"] for e in entries] == expected
+
+
+def test_small_listings_stay_on_the_request_thread(key):
+    threads = set()
+
+    class RecordingKey:
+        def decrypt(self, token, user_id, entry_id):
+            threads.add(threading.get_ident())
+            return key.decrypt(token, user_id, entry_id)
+
+    decryptor = ParallelDecryptor(max_workers=4, threshold=10, chunk_size=2)
+    entries = make_entries(key, 9)
+    decryptor.decrypt_entries(RecordingKey(), 1, entries)
+    assert threads == {threading.get_ident()}
+
+    threads.clear()
+    decryptor.decrypt_entries(RecordingKey(), 1, make_entries(key, 20))
+    assert threading.get_ident() not in threads
+    decryptor.shutdown()
+
+
+def test_missing_key_yields_none_for_every_entry(key):
+    entries = make_entries(key, 20)
+    ParallelDecryptor(max_workers=2, threshold=1).decrypt_entries(None, 1, entries)
+    assert all(e["decrypted"] is None for e in entries)
@@ -0,0 +1,85 @@
+from unittest.mock import patch
+
+from backend.vault.entry_cache import DecryptedEntryCache, SessionEntries
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _entry(entry_id, data):
+    return {"id": entry_id, "encrypted_entry": b"ct%d" % entry_id, "decrypted": data}
+
+
+def test_session_entries_match_on_updated_at():
+    session = SessionEntries(max_entries=10)
+    session.store({1: "t1", 2: "t1"}, [_entry(1, {"n": 1}), _entry(2, None)])
+    found, misses = session.lookup(
+        [{"id": 1, "updated_at": "t1"}, {"id": 2, "updated_at": "t1"}]
+    )
+    assert found == {1: _entry(1, {"n": 1})}
+    assert misses == [2]  # undecryptable rows are never cached
+    assert session.lookup([{"id": 1, "updated_at": "t2"}]) == ({}, [1])
+
+
+def test_session_entries_are_bounded():
+    session = SessionEntries(max_entries=1)
+    session.store({1: "t", 2: "t"}, [_entry(1, {}), _entry(2, {})])
+    assert len(session) == 1
+
+
+def test_cache_discard_and_expiry_drop_plaintext():
+    clock = FakeClock()
+    cache = DecryptedEntryCache(ttl_seconds=10, clock=clock)
+    first = cache.session(1, "jti-1")
+    other = cache.session(1, "jti-2")
+    assert cache.session(1, "jti-1") is first
+    for session in (first, other):
+        session.store({1: "t", 2: "t"}, [_entry(1, {}), _entry(2, {})])
+    cache.discard(1, 1)
+    assert len(first) == len(other) == 1
+    clock.now = 11
+    assert cache.session(1, "jti-1") is not first
+    assert len(first) == 0 and len(other) == 0
+
+
+def test_repeat_listing_decrypts_only_changed_rows(db_service):
+    for n in range(3):
+        db_service.add_entry(1, {"n": n}, password="pw")
+    first = db_service.list_entries(1, password="pw", session_id="jti-1")
+    ids = [e["id"] for e in first]
+
+    repo = db_service.repo
+    with patch.object(repo, "get_entries", wraps=repo.get_entries) as fetch:
+        again = db_service.list_entries(1, password="pw", session_id="jti-1")
+        assert [e["decrypted"] for e in again] == [{"n": 0}, {"n": 1}, {"n": 2}]
+        fetch.assert_not_called()
+
+        db_service.update_entry(1, ids[1], {"n": 10}, password="pw")
+        db_service.delete_entry(1, ids[2])
+        again = db_service.list_entries(1, password="pw", session_id="jti-1")
+        assert [e["decrypted"] for e in again] == [{"n": 0}, {"n": 10}]
+        fetch.assert_called_once_with(1, [ids[1]])
+
+
+def test_cached_listing_sees_writes_from_elsewhere(db_service):
+    entry = db_service.add_entry(1, {"n": 1}, password="pw")
+    db_service.list_entries(1, password="pw", session_id="jti-1")
+    key = db_service._vault_key(1, "pw")
+    # Another worker process: straight to the repository, cache untouched.
+    db_service.repo.update_entry(
+        1, entry["id"], {"encrypted_entry": key.encrypt({"n": 2}, 1, entry["id"])}
+    )
+    (listed,) = db_service.list_entries(1, password="pw", session_id="jti-1")
+    assert listed["decrypted"] == {"n": 2}
+
+
+def test_cache_never_serves_a_wrong_password(db_service):
+    db_service.add_entry(1, {"n": 1}, password="pw")
+    db_service.list_entries(1, password="pw", session_id="jti-1")
+    (listed,) = db_service.list_entries(1, password="typo", session_id="jti-1")
+    assert listed["decrypted"] is None
@@ -0,0 +1,85 @@
+from unittest.mock import MagicMock
+
+from backend.utils.cache import TTLCache
+from backend.vault.key_cache import DerivedKeyCache
+
+
+SALT = b"1234567890123456"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_lru_eviction_respects_cap():
+    evicted = []
+    cache = TTLCache(2, on_evict=lambda k, v: evicted.append(k))
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert evicted == ["b"]
+    assert cache.stats.evictions == 1
+
+
+def test_ttl_cache_idle_expiry_is_refreshed_by_access():
+    clock = FakeClock()
+    cache = TTLCache(10, ttl_seconds=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    clock.now = 8
+    assert cache.get("a") == 1
+    clock.now = 12
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats.expirations == 1
+
+
+def test_key_cache_derives_once_per_session():
+    cache = DerivedKeyCache(max_entries=4, ttl_seconds=60)
+    derive = MagicMock(side_effect=lambda pw, salt: object())
+    first = cache.get_or_derive(1, SALT, "jti-1", "pw", derive)
+    second = cache.get_or_derive(1, SALT, "jti-1", "pw", derive)
+    assert first is second
+    assert derive.call_count == 1
+    assert cache.stats.hits == 1
+
+
+def test_key_cache_wrong_password_never_hits():
+    cache = DerivedKeyCache(max_entries=4, ttl_seconds=60)
+    derive = MagicMock(side_effect=lambda pw, salt: object())
+    good = cache.get_or_derive(1, SALT, "jti-1", "pw", derive)
+    bad = cache.get_or_derive(1, SALT, "jti-1", "other", derive)
+    assert good is not bad
+    assert derive.call_count == 2
+
+
+def test_key_cache_invalidation():
+    cache = DerivedKeyCache(max_entries=8, ttl_seconds=60)
+    derive = MagicMock(side_effect=lambda pw, salt: object())
+    cache.get_or_derive(1, SALT, "jti-1", "pw", derive)
+    cache.get_or_derive(1, SALT, "jti-2", "pw", derive)
+    cache.get_or_derive(2, SALT, "jti-3", "pw", derive)
+    assert cache.invalidate_session(1, "jti-1") == 1
+    assert len(cache) == 2
+    assert cache.invalidate_user(1) == 1
+    assert len(cache) == 1
+
+
+def test_logout_invalidates_session_keys(app, client):
+    key_cache = MagicMock()
+    search_indexes = MagicMock()
+    entry_cache = MagicMock()
+    app.config["KEY_CACHE"] = key_cache
+    app.config["SEARCH_INDEXES"] = search_indexes
+    app.config["ENTRY_CACHE"] = entry_cache
+    resp = client.post("/api/auth/logout")
+    assert resp.status_code == 200
+    for cache in (key_cache, search_indexes, entry_cache):
+        cache.invalidate_session.assert_called_once_with(1, None)
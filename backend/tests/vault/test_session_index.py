@@ -0,0 +1,153 @@
+from unittest.mock import patch
+
+from backend.vault.session_index import SessionSearchIndexes, TrigramIndex
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _index(*entries):
+    index = TrigramIndex()
+    for entry_id, data in enumerate(entries, start=1):
+        index.upsert(entry_id, data)
+    return index
+
+
+def _ids(results):
+    return [r["id"] for r in results]
+
+
+def test_substring_matches_any_field_but_password():
+    index = _index(
+        {"service": "GitHub", "username": "octocat", "password": "hub-secret"},
+        {"service": "Bitbucket", "notes": "work github mirror"},
+        {"service": "Google", "url": "https://accounts.google.com"},
+    )
+    assert _ids(index.search("HUB")) == [1, 2]
+    assert _ids(index.search("accounts.goo")) == [3]
+    assert _ids(index.search("secret")) == []
+    assert _ids(index.search("oo")) == [3]  # shorter than a trigram: scanned
+
+
+def test_typo_tolerant_matches_follow_substring_ones():
+    index = _index({"service": "Githib"}, {"service": "GitHub"}, {"service": "Gmail"})
+    assert _ids(index.search("github")) == [2, 1]
+    assert _ids(index.search("github", limit=1)) == [2]
+    assert _ids(index.search("gmial")) == []  # too few shared trigrams
+
+
+def test_upsert_and_remove_update_postings():
+    index = _index({"service": "GitHub"})
+    index.upsert(1, {"service": "Bitbucket"})
+    assert index.search("github") == []
+    assert _ids(index.search("bucket")) == [1]
+    index.remove(1)
+    assert len(index) == 0 and index._postings == {}
+
+
+def test_indexes_are_per_session_and_updated_in_place():
+    indexes = SessionSearchIndexes(max_sessions=4, ttl_seconds=60)
+    built = []
+
+    def build():
+        built.append(1)
+        return _index({"service": "GitHub"})
+
+    first = indexes.get_or_build(1, "jti-1", build)
+    assert indexes.get_or_build(1, "jti-1", build) is first
+    indexes.get_or_build(1, "jti-2", build)
+    assert len(built) == 2
+
+    indexes.upsert(1, 2, {"service": "GitLab"})
+    indexes.remove(1, 1)
+    assert _ids(first.search("gitlab")) == [2]
+    assert indexes.invalidate_session(1, "jti-1") == 1
+    assert len(first) == 0  # plaintext dropped on invalidation
+    assert indexes.invalidate_user(1) == 1
+
+
+def test_build_racing_a_write_is_not_cached():
+    indexes = SessionSearchIndexes()
+
+    def build():
+        indexes.upsert(1, 5, {"service": "late"})
+        return _index({"service": "GitHub"})
+
+    indexes.get_or_build(1, "jti-1", build)
+    assert len(indexes) == 0
+    indexes.get_or_build(1, None, lambda: _index())
+    assert len(indexes) == 0  # no session, nothing to keep
+
+
+def test_change_tracking_does_not_outlive_builds():
+    indexes = SessionSearchIndexes(max_sessions=2)
+    for user_id in range(10):
+        indexes.get_or_build(user_id, "jti", _index)
+        indexes.upsert(user_id, 1, {"service": "GitHub"})
+        indexes.invalidate_user(user_id)
+    assert indexes._builds == {}
+
+
+def test_idle_index_expires_and_is_cleared():
+    clock = FakeClock()
+    indexes = SessionSearchIndexes(ttl_seconds=10, clock=clock)
+    index = indexes.get_or_build(1, "jti-1", lambda: _index({"service": "GitHub"}))
+    clock.now = 11
+    assert indexes.get_or_build(1, "jti-1", _index) is not index
+    assert len(index) == 0
+
+
+def test_fuzzy_search_decrypts_once_per_session(db_service):
+    for name in ("GitHub", "GitLab", "Google"):
+        db_service.add_entry(1, {"service": name, "password": "x"}, password="pw")
+    with patch.object(
+        db_service.repo, "list_entries", wraps=db_service.repo.list_entries
+    ) as listing:
+        found = db_service.fuzzy_search(1, "pw", "git", session_id="jti-1")
+        assert [e["decrypted"]["service"] for e in found] == ["GitHub", "GitLab"]
+        db_service.fuzzy_search(1, "pw", "goog", session_id="jti-1")
+    assert listing.call_count == 1
+
+    # Writes through the service reach the live index without a rebuild.
+    github = found[0]["id"]
+    db_service.update_entry(1, github, {"service": "Gitea"}, password="pw")
+    new = db_service.add_entry(1, {"service": "Codeberg"}, password="pw")
+    db_service.delete_entry(1, found[1]["id"])
+    with patch.object(db_service.repo, "list_entries") as listing:
+        assert _ids(db_service.fuzzy_search(1, "pw", "git", session_id="jti-1")) == [
+            github
+        ]
+        assert _ids(
+            db_service.fuzzy_search(1, "pw", "codebreg", session_id="jti-1")
+        ) == [new["id"]]
+    listing.assert_not_called()
+
+
+def test_fuzzy_search_applies_writes_from_other_workers(db_service):
+    from backend.vault.services import VaultService
+
+    # A second service over the same database stands in for another worker.
+    other = VaultService(db_service.repo, search_indexes=SessionSearchIndexes())
+    github = db_service.add_entry(1, {"service": "GitHub"}, password="pw")["id"]
+    gitlab = db_service.add_entry(1, {"service": "GitLab"}, password="pw")["id"]
+    assert _ids(db_service.fuzzy_search(1, "pw", "git", session_id="jti-1")) == [
+        github,
+        gitlab,
+    ]
+
+    other.update_entry(1, github, {"service": "Bitbucket"}, password="pw")
+    other.delete_entry(1, gitlab)
+    gitea = other.add_entry(1, {"service": "Gitea"}, password="pw")["id"]
+    with patch.object(db_service.repo, "list_entries") as listing:
+        assert _ids(db_service.fuzzy_search(1, "pw", "git", session_id="jti-1")) == [
+            gitea
+        ]
+        assert _ids(
+            db_service.fuzzy_search(1, "pw", "bucket", session_id="jti-1")
+        ) == [github]
+    listing.assert_not_called()  # caught up from the change feed, not rebuilt
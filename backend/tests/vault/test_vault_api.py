@@ -7,8 +7,8 @@ from unittest.mock import patch
 @patch("backend.vault.services.VaultService.list_entries")
 def test_list_entries(mock_list, client):
     mock_list.return_value = [
-        {"id": 1, "encrypted_entry": "abc"},
-        {"id": 2, "encrypted_entry": "def"},
+        {"id": 1, "encrypted_entry": b"abc"},
+        {"id": 2, "encrypted_entry": b"def"},
     ]
     resp = client.get("/api/vault/")
     assert resp.status_code == 200
@@ -17,18 +17,31 @@ def test_list_entries(mock_list, client):
     assert len(data["entries"]) == 2
 
 
+@patch("backend.vault.services.VaultService.unlocks", return_value=True)
+@patch("backend.vault.services.VaultService.list_entries")
+def test_list_entries_ciphertext_only_on_request(mock_list, mock_unlocks, client):
+    mock_list.side_effect = lambda *a, **kw: [
+        {"id": 1, "encrypted_entry": b"\x02ab", "decrypted": {"a": 1}}
+    ]
+    entry = client.get("/api/vault/?password=pw").get_json()["entries"][0]
+    assert "encrypted_entry" not in entry
+    entry = client.get("/api/vault/?password=pw&ciphertext=true").get_json()["entries"][0]
+    assert entry["encrypted_entry"] == "AmFi"
+
+
 @patch("backend.vault.services.VaultService.add_entry")
 def test_add_entry(mock_add, client):
-    mock_add.return_value = {"id": 3, "encrypted_entry": "xyz"}
+    mock_add.return_value = {"id": 3, "encrypted_entry": b"xyz"}
     resp = client.post("/api/vault/", json={"encrypted_entry": "xyz"})
     assert resp.status_code == 201
     data = resp.get_json()
-    assert data["encrypted_entry"] == "xyz"
+    assert data["encrypted_entry"] == "eHl6"
 
 
+@patch("backend.vault.services.VaultService.entry_version", return_value=1)
 @patch("backend.vault.services.VaultService.get_entry")
-def test_get_entry_found(mock_get, client):
-    mock_get.return_value = {"id": 1, "encrypted_entry": "abc"}
+def test_get_entry_found(mock_get, mock_version, client):
+    mock_get.return_value = {"id": 1, "encrypted_entry": b"abc"}
     resp = client.get("/api/vault/1")
     assert resp.status_code == 200
     data = resp.get_json()
@@ -52,7 +65,7 @@ def test_get_entry_not_found(client):
 
 @patch("backend.vault.services.VaultService.update_entry")
 def test_update_entry_found(mock_update, client):
-    mock_update.return_value = {"id": 1, "encrypted_entry": "updated"}
+    mock_update.return_value = {"id": 1, "encrypted_entry": b"updated"}
     with patch(
         "flask_jwt_extended.view_decorators.verify_jwt_in_request",
         lambda *a, **kw: None,
@@ -60,7 +73,7 @@ def test_update_entry_found(mock_update, client):
         resp = client.put("/api/vault/1", json={"encrypted_entry": "updated"})
         assert resp.status_code == 200
         data = resp.get_json()
-        assert data["encrypted_entry"] == "updated"
+        assert data["encrypted_entry"] == "dXBkYXRlZA=="
 
 
 def test_update_entry_not_found(client):
@@ -102,3 +115,346 @@ def test_delete_entry_not_found(client):
         assert resp.status_code == 404
         data = resp.get_json()
         assert "error" in data
+
+
+@patch("backend.vault.services.VaultService.list_entries")
+def test_list_entries_paginated(mock_list, client):
+    mock_list.return_value = [
+        {"id": 11, "created_at": "t", "updated_at": "t"},
+        {"id": 12, "created_at": "t", "updated_at": "t"},
+    ]
+    resp = client.get("/api/vault/?after_id=10&limit=2&fields=metadata")
+    assert resp.status_code == 200
+    assert resp.get_json()["next_cursor"] == 12
+    kwargs = mock_list.call_args.kwargs
+    assert kwargs["after_id"] == 10
+    assert kwargs["limit"] == 2
+    assert kwargs["metadata_only"] is True
+
+
+@patch("backend.vault.services.VaultService.list_entries")
+def test_list_entries_last_page_has_no_cursor(mock_list, client):
+    mock_list.return_value = [{"id": 13, "encrypted_entry": b"abc"}]
+    resp = client.get("/api/vault/?after_id=12&limit=2")
+    assert resp.status_code == 200
+    assert resp.get_json()["next_cursor"] is None
+
+
+@pytest.mark.parametrize("query", ["limit=abc", "limit=0", "after_id=-1", "limit=100000"])
+def test_list_entries_rejects_bad_page_args(client, query):
+    resp = client.get(f"/api/vault/?{query}")
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
+
+
+@patch("backend.vault.services.VaultService.export_entries")
+def test_export_streams_ndjson(mock_export, client):
+    import json
+
+    mock_export.return_value = iter(
+        [{"id": 1, "encrypted_entry": b"abc"}, {"id": 2, "encrypted_entry": b"def"}]
+    )
+    resp = client.get("/api/vault/export")
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/x-ndjson"
+    lines = resp.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [1, 2]
+
+
+@patch("backend.vault.services.VaultService.import_entries")
+def test_import_ndjson_stream(mock_import, client):
+    mock_import.side_effect = lambda user_id, rows, password, **kw: {
+        "imported": len(list(rows)),
+        "failed": 0,
+        "errors": [],
+    }
+    body = '{"service": "a"}\n\n{"service": "b"}\n'
+    resp = client.post(
+        "/api/vault/import?password=pw",
+        data=body,
+        content_type="application/x-ndjson",
+    )
+    assert resp.status_code == 200
+    assert resp.get_json()["imported"] == 2
+
+
+def test_import_requires_password(client):
+    resp = client.post("/api/vault/import", json={"entries": [{"service": "a"}]})
+    assert resp.status_code == 400
+    assert "password" in resp.get_json()["error"]
+
+
+@patch("backend.vault.services.VaultService.batch")
+def test_batch_endpoint(mock_batch, client):
+    mock_batch.return_value = [{"index": 0, "op": "delete", "id": 1, "status": 204}]
+    resp = client.post(
+        "/api/vault/batch", json={"operations": [{"op": "delete", "id": 1}]}
+    )
+    assert resp.status_code == 200
+    assert resp.get_json()["results"][0]["status"] == 204
+
+
+def test_batch_endpoint_rejects_oversized_batches(client):
+    from backend.config import settings
+
+    too_many = settings.VAULT_BATCH_MAX_OPERATIONS + 1
+    operations = [{"op": "get", "id": i} for i in range(too_many)]
+    resp = client.post("/api/vault/batch", json={"operations": operations})
+    assert resp.status_code == 400
+
+
+@patch("backend.vault.services.VaultService.change_password")
+def test_change_password_endpoint(mock_change, client):
+    resp = client.put(
+        "/api/vault/password", json={"old_password": "a", "new_password": "b"}
+    )
+    assert resp.status_code == 204
+    assert mock_change.call_args.args[1:] == ("a", "b")
+
+
+def test_change_password_wrong_old_password(client):
+    from backend.vault.exceptions import InvalidVaultPasswordError
+
+    with patch(
+        "backend.vault.services.VaultService.change_password",
+        side_effect=InvalidVaultPasswordError("Invalid vault password."),
+    ):
+        resp = client.put(
+            "/api/vault/password", json={"old_password": "a", "new_password": "b"}
+        )
+    assert resp.status_code == 403
+    resp = client.put("/api/vault/password", json={"old_password": "a"})
+    assert resp.status_code == 400
+
+
+@patch("backend.vault.services.VaultService.search")
+def test_search_endpoint(mock_search, client):
+    mock_search.return_value = [{"id": 4, "encrypted_entry": b"x", "decrypted": {}}]
+    resp = client.get("/api/vault/search?q=git&password=pw&field=service&mode=exact")
+    assert resp.status_code == 200
+    assert [e["id"] for e in resp.get_json()["entries"]] == [4]
+    assert mock_search.call_args.args == (1, "pw", "git")
+    assert mock_search.call_args.kwargs["mode"] == "exact"
+
+
+@patch("backend.vault.services.VaultService.changes")
+def test_changes_endpoint(mock_changes, client):
+    mock_changes.return_value = {
+        "entries": [{"id": 4, "encrypted_entry": b"x"}],
+        "deleted": [2],
+        "sync_token": 9,
+        "has_more": False,
+    }
+    resp = client.get("/api/vault/changes?since=7&limit=50")
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["entries"] == [{"id": 4, "encrypted_entry": "eA=="}]
+    assert (body["deleted"], body["sync_token"]) == ([2], 9)
+    assert mock_changes.call_args.args == (1, 7)
+    assert mock_changes.call_args.kwargs["limit"] == 50
+
+
+@pytest.mark.parametrize("query", ["since=x", "since=-1", "limit=0", "limit=100000"])
+def test_changes_endpoint_rejects_bad_args(client, query):
+    assert client.get(f"/api/vault/changes?{query}").status_code == 400
+
+
+@patch("backend.vault.services.VaultService.fuzzy_search")
+def test_search_endpoint_fuzzy_mode(mock_fuzzy, client):
+    mock_fuzzy.return_value = [{"id": 4, "decrypted": {"service": "GitHub"}}]
+    resp = client.get("/api/vault/search?q=githib&password=pw&mode=fuzzy&limit=5")
+    assert resp.status_code == 200
+    assert resp.get_json()["entries"] == mock_fuzzy.return_value
+    assert mock_fuzzy.call_args.args == (1, "pw", "githib")
+    assert mock_fuzzy.call_args.kwargs["limit"] == 5
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "password=pw",
+        "q=a",
+        "q=a&password=pw&field=notes",
+        "q=a&password=pw&mode=x",
+        "q=a&password=pw&mode=fuzzy&field=service",
+    ],
+)
+def test_search_endpoint_rejects_bad_args(client, query):
+    assert client.get(f"/api/vault/search?{query}").status_code == 400
+
+
+@patch("backend.vault.services.VaultService.unlocks", return_value=True)
+@patch("backend.vault.services.VaultService.vault_version", return_value=7)
+@patch("backend.vault.services.VaultService.list_entries")
+def test_list_entries_not_modified_skips_decryption(
+    mock_list, mock_version, mock_unlocks, client
+):
+    mock_list.return_value = [{"id": 1, "encrypted_entry": b"abc"}]
+    resp = client.get("/api/vault/?password=pw")
+    etag = resp.headers["ETag"]
+    assert resp.headers["Cache-Control"] == "private, no-cache"
+    resp = client.get("/api/vault/?password=pw", headers={"If-None-Match": etag})
+    assert resp.status_code == 304 and resp.headers["ETag"] == etag
+    mock_list.assert_called_once()
+    mock_version.return_value = 8
+    resp = client.get("/api/vault/?password=pw", headers={"If-None-Match": etag})
+    assert resp.status_code == 200 and resp.headers["ETag"] != etag
+
+
+@patch("backend.vault.services.VaultService.entry_version", return_value=3)
+@patch("backend.vault.services.VaultService.get_entry")
+def test_get_entry_not_modified(mock_get, mock_version, client):
+    resp = client.get("/api/vault/5", headers={"If-None-Match": '"e5.3"'})
+    assert resp.status_code == 304
+    mock_get.assert_not_called()
+    mock_version.return_value = None
+    assert client.get("/api/vault/5").status_code == 404
+    mock_get.assert_not_called()
+
+
+@patch("backend.vault.services.VaultService.entry_version")
+@patch("backend.vault.services.VaultService.update_entry")
+def test_update_entry_if_match(mock_update, mock_version, client):
+    body = {"password": "pw", "entry": {"service": "x"}}
+    mock_version.return_value = 3
+    resp = client.put("/api/vault/5", json=body, headers={"If-Match": '"e5.2"'})
+    assert resp.status_code == 412
+    mock_update.assert_not_called()
+
+    mock_update.return_value = {"id": 5, "encrypted_entry": b"x"}
+    mock_version.side_effect = [3, 4]
+    resp = client.put("/api/vault/5", json=body, headers={"If-Match": '"e5.3"'})
+    assert resp.status_code == 200 and resp.headers["ETag"] == '"e5.4"'
+    assert mock_update.call_args.kwargs["expected_version"] == 3
+
+    # Lost the race to another writer after the check.
+    mock_update.return_value = None
+    mock_version.side_effect = [3, 4]
+    resp = client.put("/api/vault/5", json=body, headers={"If-Match": '"e5.3"'})
+    assert resp.status_code == 412
+
+
+@patch("backend.vault.services.VaultService.unlocks", return_value=True)
+@patch("backend.vault.services.VaultService.vault_version", return_value=7)
+@patch("backend.vault.services.VaultService.list_entries")
+def test_password_header_and_representation_etags(
+    mock_list, mock_version, mock_unlocks, client
+):
+    mock_list.return_value = []
+    resp = client.get("/api/vault/", headers={"X-Vault-Password": "pw"})
+    assert mock_list.call_args.kwargs["password"] == "pw"
+    assert resp.headers["ETag"] == '"v1.7.d"'
+    assert "X-Vault-Password" in resp.headers["Vary"]
+    # The ciphertext-only listing is a different representation.
+    resp = client.get("/api/vault/", headers={"If-None-Match": '"v1.7.d"'})
+    assert resp.status_code == 200 and resp.headers["ETag"] == '"v1.7"'
+
+
+@patch("backend.vault.services.VaultService.unlocks")
+@patch("backend.vault.services.VaultService.entry_version", return_value=3)
+@patch("backend.vault.services.VaultService.vault_version", return_value=7)
+@patch("backend.vault.services.VaultService.get_entry")
+@patch("backend.vault.services.VaultService.list_entries")
+def test_wrong_password_response_is_never_revalidated_as_decrypted(
+    mock_list, mock_get, mock_version, mock_entry_version, mock_unlocks, client
+):
+    mock_unlocks.side_effect = lambda user_id, password, session_id: password == "pw"
+    mock_list.return_value = [{"id": 5, "encrypted_entry": b"x", "decrypted": None}]
+    mock_get.return_value = {"id": 5, "encrypted_entry": b"x", "decrypted": None}
+    for path, tag in (("/api/vault/", '"v1.7.n"'), ("/api/vault/5", '"e5.3.n"')):
+        resp = client.get(path, headers={"X-Vault-Password": "typo"})
+        assert resp.headers["ETag"] == tag
+        resp = client.get(
+            path, headers={"X-Vault-Password": "pw", "If-None-Match": tag}
+        )
+        assert resp.status_code == 200 and resp.headers["ETag"] != tag
+
+
+@patch("backend.vault.services.VaultService.unlocks")
+@patch("backend.vault.services.VaultService.vault_version", return_value=7)
+@patch("backend.vault.services.VaultService.list_entries")
+def test_password_for_client_side_vault_is_refused(
+    mock_list, mock_version, mock_unlocks, client
+):
+    from backend.vault.exceptions import ClientSideVaultError
+
+    mock_unlocks.side_effect = ClientSideVaultError("client-side vault")
+    # Refused before any conditional answer, even with a matching tag.
+    for tag in ('"v1.7"', '"v1.7.d"'):
+        resp = client.get(
+            "/api/vault/", headers={"X-Vault-Password": "pw", "If-None-Match": tag}
+        )
+        assert resp.status_code == 409
+    mock_list.assert_not_called()
+
+
+def test_client_side_switch_by_another_worker_is_honoured(app, client, tmp_path):
+    import sqlite3
+
+    from backend.utils.db import SQLiteConnectionPool
+    from backend.vault.repository import VaultRepository
+    from backend.vault.services import VaultService
+    from database.migrations import migrate
+
+    db_path = tmp_path / "vault.db"
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+    conn.close()
+    pool = SQLiteConnectionPool(str(db_path))
+    app.config["DB_CONNECTION"] = pool
+    app.config["VAULT_SERVICE"] = VaultService(VaultRepository(pool))
+    body = {"entry": {"service": "GitHub"}, "password": "pw"}
+    assert client.post("/api/vault/", json=body).status_code == 201
+
+    # Another worker process switches the vault to client-side decryption.
+    other = sqlite3.connect(db_path)
+    other.execute("UPDATE user_vault_keys SET client_side = 1 WHERE user_id = 1")
+    other.commit()
+    other.close()
+    assert client.post("/api/vault/", json=body).status_code == 409
+    resp = client.get("/api/vault/", headers={"X-Vault-Password": "pw"})
+    assert resp.status_code == 409
+    pool.close_all()
+
+
+@patch("backend.vault.services.VaultService.add_entry")
+def test_add_client_encrypted_entry(mock_add, client):
+    mock_add.return_value = {"id": 3, "encrypted_entry": b"\x02ab"}
+    resp = client.post("/api/vault/", json={"encrypted_entry": "AmFi"})
+    assert resp.status_code == 201
+    assert mock_add.call_args.args[1] == {"encrypted_entry": b"\x02ab"}
+    assert mock_add.call_args.kwargs["password"] is None
+    assert client.post("/api/vault/", json={"encrypted_entry": "a"}).status_code == 400
+    assert client.post("/api/vault/", json={"entry": {}}).status_code == 400
+
+
+@patch("backend.vault.services.VaultService.set_client_side")
+@patch("backend.vault.services.VaultService.key_material")
+def test_key_material_endpoints(mock_material, mock_set, client):
+    from backend.vault.crypto_utils import LEGACY_KDF
+
+    mock_material.return_value = {
+        "salt": b"\xff" * 16,
+        "kdf": LEGACY_KDF,
+        "cipher": "aes-256-gcm",
+        "wrapped_key": None,
+        "client_side": False,
+    }
+    body = client.get("/api/vault/key-material").get_json()
+    assert body["user_id"] == 1
+    assert body["salt"] == "_____________________w=="
+    assert body["kdf"] == {
+        "scheme": "pbkdf2-sha256",
+        "iterations": 390000,
+        "memory_kib": 0,
+        "parallelism": 1,
+    }
+    assert body["wrapped_key"] is None
+
+    url = "/api/vault/key-material"
+    resp = client.put(url, json={"client_side": True, "wrapped_key": "gAAA"})
+    assert resp.status_code == 200
+    mock_set.assert_called_once_with(1, True, "gAAA")
+    assert client.put(url, json={"client_side": "yes"}).status_code == 400
+    mock_set.side_effect = ValueError("Client-side vaults need the pbkdf2-sha256 KDF.")
+    assert client.put(url, json={"client_side": True}).status_code == 409
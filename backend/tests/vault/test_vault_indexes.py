@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+from backend.vault.repository import (
+    DELETE_ENTRY_SQL,
+    INSERT_ENTRY_SQL,
+    UPDATE_ENTRY_SQL,
+)
+from database.migrations import migrate
+
+
+VAULT_QUERIES = [
+    ("SELECT id, encrypted_entry FROM vault WHERE user_id = ? ORDER BY id", (1,)),
+    ("SELECT id, encrypted_entry FROM vault WHERE user_id = ? AND id = ?", (1, 1)),
+    (UPDATE_ENTRY_SQL, (1, b"x", 1)),
+    (DELETE_ENTRY_SQL, (1, 1)),
+    (INSERT_ENTRY_SQL, (1, b"x")),
+    (
+        "SELECT id, encrypted_entry, change_seq, deleted FROM vault "
+        "WHERE user_id = ? AND change_seq > ? ORDER BY change_seq LIMIT ?",
+        (1, 100, 50),
+    ),
+]
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO vault (user_id, encrypted_entry) VALUES (?, 'x')",
+        [(i % 20,) for i in range(200)],
+    )
+    conn.execute("ANALYZE")
+    return conn
+
+
+def query_plan(conn, sql, params):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+@pytest.mark.parametrize("sql,params", VAULT_QUERIES)
+def test_vault_queries_never_scan_the_table(conn, sql, params):
+    plan = query_plan(conn, sql, params)
+    # sqlite_sequence holds one row per AUTOINCREMENT table, whatever the vault size.
+    scans = [s for s in plan if s.startswith("SCAN") and "sqlite_sequence" not in s]
+    assert not scans, plan
+    assert any(step.startswith("SEARCH vault") for step in plan), plan
+
+
+def test_change_listing_and_counter_use_change_seq_index(conn):
+    for sql, params in VAULT_QUERIES[2:]:
+        plan = query_plan(conn, sql, params)
+        assert any("idx_vault_user_change_seq" in step for step in plan), plan
+        assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+def test_list_entries_uses_index_order(conn):
+    plan = query_plan(conn, *VAULT_QUERIES[0])
+    assert any("idx_vault_user_id_id" in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+def test_id_only_listing_is_covered(conn):
+    plan = query_plan(conn, "SELECT id FROM vault WHERE user_id = ?", (1,))
+    # Either (user_id, ...) index carries the rowid, so both cover it.
+    assert any("COVERING INDEX idx_vault_user_" in step for step in plan), plan
+
+
+def test_unindexed_check_probes_the_partial_index(conn):
+    conn.execute("UPDATE vault SET search_indexed = 1 WHERE id % 50 != 0")
+    conn.execute("ANALYZE")
+    plan = query_plan(
+        conn,
+        "SELECT id, encrypted_entry FROM vault "
+        "WHERE user_id = ? AND search_indexed = 0 AND deleted = 0 "
+        "ORDER BY id LIMIT ?",
+        (1, 100),
+    )
+    assert any("idx_vault_unindexed" in step for step in plan), plan
+    assert not any(step.startswith("SCAN") for step in plan), plan
@@ -0,0 +1,147 @@
+import sqlite3
+
+import pytest
+
+from database.migrations import migrate
+from backend.vault.repository import VaultRepository
+
+
+@pytest.fixture
+def repo():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    return VaultRepository(conn)
+
+
+def test_list_entries_keyset_pagination(repo):
+    ids = [repo.add_entry(1, {"encrypted_entry": f"t{i}"})["id"] for i in range(5)]
+    repo.add_entry(2, {"encrypted_entry": "other user"})
+    first = repo.list_entries(1, limit=2)
+    assert [e["id"] for e in first] == ids[:2]
+    second = repo.list_entries(1, after_id=first[-1]["id"], limit=2)
+    assert [e["id"] for e in second] == ids[2:4]
+    rest = repo.list_entries(1, after_id=second[-1]["id"], limit=2)
+    assert [e["id"] for e in rest] == ids[4:]
+
+
+def test_list_entries_metadata_only(repo):
+    repo.add_entry(1, {"encrypted_entry": "secret"})
+    (entry,) = repo.list_entries(1, metadata_only=True)
+    assert set(entry) == {"id", "created_at", "updated_at"}
+
+
+def test_iter_entries_streams_in_batches(repo):
+    ids = [repo.add_entry(1, {"encrypted_entry": f"t{i}"})["id"] for i in range(7)]
+    entries = repo.iter_entries(1, batch_size=3)
+    assert next(entries)["id"] == ids[0]
+    assert [e["id"] for e in entries] == ids[1:]
+
+
+def test_add_sealed_entries_binds_ciphertext_to_new_ids(repo):
+    ids = repo.add_sealed_entries(1, 3, lambda ids: [b"t%d" % i for i in ids])
+    assert [(e["id"], e["encrypted_entry"]) for e in repo.list_entries(1)] == [
+        (i, b"t%d" % i) for i in ids
+    ]
+
+    def broken(ids):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        repo.add_sealed_entries(1, 2, broken)
+    assert len(repo.list_entries(1)) == 3  # nothing inserted
+    # Ids keep following AUTOINCREMENT, also after the newest row is deleted;
+    # the two reserved by the failed call are skipped, never reused.
+    repo.delete_entry(1, ids[-1])
+    repo.db.execute("DELETE FROM vault WHERE id = ?", (ids[-1],))
+    (entry_id,) = repo.add_sealed_entries(2, 1, lambda ids: [b"x"])
+    assert entry_id == ids[-1] + 3
+    assert repo.add_entry(2, {"encrypted_entry": b"y"})["id"] == entry_id + 1
+
+
+def test_add_sealed_entries_encrypts_outside_the_write_lock(tmp_path):
+    path = tmp_path / "vault.db"
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    repo = VaultRepository(conn)
+    other = sqlite3.connect(path, timeout=0)
+
+    def seal(ids):
+        # Another writer gets the lock while the entries are being encrypted.
+        other.execute("INSERT INTO vault (user_id, encrypted_entry) VALUES (2, 'o')")
+        other.commit()
+        return [b"t"] * len(ids)
+
+    ids = repo.add_sealed_entries(1, 3, seal)
+    assert [e["id"] for e in repo.list_entries(1)] == ids
+    assert [e["id"] for e in repo.list_entries(2)] == [ids[-1] + 1]
+    other.close()
+
+
+def test_add_sealed_entries_writes_each_row_once(repo):
+    statements = []
+    repo.db.set_trace_callback(statements.append)
+    repo.add_sealed_entries(1, 50, lambda ids: [b"t"] * len(ids))
+    repo.db.set_trace_callback(None)
+    assert not any(
+        s.lstrip().upper().startswith("UPDATE VAULT") for s in statements
+    )
+    seqs = [e["change_seq"] for e in repo.list_changes(1)]
+    assert seqs == list(range(seqs[0], seqs[0] + 50))
+
+
+def test_batch_runs_in_one_transaction(repo):
+    a = repo.add_entry(1, {"encrypted_entry": "a"})["id"]
+    b = repo.add_entry(1, {"encrypted_entry": "b"})["id"]
+    results = repo.batch(
+        1,
+        [("get", a, None), ("update", b, "b2"), ("delete", a, None), ("get", 999, None)],
+    )
+    assert results[0]["encrypted_entry"] == "a"
+    assert results[1]["encrypted_entry"] == "b2"
+    assert results[2] is True
+    assert results[3] is None
+    assert [e["id"] for e in repo.list_entries(1)] == [b]
+
+    # A failing operation rolls back the whole batch.
+    with pytest.raises(ValueError):
+        repo.batch(1, [("delete", b, None), ("explode", b, None)])
+    assert [e["id"] for e in repo.list_entries(1)] == [b]
+
+
+def test_changes_since_counter_include_tombstones(repo):
+    a = repo.add_entry(1, {"encrypted_entry": b"a"})["id"]
+    b = repo.add_entry(1, {"encrypted_entry": b"b"})["id"]
+    repo.add_entry(2, {"encrypted_entry": b"other user"})
+    token = repo.list_changes(1)[-1]["change_seq"]
+
+    repo.update_entry(1, a, {"encrypted_entry": b"a2"})
+    assert repo.delete_entry(1, b) is True
+    assert repo.delete_entry(1, b) is False
+    changes = repo.list_changes(1, since=token)
+    assert [(c["id"], c["deleted"]) for c in changes] == [(a, 0), (b, 1)]
+    assert changes[0]["encrypted_entry"] == b"a2"
+    assert changes[1]["encrypted_entry"] == b""  # tombstones keep no ciphertext
+    assert changes[0]["change_seq"] < changes[1]["change_seq"]
+    assert repo.list_changes(1, since=changes[-1]["change_seq"]) == []
+
+    # Tombstones are invisible to every other read and can't be revived.
+    assert repo.get_entry(1, b) is None
+    assert [e["id"] for e in repo.list_entries(1)] == [a]
+    assert repo.update_entry(1, b, {"encrypted_entry": b"x"}) is None
+    assert repo.batch(1, [("update", b, b"x"), ("delete", b, None)]) == [None, False]
+
+
+def test_versions_and_conditional_update(repo):
+    assert repo.get_vault_version(1) == 0
+    entry_id = repo.add_entry(1, {"encrypted_entry": b"a"})["id"]
+    version = repo.get_entry_version(1, entry_id)
+    assert repo.get_vault_version(1) == version
+    stale = {"encrypted_entry": b"stale"}
+    assert repo.update_entry(1, entry_id, stale, expected_version=version + 1) is None
+    assert repo.update_entry(1, entry_id, {"encrypted_entry": b"b"}, version)
+    assert repo.get_entry_version(1, entry_id) > version
+    repo.delete_entry(1, entry_id)
+    assert repo.get_entry_version(1, entry_id) is None
+    assert repo.get_vault_version(1) > version  # deletes change the vault version
@@ -0,0 +1,303 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from backend.tests.vault.conftest import patched_key_material
+from backend.vault import crypto_utils
+from backend.vault.key_cache import DerivedKeyCache
+from backend.vault.services import VaultService
+
+
+SALT = b"1234567890123456"
+
+
+@pytest.fixture
+def wrapped_keys(cipher):
+    """Key material in memory; yields the wrapped_key column as a dict."""
+    with patched_key_material(SALT, cipher=cipher) as store:
+        yield store
+
+
+class SealedInserts:
+    """Stand-in for repo.add_sealed_entries that numbers rows from 1."""
+
+    def __init__(self):
+        self.calls = []
+        self.search_tokens = {}
+        self.next_id = 1
+
+    def __call__(self, user_id, count, seal, search_tokens=None):
+        ids = list(range(self.next_id, self.next_id + count))
+        self.next_id += count
+        self.calls.append(list(zip(ids, seal(ids))))
+        self.search_tokens.update(zip(ids, search_tokens or ()))
+        return ids
+
+    @property
+    def rows(self):
+        return [row for call in self.calls for row in call]
+
+
+@pytest.fixture
+def cipher():
+    return crypto_utils.CIPHER_FERNET
+
+
+@pytest.fixture
+def service(wrapped_keys):
+    repo = MagicMock()
+    repo.add_sealed_entries.side_effect = SealedInserts()
+    return VaultService(repo)
+
+
+def test_list_entries_derives_key_once(service):
+    key = crypto_utils.derive_vault_key("pw", SALT)
+    service.repo.list_entries.return_value = [
+        {"id": i, "encrypted_entry": key.encrypt({"n": i})} for i in range(5)
+    ]
+    with patch.object(
+        crypto_utils, "derive_key", wraps=crypto_utils.derive_key
+    ) as derive:
+        entries = service.list_entries(1, password="pw")
+    assert derive.call_count == 1
+    assert [e["decrypted"] for e in entries] == [{"n": i} for i in range(5)]
+
+
+def test_list_entries_wrong_password_yields_none(service):
+    key = crypto_utils.derive_vault_key("pw", SALT)
+    service.repo.list_entries.return_value = [
+        {"id": 1, "encrypted_entry": key.encrypt({"n": 1})}
+    ]
+    entries = service.list_entries(1, password="other")
+    assert entries[0]["decrypted"] is None
+
+
+def test_export_entries_decrypts_with_one_derivation(service):
+    key = crypto_utils.derive_vault_key("pw", SALT)
+    service.repo.iter_entries.return_value = iter(
+        [{"id": i, "encrypted_entry": key.encrypt({"n": i})} for i in range(3)]
+    )
+    with patch.object(
+        crypto_utils, "derive_key", wraps=crypto_utils.derive_key
+    ) as derive:
+        exported = list(service.export_entries(1, password="pw", batch_size=2))
+    assert derive.call_count == 1
+    assert [e["decrypted"] for e in exported] == [{"n": i} for i in range(3)]
+    service.repo.iter_entries.assert_called_once_with(1, batch_size=2)
+
+
+def test_export_entries_passthrough_without_password(service):
+    service.repo.iter_entries.return_value = iter([{"id": 1, "encrypted_entry": "x"}])
+    assert list(service.export_entries(1)) == [{"id": 1, "encrypted_entry": "x"}]
+
+
+def test_import_entries_reports_per_row_errors(service):
+    rows = [{"service": "a"}, "not json", '{"service": "b"}', [], {"service": "c"}]
+    with patch.object(
+        crypto_utils, "derive_key", wraps=crypto_utils.derive_key
+    ) as derive:
+        report = service.import_entries(1, rows, "pw", chunk_size=2, workers=2)
+    assert derive.call_count == 1
+    assert report["imported"] == 3
+    assert [e["index"] for e in report["errors"]] == [1, 3]
+    # One transaction per chunk that had valid rows.
+    assert service.repo.add_sealed_entries.call_count == 3
+    key = service._vault_key(1, "pw")
+    inserted = service.repo.add_sealed_entries.side_effect.rows
+    assert [key.decrypt(t, 1, i) for i, t in inserted] == [
+        {"service": "a"},
+        {"service": "b"},
+        {"service": "c"},
+    ]
+
+
+def test_import_entries_atomic_and_limit(service):
+    rows = iter([{"n": i} for i in range(10)])
+    report = service.import_entries(
+        1, rows, "pw", chunk_size=2, atomic=True, max_entries=5
+    )
+    assert report["imported"] == 5
+    assert report["errors"] == [
+        {"index": 5, "error": "Import limit of 5 entries exceeded."}
+    ]
+    service.repo.add_sealed_entries.assert_called_once()
+
+
+def test_batch_derives_once_and_reports_per_operation(service):
+    key = crypto_utils.derive_vault_key("pw", SALT)
+    service.repo.batch.return_value = [
+        {"id": 1, "encrypted_entry": key.encrypt({"n": 1})},
+        {"id": 2, "encrypted_entry": "new"},
+        False,
+    ]
+    operations = [
+        {"op": "get", "id": 1},
+        {"op": "update", "id": 2, "entry": {"n": 2}},
+        {"op": "delete", "id": 3},
+        {"op": "nuke", "id": 4},
+    ]
+    with patch.object(
+        crypto_utils, "derive_key", wraps=crypto_utils.derive_key
+    ) as derive:
+        results = service.batch(1, operations, password="pw")
+    assert derive.call_count == 1
+    assert [r["status"] for r in results] == [200, 200, 404, 400]
+    assert results[0]["entry"]["decrypted"] == {"n": 1}
+    repo_ops = service.repo.batch.call_args.args[1]
+    assert [op[:2] for op in repo_ops] == [("get", 1), ("update", 2), ("delete", 3)]
+    assert service._vault_key(1, "pw").decrypt(repo_ops[1][2]) == {"n": 2}
+
+
+def test_new_entries_use_envelope_format_and_legacy_still_reads(service):
+    legacy = crypto_utils.derive_vault_key("pw", SALT).encrypt({"old": True})
+    service.repo.list_entries.return_value = [{"id": 1, "encrypted_entry": legacy}]
+    service.add_entry(1, {"new": True}, password="pw")
+    service.repo.get_entry.assert_called_once_with(1, 1)
+    ((_, token),) = service.repo.add_sealed_entries.side_effect.rows
+    assert crypto_utils.ciphertext_format(token) == crypto_utils.FORMAT_FERNET_ENVELOPE
+    key = service._vault_key(1, "pw")
+    assert key.decrypt(token) == {"new": True}
+    assert key.decrypt(legacy) == {"old": True}
+
+
+def test_first_unlock_with_wrong_password_creates_no_key(service, wrapped_keys):
+    from backend.vault.exceptions import InvalidVaultPasswordError
+
+    legacy = crypto_utils.derive_vault_key("pw", SALT).encrypt({"n": 1})
+    service.repo.list_entries.return_value = [{"id": 1, "encrypted_entry": legacy}]
+    with pytest.raises(InvalidVaultPasswordError):
+        service.add_entry(1, {"n": 2}, password="typo")
+    assert wrapped_keys == {}
+    assert service.list_entries(1, password="typo")[0]["decrypted"] is None
+
+
+def test_change_password_rewraps_key_and_upgrades_legacy_rows(service, wrapped_keys):
+    from backend.vault.exceptions import InvalidVaultPasswordError
+
+    legacy = crypto_utils.derive_vault_key("old", SALT).encrypt({"n": 1})
+    service.repo.list_entries.return_value = [{"id": 1, "encrypted_entry": legacy}]
+    envelope = service._vault_key(1, "old").encrypt({"n": 2})
+    service.repo.iter_entries.return_value = iter(
+        [{"id": 1, "encrypted_entry": legacy}, {"id": 2, "encrypted_entry": envelope}]
+    )
+    service.change_password(1, "old", "new")
+
+    # Only the legacy row is re-encrypted; the envelope row is untouched.
+    (upgrades,) = service.repo.batch.call_args.args[1:]
+    assert [op[:2] for op in upgrades] == [("update", 1)]
+    key = service._vault_key(1, "new")
+    assert key.decrypt(upgrades[0][2]) == {"n": 1}
+    assert key.decrypt(envelope) == {"n": 2}
+    with pytest.raises(InvalidVaultPasswordError):
+        service._vault_key(1, "old")
+
+
+def test_password_change_in_another_worker_revokes_cached_keys(service):
+    from backend.vault.exceptions import InvalidVaultPasswordError
+
+    # Two services with their own key caches stand in for two worker processes.
+    worker_a = VaultService(service.repo, key_cache=DerivedKeyCache())
+    worker_b = VaultService(service.repo, key_cache=DerivedKeyCache())
+    service.repo.list_entries.return_value = []
+    token = worker_b._vault_key(1, "old", "s").encrypt({"n": 1}, 1, 5)
+    service.repo.get_entry.return_value = {"id": 5, "encrypted_entry": token}
+    assert worker_b.get_entry(1, 5, "old", "s")["decrypted"] == {"n": 1}
+
+    service.repo.iter_entries.return_value = iter([])
+    worker_a.change_password(1, "old", "new")
+    assert worker_b.get_entry(1, 5, "old", "s")["decrypted"] is None
+    with pytest.raises(InvalidVaultPasswordError):
+        worker_b.add_entry(1, {"n": 2}, password="old", session_id="s")
+    assert worker_b.get_entry(1, 5, "new", "s")["decrypted"] == {"n": 1}
+
+
+@pytest.mark.parametrize(
+    "cipher", [crypto_utils.CIPHER_AES_GCM, crypto_utils.CIPHER_CHACHA20_POLY1305]
+)
+def test_aead_cipher_binds_entry_and_user_ids(service, cipher):
+    from cryptography.fernet import InvalidToken
+
+    service.repo.list_entries.return_value = []
+    service.add_entry(1, {"n": 1}, password="pw")
+    ((entry_id, token),) = service.repo.add_sealed_entries.side_effect.rows
+    assert token[0] == crypto_utils._CIPHER_FORMATS[cipher]
+    key = service._vault_key(1, "pw")
+    assert key.decrypt(token, 1, entry_id) == {"n": 1}
+    with pytest.raises(InvalidToken):
+        key.decrypt(token, 1, entry_id + 1)  # moved to another row
+    with pytest.raises(InvalidToken):
+        key.decrypt(token, 2, entry_id)  # moved to another user
+
+    service.repo.list_entries.return_value = [
+        {"id": entry_id, "encrypted_entry": token},
+        {"id": entry_id + 1, "encrypted_entry": token},
+    ]
+    entries = service.list_entries(1, password="pw")
+    assert [e["decrypted"] for e in entries] == [{"n": 1}, None]
+
+
+def test_changes_pages_through_deltas(db_service):
+    ids = [db_service.add_entry(1, {"n": n}, password="pw")["id"] for n in range(3)]
+    full = db_service.changes(1, 0, password="pw", limit=2)
+    assert [e["decrypted"] for e in full["entries"]] == [{"n": 0}, {"n": 1}]
+    assert full["has_more"]
+    rest = db_service.changes(1, full["sync_token"], password="pw", limit=2)
+    assert [e["id"] for e in rest["entries"]] == [ids[2]] and not rest["has_more"]
+
+    db_service.update_entry(1, ids[0], {"n": 10}, password="pw")
+    db_service.delete_entry(1, ids[1])
+    delta = db_service.changes(1, rest["sync_token"], password="pw")
+    assert [e["decrypted"] for e in delta["entries"]] == [{"n": 10}]
+    assert delta["deleted"] == [ids[1]]
+    idle = db_service.changes(1, delta["sync_token"])
+    assert idle == {
+        "entries": [],
+        "deleted": [],
+        "sync_token": delta["sync_token"],
+        "has_more": False,
+    }
+
+
+def test_client_side_vault_is_never_unlocked_by_the_server(db_service):
+    from backend.vault.exceptions import ClientSideVaultError
+
+    entry = db_service.add_entry(1, {"n": 1}, password="pw")
+    db_service.list_entries(1, password="pw", session_id="s")  # warm the caches
+    db_service.set_client_side(1, True)
+    with pytest.raises(ClientSideVaultError):
+        db_service.list_entries(1, password="pw", session_id="s")
+    with pytest.raises(ClientSideVaultError):
+        db_service.change_password(1, "pw", "new")
+
+    # Ciphertext in, ciphertext out.
+    (stored,) = db_service.list_entries(1)
+    raw = db_service.add_entry(1, {"encrypted_entry": stored["encrypted_entry"]})
+    assert db_service.get_entry(1, raw["id"])["encrypted_entry"] == stored[
+        "encrypted_entry"
+    ]
+    db_service.set_client_side(1, False)
+    assert db_service.get_entry(1, entry["id"], password="pw")["decrypted"] == {"n": 1}
+
+
+def test_client_side_opt_in_takes_a_client_made_data_key(db_service):
+    password_key = crypto_utils.derive_vault_key("pw", b"s" * 16)
+    wrapped = password_key.wrap(crypto_utils.generate_data_key())
+    with pytest.raises(ValueError):
+        db_service.set_client_side(2, True)  # no data key yet
+    with patch(
+        "backend.vault.services.get_or_create_user_kdf",
+        return_value=crypto_utils.KdfParams(scheme=crypto_utils.KDF_ARGON2ID),
+    ), pytest.raises(ValueError):
+        db_service.set_client_side(2, True, wrapped)
+
+    db_service.set_client_side(2, True, wrapped)
+    material = db_service.key_material(2)
+    assert material["wrapped_key"] == wrapped and material["client_side"]
+    other = password_key.wrap(crypto_utils.generate_data_key())
+    with pytest.raises(ValueError):
+        db_service.set_client_side(2, True, other)
+
+    # Opting out hands the same data key to the server.
+    db_service.set_client_side(2, False)
+    token = db_service._vault_key(2, "pw").encrypt({"n": 1}, 2, 1)
+    client_key = password_key.unwrap(wrapped, crypto_utils.CIPHER_AES_GCM)
+    assert client_key.decrypt(token, 2, 1) == {"n": 1}
@@ -0,0 +1,150 @@
+"""
+Thread-safe in-memory LRU cache with idle-TTL eviction and a hard size cap.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class TTLCache:
+    """
+    LRU cache whose entries also expire after `ttl_seconds` without access.
+
+    Args:
+        max_entries (int): Hard cap; the least recently used entry is evicted beyond it.
+        ttl_seconds (float | None): Idle lifetime of an entry; None disables expiry.
+        on_evict (callable | None): Called with (key, value) whenever an entry leaves
+            the cache (eviction, expiry, invalidation or clear).
+        clock (callable): Monotonic time source, injectable for tests.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: Optional[float] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._on_evict = on_evict
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (value, last_access); ordered from least to most recently used
+        self._data: "OrderedDict[Hashable, tuple[Any, float]]" = OrderedDict()
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING, record=False) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None, record: bool = True) -> Any:
+        """Return the cached value (refreshing its recency) or `default`."""
+        removed = []
+        with self._lock:
+            now = self._clock()
+            self._expire(now, removed)
+            item = self._data.get(key)
+            if item is None:
+                if record:
+                    self.stats.misses += 1
+                value = default
+            else:
+                self._data[key] = (item[0], now)
+                self._data.move_to_end(key)
+                if record:
+                    self.stats.hits += 1
+                value = item[0]
+        self._notify(removed)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Insert or replace an entry, evicting the LRU entry if over capacity."""
+        removed = []
+        with self._lock:
+            now = self._clock()
+            self._expire(now, removed)
+            old = self._data.pop(key, None)
+            if old is not None and old[0] is not value:
+                removed.append((key, old[0]))
+            self._data[key] = (value, now)
+            while len(self._data) > self._max_entries:
+                old_key, (old_value, _) = self._data.popitem(last=False)
+                self.stats.evictions += 1
+                removed.append((old_key, old_value))
+        self._notify(removed)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry and return its value (or `default`)."""
+        with self._lock:
+            item = self._data.pop(key, None)
+        if item is None:
+            return default
+        self._notify([(key, item[0])])
+        return item[0]
+
+    def values_where(self, predicate: Callable[[Hashable], bool]) -> list:
+        """Return the live values whose key matches `predicate` (recency unchanged)."""
+        removed = []
+        with self._lock:
+            self._expire(self._clock(), removed)
+            values = [v for k, (v, _) in self._data.items() if predicate(k)]
+        self._notify(removed)
+        return values
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove every entry whose key matches `predicate`. Returns the count."""
+        with self._lock:
+            removed = [(k, v) for k, (v, _) in self._data.items() if predicate(k)]
+            for key, _ in removed:
+                del self._data[key]
+        self._notify(removed)
+        return len(removed)
+
+    def clear(self) -> None:
+        with self._lock:
+            removed = [(k, v) for k, (v, _) in self._data.items()]
+            self._data.clear()
+        self._notify(removed)
+
+    def _expire(self, now: float, removed: list) -> None:
+        # Entries are ordered by last access, so expired ones sit at the front.
+        if self._ttl is None:
+            return
+        while self._data:
+            key, (value, last_access) = next(iter(self._data.items()))
+            if now - last_access < self._ttl:
+                break
+            del self._data[key]
+            self.stats.expirations += 1
+            removed.append((key, value))
+
+    def _notify(self, removed: list) -> None:
+        if self._on_evict is None:
+            return
+        for key, value in removed:
+            self._on_evict(key, value)
+
+
+_MISSING = object()
@@ -1,12 +1,16 @@
-def get_db():
-    """Returns a SQLite connection to the app database (for use in Flask context)."""
-    return SQLiteConnection().get_connection()
-
-
 import os
 import sqlite3
 import logging
-from typing import Any, Protocol, Optional
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterator, Protocol, Optional
+
+from flask import current_app, has_app_context
+
+from backend.config import settings
 
 
 class IPathResolver(Protocol):
@@ -32,6 +36,49 @@ class PathResolver(IPathResolver):
         )
 
 
+_PROFILE_PRAGMAS = (
+    "journal_mode",
+    "synchronous",
+    "mmap_size",
+    "cache_size",
+    "temp_store",
+    "busy_timeout",
+)
+
+
+def get_db_profile(name: Optional[str] = None) -> dict:
+    """Return the PRAGMA settings of a named profile (default: settings.DB_PROFILE)."""
+    name = name or settings.DB_PROFILE
+    try:
+        return dict(settings.DB_PROFILES[name])
+    except KeyError:
+        raise ValueError(f"Unknown database profile: {name}")
+
+
+def apply_db_profile(conn: sqlite3.Connection, profile: Optional[dict] = None) -> None:
+    """
+    Apply a database performance profile (PRAGMAs) to a connection.
+    Args:
+        conn: The connection to configure.
+        profile (dict | None): PRAGMA name -> value; defaults to the configured profile.
+    Raises:
+        ValueError: For unknown PRAGMAs or values that are not plain words/integers.
+    """
+    if profile is None:
+        profile = get_db_profile()
+    unknown = set(profile) - set(_PROFILE_PRAGMAS)
+    if unknown:
+        raise ValueError(f"Unsupported PRAGMA(s) in profile: {sorted(unknown)}")
+    for pragma in _PROFILE_PRAGMAS:
+        if pragma not in profile:
+            continue
+        value = profile[pragma]
+        # PRAGMA values cannot be bound as parameters; only allow plain tokens.
+        if not isinstance(value, int) and not str(value).isalnum():
+            raise ValueError(f"Invalid value for PRAGMA {pragma}: {value!r}")
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+
 class IDatabaseConnection(Protocol):
     def get_connection(self) -> sqlite3.Connection: ...
 
@@ -42,10 +89,12 @@ class SQLiteConnection(IDatabaseConnection):
         db_path: Optional[str] = None,
         logger: Optional[ILogger] = None,
         path_resolver: Optional[IPathResolver] = None,
+        profile: Optional[dict] = None,
     ) -> None:
         self._path_resolver = path_resolver or PathResolver()
         self._db_path = self._path_resolver.resolve_db_path(db_path)
         self._logger = logger or logging.getLogger("SQLiteConnection")
+        self._profile = profile
 
     def get_connection(self) -> sqlite3.Connection:
         if not os.path.isfile(self._db_path):
@@ -54,7 +103,252 @@ class SQLiteConnection(IDatabaseConnection):
         try:
             conn = sqlite3.connect(self._db_path)
             conn.row_factory = sqlite3.Row
+            apply_db_profile(conn, self._profile)
             return conn
         except Exception as e:
             self._logger.error(f"Failed to connect to database: {e}")
             raise Exception(f"Failed to connect to database: {e}")
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available in time."""
+
+    pass
+
+
+@dataclass
+class PoolStats:
+    """Snapshot of connection pool counters."""
+
+    size: int
+    in_use: int
+    idle: int
+    checkouts: int
+    waits: int
+    creations: int
+    health_check_failures: int
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled sqlite3.Connection.
+    close() hands the connection back to its pool instead of closing it, so
+    existing code that closes connections after each use keeps working.
+    """
+
+    def __init__(self, pool: "SQLiteConnectionPool", conn: sqlite3.Connection) -> None:
+        self._pool = pool
+        self._conn: Optional[sqlite3.Connection] = conn
+
+    def __getattr__(self, name: str) -> Any:
+        conn = self.__dict__.get("_conn")
+        if conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return getattr(conn, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Private attributes belong to the proxy; the rest (e.g. isolation_level)
+        # configure the underlying connection.
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+            return
+        conn = self.__dict__.get("_conn")
+        if conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        setattr(conn, name, value)
+
+    def __enter__(self) -> "PooledConnection":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        # Same semantics as sqlite3.Connection: commit or roll back, do not close.
+        return self.__getattr__("__exit__")(exc_type, exc, tb)
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool._release(conn)
+
+    def __del__(self) -> None:
+        # Safety net for callers that never close their connection.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class SQLiteConnectionPool(IDatabaseConnection):
+    """
+    Thread-safe pool of SQLite connections with checkout/return semantics.
+
+    get_connection() checks a connection out (creating one while the pool is
+    below `pool_size`, otherwise waiting up to `timeout` seconds for a return).
+    Closing the returned PooledConnection releases it back to the pool.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        pool_size: int = settings.DB_POOL_SIZE,
+        timeout: float = settings.DB_POOL_TIMEOUT_SECONDS,
+        health_check: bool = settings.DB_POOL_HEALTH_CHECK,
+        logger: Optional[ILogger] = None,
+        path_resolver: Optional[IPathResolver] = None,
+        profile: Optional[dict] = None,
+    ) -> None:
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1.")
+        self._path_resolver = path_resolver or PathResolver()
+        self._db_path = self._path_resolver.resolve_db_path(db_path)
+        self._logger = logger or logging.getLogger("SQLiteConnectionPool")
+        self._pool_size = pool_size
+        self._timeout = timeout
+        self._health_check = health_check
+        self._profile = profile
+        self._cond = threading.Condition()
+        self._idle: "deque[sqlite3.Connection]" = deque()
+        self._total = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._creations = 0
+        self._health_check_failures = 0
+
+    def get_connection(self) -> PooledConnection:
+        conn = self._checkout()
+        if self._health_check and not self._is_healthy(conn):
+            with self._cond:
+                self._health_check_failures += 1
+                self._total -= 1
+            self._close_quietly(conn)
+            conn = self._checkout()
+        return PooledConnection(self, conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[PooledConnection]:
+        """Check out a connection for the duration of a with-block."""
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def stats(self) -> PoolStats:
+        with self._cond:
+            return PoolStats(
+                size=self._pool_size,
+                in_use=self._total - len(self._idle),
+                idle=len(self._idle),
+                checkouts=self._checkouts,
+                waits=self._waits,
+                creations=self._creations,
+                health_check_failures=self._health_check_failures,
+            )
+
+    def close_all(self) -> None:
+        """Close idle connections; checked-out ones are closed on return."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._total -= len(idle)
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def _checkout(self) -> sqlite3.Connection:
+        deadline = time.monotonic() + self._timeout
+        with self._cond:
+            waited = False
+            while not self._idle and self._total >= self._pool_size:
+                if not waited:
+                    self._waits += 1
+                    waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    if not self._idle and self._total >= self._pool_size:
+                        raise PoolTimeoutError(
+                            f"No database connection available after {self._timeout}s"
+                        )
+            self._checkouts += 1
+            if self._idle:
+                return self._idle.pop()
+            self._total += 1
+        try:
+            return self._create()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            self._close_quietly(conn)
+            return
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def _create(self) -> sqlite3.Connection:
+        # The file check only runs when a new connection is opened, not per checkout.
+        if not os.path.isfile(self._db_path):
+            self._logger.error(f"Database file not found at {self._db_path}")
+            raise FileNotFoundError(f"Database file not found at {self._db_path}")
+        try:
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            apply_db_profile(conn, self._profile)
+        except Exception as e:
+            self._logger.error(f"Failed to connect to database: {e}")
+            raise Exception(f"Failed to connect to database: {e}")
+        with self._cond:
+            self._creations += 1
+        return conn
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_default_pool: Optional[SQLiteConnectionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> SQLiteConnectionPool:
+    """Process-wide pool for the default database path."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SQLiteConnectionPool()
+        return _default_pool
+
+
+@contextmanager
+def db_connection() -> Iterator[sqlite3.Connection]:
+    """
+    Check out a connection to the app database for one with-block.
+    Inside an app context it comes from app.config["DB_CONNECTION"], else
+    from the default pool. Nothing is held between blocks: repositories
+    check out their own connection per operation, and a request that kept
+    one as well would need two at once and could deadlock a small pool.
+    """
+    source = current_app.config.get("DB_CONNECTION") if has_app_context() else None
+    conn = (source or get_default_pool()).get_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
@@ -0,0 +1,33 @@
+"""
+Bounded thread pools for blocking work awaited from asyncio code.
+
+SQLite has no async API. Under ASGI, database calls made from the event loop
+run on a fixed-size pool, so the loop never blocks and the number of threads
+stays constant however many connections are open.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class BlockingExecutor:
+    def __init__(self, max_workers: int, name: str) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1.")
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run `fn(*args, **kwargs)` on the pool and await its result.
+        Raises:
+            Exception: Whatever `fn` raises.
+        """
+        call = functools.partial(fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._pool, call)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
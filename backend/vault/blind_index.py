@@ -0,0 +1,99 @@
+"""
+Blind search index over vault entry fields.
+
+For each searchable field (service, username, url) an entry gets keyed HMAC
+tokens of its normalized value: one exact-match token and one token per
+prefix up to settings.VAULT_SEARCH_MAX_PREFIX characters. Tokens are keyed
+with a per-user subkey of the vault data key (VaultKey.blind_index_key), so
+the server can match a query token against stored tokens without learning
+the values; it does learn which entries share a value or prefix.
+"""
+
+import hmac
+import unicodedata
+
+from backend.config import settings
+
+SEARCH_FIELDS = ("service", "username", "url")
+
+MODE_EXACT = "exact"
+MODE_PREFIX = "prefix"
+
+TOKEN_SIZE = 16  # bytes of HMAC-SHA256 kept per token
+
+
+def normalize(field: str, value) -> str:
+    """Case- and width-folded value used for both indexing and queries."""
+    if not isinstance(value, str):
+        return ""
+    value = " ".join(unicodedata.normalize("NFKC", value).casefold().split())
+    if field == "url":
+        for scheme in ("https://", "http://"):
+            if value.startswith(scheme):
+                value = value[len(scheme):]
+                break
+        if value.startswith("www."):
+            value = value[4:]
+        value = value.rstrip("/")
+    return value
+
+
+def _token(index_key: bytes, field: str, mode: str, value: str) -> bytes:
+    message = f"{field}\x00{mode}\x00{value}".encode()
+    return hmac.new(index_key, message, "sha256").digest()[:TOKEN_SIZE]
+
+
+def entry_tokens(key, data: dict) -> list[bytes]:
+    """All exact and prefix tokens for an entry's searchable fields."""
+    if not isinstance(data, dict):
+        return []
+    index_key = key.blind_index_key()
+    tokens = set()
+    for field in SEARCH_FIELDS:
+        value = normalize(field, data.get(field))
+        if not value:
+            continue
+        tokens.add(_token(index_key, field, MODE_EXACT, value))
+        for length in range(1, min(len(value), settings.VAULT_SEARCH_MAX_PREFIX) + 1):
+            tokens.add(_token(index_key, field, MODE_PREFIX, value[:length]))
+    return sorted(tokens)
+
+
+def query_tokens(key, query: str, fields, mode: str) -> list[bytes]:
+    """
+    Tokens to look up for a query. Prefix queries longer than the indexed
+    prefix length use the longest indexed prefix; matches() then drops the
+    entries that only share that prefix.
+    """
+    index_key = key.blind_index_key()
+    tokens = []
+    for field in fields:
+        value = normalize(field, query)
+        if not value:
+            continue
+        if mode == MODE_PREFIX:
+            value = value[: settings.VAULT_SEARCH_MAX_PREFIX]
+        tokens.append(_token(index_key, field, mode, value))
+    return tokens
+
+
+def is_truncated(query: str, fields, mode: str) -> bool:
+    """Whether query_tokens() had to shorten the query (results need filtering)."""
+    return mode == MODE_PREFIX and any(
+        len(normalize(field, query)) > settings.VAULT_SEARCH_MAX_PREFIX
+        for field in fields
+    )
+
+
+def matches(data, query: str, fields, mode: str) -> bool:
+    """Check a decrypted entry against the query."""
+    if not isinstance(data, dict):
+        return False
+    for field in fields:
+        value = normalize(field, data.get(field))
+        wanted = normalize(field, query)
+        if not value or not wanted:
+            continue
+        if value == wanted or (mode == MODE_PREFIX and value.startswith(wanted)):
+            return True
+    return False
@@ -0,0 +1,46 @@
+"""
+In-process wake-ups for coroutines waiting on changes to a user's vault
+(long-polls on GET /api/vault/changes under ASGI).
+
+A notification only means "look again": waiters re-check the vault version
+before answering, and writes in other processes are never notified here,
+so waiters also re-check on a timer (see backend/asgi.py).
+"""
+
+import asyncio
+
+
+class ChangeNotifier:
+    """Per-user wake-ups. Loop-bound: call wait() and notify() on its loop."""
+
+    def __init__(self) -> None:
+        self._waiters: dict[int, set[asyncio.Future]] = {}
+
+    async def wait(self, user_id: int, timeout: float) -> bool:
+        """
+        Wait up to `timeout` seconds for notify(user_id).
+        Returns:
+            bool: True if notified, False on timeout.
+        """
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._waiters.setdefault(user_id, set())
+        waiters.add(future)
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            waiters.discard(future)
+            if not waiters and self._waiters.get(user_id) is waiters:
+                del self._waiters[user_id]
+
+    def notify(self, user_id: int) -> None:
+        """Wake every coroutine currently waiting on `user_id`."""
+        for future in self._waiters.get(user_id, ()):
+            if not future.done():
+                future.set_result(None)
+
+    def waiting(self) -> int:
+        """Number of coroutines currently waiting."""
+        return sum(len(waiters) for waiters in self._waiters.values())
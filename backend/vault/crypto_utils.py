@@ -1,42 +1,418 @@
 """
 Encryption utilities for vault entries using Fernet.
-Key is derived from user password using PBKDF2HMAC.
+Key is derived from user password using PBKDF2HMAC or Argon2id; the KDF and
+its parameters are recorded per user (see salt_utils.get_or_create_user_kdf).
+
+Envelope format: each user has a random data key, stored wrapped (Fernet
+encrypted) under the password-derived key. Entries are encrypted under the
+data key and carry a format byte, so a password change rewraps one key
+instead of re-encrypting every entry.
+
+Ciphertexts are stored as raw bytes (a BLOB); the base64 form Fernet normally
+uses only appears at the API boundary (encode_ciphertext/decode_ciphertext).
+Formats, by first byte:
+    0x80  legacy: plain Fernet token under the password-derived key
+    0x02  format byte + Fernet token under the user's data key
+    0x03  format byte + 12-byte nonce + AES-256-GCM ciphertext and tag
+    0x04  format byte + 12-byte nonce + ChaCha20-Poly1305 ciphertext and tag
+The AEAD formats use subkeys derived from the data key with HKDF and bind
+(format, user id, entry id) as associated data, so a ciphertext copied to
+another row or user fails to decrypt. Which format new entries get is the
+user's cipher (see salt_utils.get_or_create_user_cipher); reads go by the
+format byte, so entries written under an earlier cipher stay readable.
+Rows written before the BLOB migration may still hold the base64 text form;
+they are decoded on read until the backfill reaches them.
 """
 
 import base64
+import hmac
+import json
+import os
+import struct
+import time
+from dataclasses import asdict, dataclass
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives.kdf.argon2 import Argon2id
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.backends import default_backend
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
+from backend.config import settings
+
+FORMAT_FERNET_LEGACY = 0x80  # Fernet's own version byte
+FORMAT_FERNET_ENVELOPE = 0x02
+FORMAT_AES_GCM = 0x03
+FORMAT_CHACHA20_POLY1305 = 0x04
+
+CIPHER_FERNET = "fernet"
+CIPHER_AES_GCM = "aes-256-gcm"
+CIPHER_CHACHA20_POLY1305 = "chacha20-poly1305"
+
+# AEAD ciphers: format byte, primitive and HKDF info for the entry subkey.
+_AEADS = {
+    FORMAT_AES_GCM: (AESGCM, b"vault-entry/" + CIPHER_AES_GCM.encode()),
+    FORMAT_CHACHA20_POLY1305: (
+        ChaCha20Poly1305,
+        b"vault-entry/" + CIPHER_CHACHA20_POLY1305.encode(),
+    ),
+}
+_CIPHER_FORMATS = {
+    CIPHER_FERNET: FORMAT_FERNET_ENVELOPE,
+    CIPHER_AES_GCM: FORMAT_AES_GCM,
+    CIPHER_CHACHA20_POLY1305: FORMAT_CHACHA20_POLY1305,
+}
+_INDEX_INFO = b"vault-search-index"
+_NONCE_SIZE = 12
+_ASSOCIATED_DATA = struct.Struct(">BQQ")  # format, user id, entry id
+
+KDF_PBKDF2_SHA256 = "pbkdf2-sha256"
+KDF_ARGON2ID = "argon2id"
+
+
+@dataclass(frozen=True)
+class KdfParams:
+    """Vault KDF scheme and cost parameters."""
+
+    scheme: str = KDF_PBKDF2_SHA256
+    # PBKDF2 iteration count, or Argon2 time cost (passes).
+    iterations: int = 390000
+    # Argon2 only: memory cost in KiB and number of lanes.
+    memory_kib: int = 0
+    parallelism: int = 1
+
+    def params_json(self) -> str:
+        params = asdict(self)
+        del params["scheme"]
+        return json.dumps(params, sort_keys=True)
+
+    @classmethod
+    def from_record(cls, scheme: str, params_json: str) -> "KdfParams":
+        return cls(scheme=scheme, **json.loads(params_json))
+
+
+# Parameters of every vault created before KDFs were recorded per user.
+LEGACY_KDF = KdfParams()
+
+
+def default_vault_kdf() -> KdfParams:
+    """KDF parameters for newly created vaults (settings.VAULT_KDF)."""
+    if settings.VAULT_KDF == KDF_ARGON2ID:
+        return KdfParams(
+            scheme=KDF_ARGON2ID,
+            iterations=settings.VAULT_ARGON2_TIME_COST,
+            memory_kib=settings.VAULT_ARGON2_MEMORY_KIB,
+            parallelism=settings.VAULT_ARGON2_PARALLELISM,
+        )
+    if settings.VAULT_KDF == KDF_PBKDF2_SHA256:
+        return KdfParams(iterations=settings.VAULT_PBKDF2_ITERATIONS)
+    raise ValueError(f"Unknown vault KDF: {settings.VAULT_KDF}")
+
+
+def default_vault_cipher() -> str:
+    """Entry cipher for newly created vaults (settings.VAULT_CIPHER)."""
+    if settings.VAULT_CIPHER not in _CIPHER_FORMATS:
+        raise ValueError(f"Unknown vault cipher: {settings.VAULT_CIPHER}")
+    return settings.VAULT_CIPHER
+
+
+def derive_key(password: str, salt: bytes, kdf: KdfParams | None = None) -> bytes:
+    """Derive a Fernet key from a password and salt (legacy PBKDF2 by default)."""
+    kdf = kdf or LEGACY_KDF
+    if kdf.scheme == KDF_PBKDF2_SHA256:
+        kdf_impl = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=salt,
+            iterations=kdf.iterations,
+            backend=default_backend(),
+        )
+    elif kdf.scheme == KDF_ARGON2ID:
+        kdf_impl = Argon2id(
+            salt=salt,
+            length=32,
+            iterations=kdf.iterations,
+            lanes=kdf.parallelism,
+            memory_cost=kdf.memory_kib,
+        )
+    else:
+        raise ValueError(f"Unknown vault KDF: {kdf.scheme}")
+    return base64.urlsafe_b64encode(kdf_impl.derive(password.encode()))
+
+
+def encode_ciphertext(token) -> str:
+    """Base64 (urlsafe) form of a stored ciphertext, for API responses."""
+    return base64.urlsafe_b64encode(token).decode()
+
+
+def decode_ciphertext(text: str) -> bytes:
+    """
+    Raw ciphertext from its base64 API form. Padding is optional, as browser
+    base64url encoders usually leave it out.
+    Raises:
+        ValueError: If `text` is not valid base64.
+    """
+    try:
+        return base64.urlsafe_b64decode((text + "=" * (-len(text) % 4)).encode())
+    except (TypeError, ValueError):
+        raise ValueError("Ciphertext must be urlsafe base64.")
+
+
+def _as_bytes(token):
+    # Rows not yet converted by the BLOB migration still hold base64 text.
+    if isinstance(token, str):
+        return decode_ciphertext(token)
+    return token
 
 
-def derive_key(password: str, salt: bytes) -> bytes:
-    """Derive a Fernet key from a password and salt."""
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=salt,
-        iterations=390000,
-        backend=default_backend(),
+def ciphertext_format(token) -> int | None:
+    """Return the format byte of a stored ciphertext, or None if unreadable."""
+    try:
+        raw = _as_bytes(token)
+    except ValueError:
+        return None
+    return raw[0] if raw else None
+
+
+class _RawFernet:
+    """
+    Fernet over raw bytes.
+
+    Writes and reads the token layout of cryptography.fernet.Fernet (version,
+    timestamp, IV, AES-128-CBC ciphertext, HMAC-SHA256) without its base64
+    framing, so stored BLOBs (or memoryviews of them) go to the cipher without
+    encode/decode copies. Tokens carry no TTL here, as with Fernet.decrypt()
+    without one.
+    """
+
+    __slots__ = ("_signing_key", "_encryption_key")
+
+    _HEADER = struct.Struct(">BQ")  # version byte, timestamp
+    _IV_SIZE = 16
+    _MAC_SIZE = 32
+
+    def __init__(self, key: bytes) -> None:
+        raw = base64.urlsafe_b64decode(key)
+        if len(raw) != 32:
+            raise ValueError("Fernet key must be 32 url-safe base64-encoded bytes.")
+        self._signing_key = raw[:16]
+        self._encryption_key = raw[16:]
+
+    def encrypt(self, plaintext: bytes) -> bytes:
+        iv = os.urandom(self._IV_SIZE)
+        padder = padding.PKCS7(algorithms.AES.block_size).padder()
+        padded = padder.update(plaintext) + padder.finalize()
+        encryptor = Cipher(
+            algorithms.AES(self._encryption_key), modes.CBC(iv)
+        ).encryptor()
+        body = (
+            self._HEADER.pack(FORMAT_FERNET_LEGACY, int(time.time()))
+            + iv
+            + encryptor.update(padded)
+            + encryptor.finalize()
+        )
+        return body + hmac.digest(self._signing_key, body, "sha256")
+
+    def decrypt(self, token) -> bytes:
+        """
+        Decrypt a raw token (bytes or memoryview).
+        Raises:
+            cryptography.fernet.InvalidToken: Bad MAC, version or padding.
+        """
+        view = memoryview(token)
+        header = self._HEADER.size
+        if (
+            len(view) < header + self._IV_SIZE + self._MAC_SIZE
+            or view[0] != FORMAT_FERNET_LEGACY
+        ):
+            raise InvalidToken
+        body, mac = view[: -self._MAC_SIZE], view[-self._MAC_SIZE :]
+        expected = hmac.digest(self._signing_key, body, "sha256")
+        if not hmac.compare_digest(expected, mac):
+            raise InvalidToken
+        iv = bytes(view[header : header + self._IV_SIZE])
+        decryptor = Cipher(
+            algorithms.AES(self._encryption_key), modes.CBC(iv)
+        ).decryptor()
+        unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
+        try:
+            padded = (
+                decryptor.update(body[header + self._IV_SIZE :]) + decryptor.finalize()
+            )
+            return unpadder.update(padded) + unpadder.finalize()
+        except ValueError:
+            raise InvalidToken
+
+
+def generate_data_key() -> bytes:
+    """Random per-user data key (a Fernet key)."""
+    return Fernet.generate_key()
+
+
+class VaultKey:
+    """
+    Handle on a derived vault key.
+
+    The expensive KDF derivation happens once when the handle is created;
+    encrypt/decrypt can then be called for any number of entries.
+
+    Without a data key the handle reads and writes legacy tokens under the
+    password-derived key. With one (see unwrap) it writes entries under the
+    data key in the format of its cipher and still reads every format.
+    The AEAD formats need the entry's user id and row id on both encrypt and
+    decrypt; the Fernet formats ignore them.
+    """
+
+    __slots__ = (
+        "_key",
+        "_fernet",
+        "_raw",
+        "_data_key",
+        "_data_raw",
+        "_format",
+        "_aeads",
+        "_index_key",
     )
-    return base64.urlsafe_b64encode(kdf.derive(password.encode()))
+
+    def __init__(
+        self, key: bytes, data_key: bytes | None = None, cipher: str = CIPHER_FERNET
+    ) -> None:
+        if cipher not in _CIPHER_FORMATS:
+            raise ValueError(f"Unknown vault cipher: {cipher}")
+        if data_key is None and cipher != CIPHER_FERNET:
+            raise ValueError("AEAD vault ciphers need a data key.")
+        self._key = key
+        self._fernet = Fernet(key)
+        self._raw = _RawFernet(key)
+        self._data_key = data_key
+        self._data_raw = _RawFernet(data_key) if data_key is not None else None
+        self._format = _CIPHER_FORMATS[cipher]
+        self._aeads = {}
+        self._index_key = None
+
+    def _aead(self, fmt: int):
+        # Subkeys are derived on first use; a lost race derives the same key.
+        aead = self._aeads.get(fmt)
+        if aead is None:
+            if self._data_key is None:
+                raise InvalidToken
+            primitive, info = _AEADS[fmt]
+            subkey = HKDF(
+                algorithm=hashes.SHA256(), length=32, salt=None, info=info
+            ).derive(base64.urlsafe_b64decode(self._data_key))
+            aead = self._aeads[fmt] = primitive(subkey)
+        return aead
+
+    def blind_index_key(self) -> bytes:
+        """HMAC key for the user's search tokens (see blind_index)."""
+        if self._index_key is None:
+            if self._data_key is None:
+                raise ValueError("The blind index needs a data key.")
+            self._index_key = HKDF(
+                algorithm=hashes.SHA256(), length=32, salt=None, info=_INDEX_INFO
+            ).derive(base64.urlsafe_b64decode(self._data_key))
+        return self._index_key
+
+    @staticmethod
+    def _associated_data(fmt: int, user_id, entry_id) -> bytes:
+        if user_id is None or entry_id is None:
+            raise ValueError("AEAD vault ciphers need the user id and entry id.")
+        return _ASSOCIATED_DATA.pack(fmt, user_id, entry_id)
+
+    def encrypt(
+        self, data: dict, user_id: int | None = None, entry_id: int | None = None
+    ) -> bytes:
+        """Encrypt a dict to raw ciphertext (see seal)."""
+        return self.seal(json.dumps(data).encode(), user_id, entry_id)
+
+    def seal(
+        self, plaintext: bytes, user_id: int | None = None, entry_id: int | None = None
+    ) -> bytes:
+        """Encrypt serialized entry JSON in this handle's format."""
+        if self._data_raw is None:
+            return self._raw.encrypt(plaintext)
+        fmt = self._format
+        if fmt == FORMAT_FERNET_ENVELOPE:
+            return bytes([fmt]) + self._data_raw.encrypt(plaintext)
+        nonce = os.urandom(_NONCE_SIZE)
+        return (
+            bytes([fmt])
+            + nonce
+            + self._aead(fmt).encrypt(
+                nonce, plaintext, self._associated_data(fmt, user_id, entry_id)
+            )
+        )
+
+    def decrypt(
+        self, token, user_id: int | None = None, entry_id: int | None = None
+    ) -> dict:
+        """
+        Decrypt a ciphertext of any format (bytes or memoryview) to dict.
+        Raises:
+            cryptography.fernet.InvalidToken: Wrong key, wrong user/entry id
+                for an AEAD format, or unknown format.
+        """
+        try:
+            view = memoryview(_as_bytes(token))
+        except ValueError:
+            raise InvalidToken
+        if not view:
+            raise InvalidToken
+        fmt = view[0]
+        if fmt == FORMAT_FERNET_ENVELOPE:
+            if self._data_raw is None:
+                raise InvalidToken
+            plaintext = self._data_raw.decrypt(view[1:])
+        elif fmt in _AEADS:
+            if len(view) < 1 + _NONCE_SIZE:
+                raise InvalidToken
+            try:
+                plaintext = self._aead(fmt).decrypt(
+                    bytes(view[1 : 1 + _NONCE_SIZE]),
+                    view[1 + _NONCE_SIZE :],
+                    self._associated_data(fmt, user_id, entry_id),
+                )
+            except InvalidTag:
+                raise InvalidToken
+        else:
+            plaintext = self._raw.decrypt(view)
+        return json.loads(plaintext)
+
+    def wrap(self, data_key: bytes) -> str:
+        """Encrypt a data key under this (password-derived) key."""
+        return self._fernet.encrypt(data_key).decode()
+
+    def unwrap(self, wrapped_key: str, cipher: str = CIPHER_FERNET) -> "VaultKey":
+        """
+        Return a handle that also holds the data key wrapped in `wrapped_key`
+        and writes entries with `cipher`.
+        Raises:
+            cryptography.fernet.InvalidToken: If this key did not wrap it.
+        """
+        return VaultKey(self._key, self._fernet.decrypt(wrapped_key.encode()), cipher)
+
+    def rewrap(self, new_key: "VaultKey") -> str:
+        """Wrap this handle's data key under `new_key` (password change)."""
+        if self._data_key is None:
+            raise ValueError("Vault key has no data key to rewrap.")
+        return new_key.wrap(self._data_key)
 
 
-def encrypt_entry(data: dict, password: str, salt: bytes) -> str:
-    """Encrypt a dict as a Fernet string using a user password and salt."""
-    import json
+def derive_vault_key(
+    password: str, salt: bytes, kdf: KdfParams | None = None
+) -> VaultKey:
+    """Derive a reusable VaultKey handle from a user password and salt."""
+    return VaultKey(derive_key(password, salt, kdf))
 
-    key = derive_key(password, salt)
-    f = Fernet(key)
-    plaintext = json.dumps(data).encode()
-    return f.encrypt(plaintext).decode()
 
+def encrypt_entry(data: dict, password: str, salt: bytes) -> bytes:
+    """Encrypt a dict to raw ciphertext using a user password and salt."""
+    return derive_vault_key(password, salt).encrypt(data)
 
-def decrypt_entry(token: str, password: str, salt: bytes) -> dict:
-    """Decrypt a Fernet string to dict using a user password and salt."""
-    import json
 
-    key = derive_key(password, salt)
-    f = Fernet(key)
-    plaintext = f.decrypt(token.encode())
-    return json.loads(plaintext.decode())
+def decrypt_entry(token, password: str, salt: bytes) -> dict:
+    """Decrypt raw ciphertext to dict using a user password and salt."""
+    return derive_vault_key(password, salt).decrypt(token)
@@ -0,0 +1,134 @@
+"""
+Session-scoped cache of decrypted vault entries.
+
+Each session that lists its vault with a password keeps the entries it
+decrypted, tagged with the row's `updated_at`. A repeat listing then reads
+only (id, updated_at) and decrypts just the rows that are new or changed.
+VaultService drops entries it updates or deletes; sessions expire after
+their idle TTL. Python can not reliably zero strings, so on eviction the
+plaintext is dropped (every reference cleared) instead.
+"""
+
+import threading
+from typing import Callable, Hashable, Optional
+
+from backend.config import settings
+from backend.utils.cache import TTLCache
+
+
+class SessionEntries:
+    """
+    One session's decrypted entries: entry_id -> (updated_at, ciphertext,
+    decrypted). At most `max_entries` are kept; beyond that, newly decrypted
+    entries are served but not cached.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: dict[int, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, versions: list[dict]) -> tuple[list[dict], list[int]]:
+        """
+        Split (id, updated_at) rows into cached entries and ids to decrypt.
+        Returns:
+            tuple: ({id: entry dict} for current cached rows, [ids to fetch])
+        """
+        hits, misses = {}, []
+        with self._lock:
+            for row in versions:
+                cached = self._entries.get(row["id"])
+                if cached is not None and cached[0] == row["updated_at"]:
+                    hits[row["id"]] = {
+                        "id": row["id"],
+                        "encrypted_entry": cached[1],
+                        "decrypted": cached[2],
+                    }
+                else:
+                    misses.append(row["id"])
+        return hits, misses
+
+    def store(self, updated_at: dict, entries: list[dict]) -> None:
+        """Cache decrypted `entries`, tagged with the versions they were listed at."""
+        with self._lock:
+            for entry in entries:
+                entry_id = entry["id"]
+                if entry["decrypted"] is None or entry_id not in updated_at:
+                    continue
+                if (
+                    entry_id not in self._entries
+                    and len(self._entries) >= self._max_entries
+                ):
+                    continue
+                self._entries[entry_id] = (
+                    updated_at[entry_id],
+                    entry["encrypted_entry"],
+                    entry["decrypted"],
+                )
+
+    def discard(self, entry_id: int) -> None:
+        with self._lock:
+            self._entries.pop(entry_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class DecryptedEntryCache:
+    """Bounded, idle-expiring SessionEntries per (user_id, session_id)."""
+
+    def __init__(
+        self,
+        max_sessions: int = settings.VAULT_ENTRY_CACHE_MAX_SESSIONS,
+        max_entries_per_session: int = settings.VAULT_ENTRY_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = settings.VAULT_ENTRY_CACHE_TTL_SECONDS,
+        clock: Optional[Callable[[], float]] = None,
+    ) -> None:
+        kwargs = {"clock": clock} if clock is not None else {}
+        self._cache = TTLCache(
+            max_sessions,
+            ttl_seconds,
+            on_evict=lambda _, entries: entries.clear(),
+            **kwargs,
+        )
+        self._lock = threading.Lock()
+        self._max_entries = max_entries_per_session
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def stats(self):
+        return self._cache.stats
+
+    def session(self, user_id: int, session_id: Hashable) -> SessionEntries:
+        """The session's entry store, created empty on first use."""
+        key = (user_id, session_id)
+        entries = self._cache.get(key)
+        if entries is None:
+            with self._lock:
+                entries = self._cache.get(key, record=False)
+                if entries is None:
+                    entries = SessionEntries(self._max_entries)
+                    self._cache.set(key, entries)
+        return entries
+
+    def discard(self, user_id: int, entry_id: int) -> None:
+        """Drop an updated or deleted entry from every session of the user."""
+        for entries in self._cache.values_where(lambda k: k[0] == user_id):
+            entries.discard(entry_id)
+
+    def invalidate_session(self, user_id: int, session_id: Hashable) -> int:
+        return self._cache.discard_where(
+            lambda k: k[0] == user_id and k[1] == session_id
+        )
+
+    def invalidate_user(self, user_id: int) -> int:
+        return self._cache.discard_where(lambda k: k[0] == user_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
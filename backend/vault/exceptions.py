@@ -0,0 +1,10 @@
+class InvalidVaultPasswordError(Exception):
+    """Raised when a vault password does not unlock the user's data key."""
+
+    pass
+
+
+class ClientSideVaultError(Exception):
+    """Raised when the server is asked to unlock a client-side vault."""
+
+    pass
@@ -1,36 +1,117 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Callable, Iterator
 
 
 class IVaultRepository(ABC):
     """Interface for VaultRepository."""
 
     @abstractmethod
-    def list_entries(self, user_id: int) -> list[dict]:
+    def list_entries(
+        self,
+        user_id: int,
+        after_id: int | None = None,
+        limit: int | None = None,
+        metadata_only: bool = False,
+    ) -> list[dict]:
+        pass
+
+    @abstractmethod
+    def iter_entries(self, user_id: int, batch_size: int = 500) -> Iterator[dict]:
         pass
 
     @abstractmethod
     def add_entry(self, user_id: int, data: dict) -> dict | None:
         pass
 
+    @abstractmethod
+    def add_sealed_entries(
+        self,
+        user_id: int,
+        count: int,
+        seal: Callable[[list[int]], list[bytes]],
+        search_tokens: list[list[bytes]] | None = None,
+    ) -> list[int]:
+        pass
+
     @abstractmethod
     def get_entry(self, user_id: int, entry_id: int) -> dict | None:
         pass
 
     @abstractmethod
-    def update_entry(self, user_id: int, entry_id: int, data: dict) -> dict | None:
+    def update_entry(
+        self,
+        user_id: int,
+        entry_id: int,
+        data: dict,
+        expected_version: int | None = None,
+    ) -> dict | None:
         pass
 
     @abstractmethod
     def delete_entry(self, user_id: int, entry_id: int) -> None:
         pass
 
+    @abstractmethod
+    def batch(self, user_id: int, operations: list[tuple]) -> list:
+        pass
+
+    @abstractmethod
+    def get_vault_version(self, user_id: int) -> int:
+        pass
+
+    @abstractmethod
+    def get_entry_version(self, user_id: int, entry_id: int) -> int | None:
+        pass
+
+    @abstractmethod
+    def list_changes(
+        self, user_id: int, since: int = 0, limit: int | None = None
+    ) -> list[dict]:
+        pass
+
+    @abstractmethod
+    def search_entry_ids(
+        self, user_id: int, tokens: list[bytes], limit: int | None = None
+    ) -> list[int]:
+        pass
+
+    @abstractmethod
+    def get_entries(self, user_id: int, entry_ids: list[int]) -> list[dict]:
+        pass
+
+    @abstractmethod
+    def list_unindexed_entries(self, user_id: int, limit: int) -> list[dict]:
+        pass
+
+    @abstractmethod
+    def set_search_tokens(self, user_id: int, indexed: list[tuple]) -> int:
+        pass
+
+
+class IAsyncVaultRepository(ABC):
+    """
+    Awaitable vault reads for code running on an event loop (backend/asgi.py).
+    Only what the ASGI server itself needs; views use IVaultRepository.
+    """
+
+    @abstractmethod
+    async def get_vault_version(self, user_id: int) -> int:
+        pass
+
 
 class IVaultService(ABC):
     """Interface for VaultService."""
 
     @abstractmethod
-    def list_entries(self, user_id: int) -> list[dict]:
+    def list_entries(
+        self,
+        user_id: int,
+        password: str | None = None,
+        session_id: Any = None,
+        after_id: int | None = None,
+        limit: int | None = None,
+        metadata_only: bool = False,
+    ) -> list[dict]:
         pass
 
     @abstractmethod
@@ -48,3 +129,13 @@ class IVaultService(ABC):
     @abstractmethod
     def delete_entry(self, user_id: int, entry_id: int) -> None:
         pass
+
+    @abstractmethod
+    def change_password(
+        self,
+        user_id: int,
+        old_password: str,
+        new_password: str,
+        session_id: Any = None,
+    ) -> None:
+        pass
@@ -0,0 +1,92 @@
+"""
+In-process cache of derived vault keys for authenticated sessions.
+
+Entries are keyed by (user_id, salt, session_id, password fingerprint, KDF,
+wrapped data key) and live in memory only. The fingerprint is an HMAC of the
+password under a random per-process secret, so a wrong password never hits
+another password's key and nothing derived from the password survives a
+restart.
+"""
+
+import hashlib
+import hmac
+import os
+from typing import Callable, Hashable, Optional
+
+from backend.config import settings
+from backend.utils.cache import TTLCache
+from backend.vault.crypto_utils import VaultKey
+
+
+class DerivedKeyCache:
+    """Bounded LRU + idle-TTL cache of VaultKey handles."""
+
+    def __init__(
+        self,
+        max_entries: int = settings.KEY_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = settings.KEY_CACHE_TTL_SECONDS,
+        clock: Optional[Callable[[], float]] = None,
+    ) -> None:
+        kwargs = {"clock": clock} if clock is not None else {}
+        self._cache = TTLCache(max_entries, ttl_seconds, **kwargs)
+        self._secret = os.urandom(32)
+
+    @property
+    def stats(self):
+        return self._cache.stats
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _cache_key(
+        self,
+        user_id: int,
+        salt: bytes,
+        session_id: Hashable,
+        password: str,
+        kdf: Hashable = None,
+        wrapped_key: Hashable = None,
+    ) -> tuple:
+        fingerprint = hmac.new(
+            self._secret, password.encode(), hashlib.sha256
+        ).digest()
+        return (user_id, bytes(salt), session_id, fingerprint, kdf, wrapped_key)
+
+    def get_or_derive(
+        self,
+        user_id: int,
+        salt: bytes,
+        session_id: Hashable,
+        password: str,
+        derive: Callable[[str, bytes], VaultKey],
+        kdf: Hashable = None,
+        wrapped_key: Hashable = None,
+    ) -> VaultKey:
+        """
+        Return the cached key for this session, deriving it on a miss.
+        `kdf` (e.g. KdfParams) and `wrapped_key` (the stored wrapped data key)
+        are part of the cache key: once any worker process moves the vault to
+        another KDF or rewraps its key under a new password, keys unlocked
+        with the old password stop being served.
+        """
+        cache_key = self._cache_key(
+            user_id, salt, session_id, password, kdf, wrapped_key
+        )
+        key = self._cache.get(cache_key)
+        if key is None:
+            key = derive(password, salt)
+            self._cache.set(cache_key, key)
+        return key
+
+    def invalidate_session(self, user_id: int, session_id: Hashable) -> int:
+        """Drop every key cached for one session (e.g. on logout)."""
+        return self._cache.discard_where(
+            lambda k: k[0] == user_id and k[2] == session_id
+        )
+
+    def invalidate_user(self, user_id: int) -> int:
+        """Drop every key cached for a user (e.g. on password change)."""
+        return self._cache.discard_where(lambda k: k[0] == user_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
@@ -1,54 +1,437 @@
 """
 VaultRepository: DB access for vault entries.
+encrypted_entry is read and written as raw ciphertext bytes (a BLOB), which
+goes to the cipher as is; base64 is left to the API layer.
+
+Writes that carry "search_tokens" replace the entry's blind index tokens in
+the same transaction and mark it indexed; writes without them drop its
+tokens and mark it unindexed until the service indexes it again.
+
+Every insert, update and delete stamps the row with the next value of the
+user's change counter (change_seq) for delta sync. Values stay above every
+row id (sqlite_sequence), the numbers migration 10 gives rows written before
+change tracking, so writes during that backfill are never numbered below it.
+Deletes keep the row as a tombstone (deleted = 1, ciphertext cleared), which
+all other reads skip.
 """
 
-from backend.vault.interfaces import IVaultRepository
+from contextlib import contextmanager
+
+from backend.utils.executors import BlockingExecutor
+from backend.vault.interfaces import IAsyncVaultRepository, IVaultRepository
+
+# updated_at to the millisecond: with (id, updated_at) as an entry's version,
+# second resolution would hide a second write within the same second.
+_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+# The user's next change_seq, above both the user's last one and the highest
+# row id ever assigned. Statements run under SQLite's write lock, so values are
+# unique per user and commit in increasing order.
+_NEXT_SEQ = (
+    "(SELECT MAX(COALESCE(MAX(change_seq), 0), "
+    "COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'vault'), 0)) + 1 "
+    "FROM vault WHERE user_id = ?1)"
+)
+
+INSERT_ENTRY_SQL = (
+    "INSERT INTO vault (user_id, encrypted_entry, change_seq) "
+    f"VALUES (?1, ?2, {_NEXT_SEQ})"
+)
+
+# Ids an AUTOINCREMENT insert would assign next; only stable under the
+# write lock (see _reserve_entry_ids).
+NEXT_ENTRY_ID_SQL = (
+    "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'vault'), 0), "
+    "COALESCE((SELECT MAX(id) FROM vault), 0)) + 1"
+)
+
+INSERT_SEALED_ENTRY_SQL = (
+    "INSERT INTO vault (id, user_id, encrypted_entry, change_seq) "
+    f"VALUES (?3, ?1, ?2, {_NEXT_SEQ})"
+)
+
+UPDATE_ENTRY_SQL = (
+    f"UPDATE vault SET encrypted_entry = ?2, updated_at = {_NOW}, "
+    f"change_seq = {_NEXT_SEQ} WHERE user_id = ?1 AND id = ?3 AND deleted = 0"
+)
+
+DELETE_ENTRY_SQL = (
+    f"UPDATE vault SET deleted = 1, encrypted_entry = x'', updated_at = {_NOW}, "
+    f"change_seq = {_NEXT_SEQ} WHERE user_id = ?1 AND id = ?2 AND deleted = 0"
+)
 
 
 class VaultRepository(IVaultRepository):
     def __init__(self, db):
         """
         Args:
-            db: Database connection (must be provided, no fallback).
+            db: Database connection (must be provided, no fallback). Either a
+                sqlite3.Connection used directly, or an IDatabaseConnection
+                (e.g. SQLiteConnectionPool) a connection is checked out from
+                for each operation.
         """
         self.db = db
 
-    def list_entries(self, user_id):
-        cur = self.db.execute(
-            "SELECT id, encrypted_entry FROM vault WHERE user_id = ?", (user_id,)
-        )
-        return [dict(row) for row in cur.fetchall()]
+    @contextmanager
+    def _connection(self):
+        if not hasattr(self.db, "get_connection"):
+            yield self.db
+            return
+        conn = self.db.get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
 
-    def add_entry(self, user_id, data):
-        # data['encrypted_entry'] should be a string (already encrypted JSON)
-        cur = self.db.execute(
-            "INSERT INTO vault (user_id, encrypted_entry) VALUES (?, ?)",
-            (user_id, data["encrypted_entry"]),
+    @staticmethod
+    def _write_search_tokens(conn, user_id, entry_id, tokens):
+        conn.execute("DELETE FROM vault_search_tokens WHERE entry_id = ?", (entry_id,))
+        if tokens is not None:
+            conn.executemany(
+                "INSERT OR IGNORE INTO vault_search_tokens (user_id, token, entry_id) "
+                "VALUES (?, ?, ?)",
+                ((user_id, token, entry_id) for token in tokens),
+            )
+        conn.execute(
+            "UPDATE vault SET search_indexed = ? WHERE id = ?",
+            (int(tokens is not None), entry_id),
         )
-        self.db.commit()
-        entry_id = cur.lastrowid
-        return self.get_entry(user_id, entry_id)
 
-    def get_entry(self, user_id, entry_id):
-        cur = self.db.execute(
-            "SELECT id, encrypted_entry FROM vault WHERE user_id = ? AND id = ?",
+    @staticmethod
+    def _fetch_entry(conn, user_id, entry_id):
+        cur = conn.execute(
+            "SELECT id, encrypted_entry FROM vault "
+            "WHERE user_id = ? AND id = ? AND deleted = 0",
             (user_id, entry_id),
         )
         row = cur.fetchone()
         return dict(row) if row else None
 
-    def update_entry(self, user_id, entry_id, data):
-        # data['encrypted_entry'] should be a string (already encrypted JSON)
-        self.db.execute(
-            "UPDATE vault SET encrypted_entry = ?, updated_at = CURRENT_TIMESTAMP WHERE user_id = ? AND id = ?",
-            (data["encrypted_entry"], user_id, entry_id),
+    def list_entries(self, user_id, after_id=None, limit=None, metadata_only=False):
+        """
+        List a user's entries in id order using keyset pagination.
+        Args:
+            after_id (int | None): Only return entries with id > after_id.
+            limit (int | None): Maximum number of entries; None for all.
+            metadata_only (bool): Return id/created_at/updated_at without ciphertext.
+        """
+        columns = (
+            "id, created_at, updated_at" if metadata_only else "id, encrypted_entry"
         )
-        self.db.commit()
-        return self.get_entry(user_id, entry_id)
+        with self._connection() as conn:
+            cur = conn.execute(
+                f"SELECT {columns} FROM vault WHERE user_id = ? AND id > ? "
+                "AND deleted = 0 ORDER BY id LIMIT ?",
+                (user_id, after_id or 0, -1 if limit is None else limit),
+            )
+            return [dict(row) for row in cur.fetchall()]
+
+    def iter_entries(self, user_id, batch_size=500):
+        """
+        Yield a user's entries (id, encrypted_entry) in id order.
+        Rows are pulled from one server-side cursor `batch_size` at a time, so
+        memory use does not depend on the vault size. The connection stays
+        checked out until the generator is exhausted or closed.
+        """
+        with self._connection() as conn:
+            cur = conn.execute(
+                "SELECT id, encrypted_entry FROM vault "
+                "WHERE user_id = ? AND deleted = 0 ORDER BY id",
+                (user_id,),
+            )
+            try:
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        return
+                    for row in rows:
+                        yield dict(row)
+            finally:
+                cur.close()
+
+    def add_entry(self, user_id, data):
+        # data['encrypted_entry'] should be raw ciphertext bytes (encrypted JSON)
+        with self._connection() as conn:
+            cur = conn.execute(INSERT_ENTRY_SQL, (user_id, data["encrypted_entry"]))
+            entry_id = cur.lastrowid
+            if data.get("search_tokens") is not None:
+                self._write_search_tokens(
+                    conn, user_id, entry_id, data["search_tokens"]
+                )
+            conn.commit()
+            return self._fetch_entry(conn, user_id, entry_id)
+
+    def add_sealed_entries(self, user_id, count, seal, search_tokens=None):
+        """
+        Insert entries whose ciphertext is bound to their own row id.
+        The next `count` ids are reserved first, in a short write transaction
+        that advances the AUTOINCREMENT counter past them. `seal(ids)` then
+        returns their ciphertexts with no lock or connection held, and all
+        rows go in with one executemany. Ids of a call that fails are
+        skipped, never reused.
+        Args:
+            count (int): Number of entries to insert.
+            seal: Callable taking the new ids and returning list[bytes].
+            search_tokens (list[list[bytes]] | None): Blind index tokens per entry.
+        Returns:
+            list[int]: The new entry ids, in insertion order.
+        """
+        with self._connection() as conn:
+            ids = self._reserve_entry_ids(conn, count)
+        sealed = seal(ids)
+        with self._connection() as conn:
+            try:
+                conn.executemany(
+                    INSERT_SEALED_ENTRY_SQL,
+                    (
+                        (user_id, token, entry_id)
+                        for entry_id, token in zip(ids, sealed)
+                    ),
+                )
+                for entry_id, tokens in zip(ids, search_tokens or ()):
+                    self._write_search_tokens(conn, user_id, entry_id, tokens)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return ids
+
+    @staticmethod
+    def _reserve_entry_ids(conn, count):
+        # Inserts without an explicit id continue after sqlite_sequence, so
+        # once it is advanced no other writer can take the reserved ids.
+        try:
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            (first,) = conn.execute(NEXT_ENTRY_ID_SQL).fetchone()
+            last = first + count - 1
+            cur = conn.execute(
+                "UPDATE sqlite_sequence SET seq = ? WHERE name = 'vault'", (last,)
+            )
+            if not cur.rowcount:
+                conn.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) VALUES ('vault', ?)",
+                    (last,),
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return list(range(first, last + 1))
+
+    def get_entry(self, user_id, entry_id):
+        with self._connection() as conn:
+            return self._fetch_entry(conn, user_id, entry_id)
+
+    def update_entry(self, user_id, entry_id, data, expected_version=None):
+        """
+        Replace an entry's ciphertext; data['encrypted_entry'] is raw ciphertext
+        bytes (encrypted JSON). With `expected_version`, only update while the
+        entry's change_seq still equals it (optimistic concurrency).
+        Returns:
+            dict | None: The updated entry, or None if not found or changed.
+        """
+        sql, params = UPDATE_ENTRY_SQL, (user_id, data["encrypted_entry"], entry_id)
+        if expected_version is not None:
+            sql, params = f"{sql} AND change_seq = ?4", (*params, expected_version)
+        with self._connection() as conn:
+            cur = conn.execute(sql, params)
+            if cur.rowcount:
+                self._write_search_tokens(
+                    conn, user_id, entry_id, data.get("search_tokens")
+                )
+            conn.commit()
+            if not cur.rowcount:
+                return None
+            return self._fetch_entry(conn, user_id, entry_id)
+
+    def batch(self, user_id, operations):
+        """
+        Run get/update/delete operations on one connection in one transaction.
+        Args:
+            operations (list[tuple]): ("get", entry_id, None),
+                ("update", entry_id, encrypted_entry[, search_tokens]) or
+                ("delete", entry_id, None).
+        Returns:
+            list: Per operation, the entry dict (or None if not found) for get
+                and update, and True/False for delete.
+        Raises:
+            ValueError: For an unknown operation; nothing is committed.
+        """
+        results = []
+        with self._connection() as conn:
+            try:
+                for op, entry_id, encrypted_entry, *search_tokens in operations:
+                    if op == "get":
+                        results.append(self._fetch_entry(conn, user_id, entry_id))
+                    elif op == "update":
+                        cur = conn.execute(
+                            UPDATE_ENTRY_SQL, (user_id, encrypted_entry, entry_id)
+                        )
+                        if cur.rowcount:
+                            self._write_search_tokens(
+                                conn, user_id, entry_id, (search_tokens or [None])[0]
+                            )
+                        results.append(
+                            self._fetch_entry(conn, user_id, entry_id)
+                            if cur.rowcount
+                            else None
+                        )
+                    elif op == "delete":
+                        cur = conn.execute(DELETE_ENTRY_SQL, (user_id, entry_id))
+                        if cur.rowcount:
+                            self._write_search_tokens(conn, user_id, entry_id, None)
+                        results.append(cur.rowcount > 0)
+                    else:
+                        raise ValueError(f"Unknown batch operation: {op}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return results
 
     def delete_entry(self, user_id, entry_id):
-        cur = self.db.execute(
-            "DELETE FROM vault WHERE user_id = ? AND id = ?", (user_id, entry_id)
-        )
-        self.db.commit()
-        return cur.rowcount > 0
+        with self._connection() as conn:
+            cur = conn.execute(DELETE_ENTRY_SQL, (user_id, entry_id))
+            if cur.rowcount:
+                self._write_search_tokens(conn, user_id, entry_id, None)
+            conn.commit()
+            return cur.rowcount > 0
+
+    def list_changes(self, user_id, since=0, limit=None):
+        """
+        A user's entries changed after change counter value `since`, in change
+        order: one range seek on (user_id, change_seq), whatever the vault size.
+        A full sync (since=0) first numbers the user's rows that migration 10
+        has not reached yet, so the sync token it returns covers them.
+        Returns:
+            list[dict]: id, encrypted_entry, change_seq and deleted per row;
+                deleted rows are tombstones without ciphertext.
+        """
+        with self._connection() as conn:
+            if not since:
+                self._number_unstamped(conn, user_id)
+            cur = conn.execute(
+                "SELECT id, encrypted_entry, change_seq, deleted FROM vault "
+                "WHERE user_id = ? AND change_seq > ? ORDER BY change_seq LIMIT ?",
+                (user_id, since, -1 if limit is None else limit),
+            )
+            return [dict(row) for row in cur.fetchall()]
+
+    @staticmethod
+    def _number_unstamped(conn, user_id):
+        # Same numbering as migration 10 (change_seq = id, below every live
+        # write); one probe on (user_id, change_seq) once all rows have one.
+        if conn.execute(
+            "SELECT 1 FROM vault WHERE user_id = ? AND change_seq = 0 LIMIT 1",
+            (user_id,),
+        ).fetchone():
+            conn.execute(
+                "UPDATE vault SET change_seq = id WHERE user_id = ? AND change_seq = 0",
+                (user_id,),
+            )
+            conn.commit()
+
+    def get_vault_version(self, user_id):
+        """The user's change counter: changes whenever any entry is written."""
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT COALESCE(MAX(change_seq), 0) FROM vault WHERE user_id = ?",
+                (user_id,),
+            ).fetchone()
+            return row[0]
+
+    def get_entry_version(self, user_id, entry_id):
+        """An entry's change_seq, or None if it does not exist (or was deleted)."""
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT change_seq FROM vault "
+                "WHERE user_id = ? AND id = ? AND deleted = 0",
+                (user_id, entry_id),
+            ).fetchone()
+            return row[0] if row else None
+
+    def search_entry_ids(self, user_id, tokens, limit=None):
+        """
+        Ids of a user's entries holding any of the blind index `tokens`.
+        Seeks the (user_id, token) primary key once per token.
+        """
+        if not tokens:
+            return []
+        placeholders = ",".join("?" * len(tokens))
+        with self._connection() as conn:
+            cur = conn.execute(
+                "SELECT DISTINCT entry_id FROM vault_search_tokens "
+                f"WHERE user_id = ? AND token IN ({placeholders}) "
+                "ORDER BY entry_id LIMIT ?",
+                (user_id, *tokens, -1 if limit is None else limit),
+            )
+            return [row[0] for row in cur.fetchall()]
+
+    def get_entries(self, user_id, entry_ids):
+        """Fetch several entries (id, encrypted_entry) by id, in id order."""
+        if not entry_ids:
+            return []
+        placeholders = ",".join("?" * len(entry_ids))
+        with self._connection() as conn:
+            cur = conn.execute(
+                "SELECT id, encrypted_entry FROM vault "
+                f"WHERE user_id = ? AND id IN ({placeholders}) AND deleted = 0 "
+                "ORDER BY id",
+                (user_id, *entry_ids),
+            )
+            return [dict(row) for row in cur.fetchall()]
+
+    def list_unindexed_entries(self, user_id, limit):
+        """Up to `limit` entries (id, encrypted_entry) without current search tokens."""
+        with self._connection() as conn:
+            cur = conn.execute(
+                "SELECT id, encrypted_entry FROM vault "
+                "WHERE user_id = ? AND search_indexed = 0 AND deleted = 0 "
+                "ORDER BY id LIMIT ?",
+                (user_id, limit),
+            )
+            return [dict(row) for row in cur.fetchall()]
+
+    def set_search_tokens(self, user_id, indexed):
+        """
+        Store search tokens computed from entries read earlier, in one transaction.
+        Args:
+            indexed (list[tuple]): (entry_id, encrypted_entry, tokens). An entry
+                whose ciphertext changed since it was read is skipped; its new
+                writer already set or dropped its tokens.
+        Returns:
+            int: Number of entries indexed.
+        """
+        done = 0
+        with self._connection() as conn:
+            try:
+                for entry_id, encrypted_entry, tokens in indexed:
+                    cur = conn.execute(
+                        "SELECT 1 FROM vault "
+                        "WHERE user_id = ? AND id = ? AND encrypted_entry = ?",
+                        (user_id, entry_id, encrypted_entry),
+                    )
+                    if cur.fetchone():
+                        self._write_search_tokens(conn, user_id, entry_id, tokens)
+                        done += 1
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return done
+
+
+class AsyncVaultRepository(IAsyncVaultRepository):
+    """
+    IAsyncVaultRepository over a synchronous repository: every call runs on
+    a bounded executor, so awaiting one never blocks the event loop (SQLite
+    has no async driver).
+    """
+
+    def __init__(self, repo: IVaultRepository, executor: BlockingExecutor) -> None:
+        self._repo = repo
+        self._executor = executor
+
+    async def get_vault_version(self, user_id):
+        return await self._executor.run(self._repo.get_vault_version, user_id)
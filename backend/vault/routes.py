@@ -2,29 +2,611 @@
 Vault API routes: CRUD for password entries. JWT-protected.
 """
 
-from flask import Blueprint, request, jsonify, current_app
+import base64
+import json
+from dataclasses import asdict
+
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from backend.auth.session import current_session_id, record_identity
+from backend.config import settings
+from backend.vault import blind_index
+from backend.vault.crypto_utils import decode_ciphertext, encode_ciphertext
+from backend.vault.exceptions import ClientSideVaultError, InvalidVaultPasswordError
+from backend.vault.session_index import MODE_FUZZY
 
 
 vault_bp = Blueprint("vault", __name__, url_prefix="/api/vault")
 
 
+@vault_bp.errorhandler(InvalidVaultPasswordError)
+def invalid_vault_password(e):
+    # Writes (and key changes) must not proceed under a key the password
+    # does not unlock; reads degrade to decrypted=None instead.
+    return jsonify({"error": str(e)}), 403
+
+
+@vault_bp.after_request
+def record_vault_user(response):
+    # Lets the ASGI server wake this user's parked change long-polls after a
+    # write, and park a long-poll that found nothing new.
+    if response.status_code < 400:
+        record_identity(current_app.config["AUTH_PROVIDER"])
+    return response
+
+
+@vault_bp.errorhandler(ClientSideVaultError)
+def client_side_vault(e):
+    return jsonify({"error": str(e)}), 409
+
+
+def _parse_page_args(args):
+    """
+    Parse keyset pagination query args.
+    Returns:
+        tuple: (after_id, limit) or raises ValueError with a client-facing message.
+    """
+    after_id = args.get("after_id")
+    limit = args.get("limit")
+    try:
+        after_id = int(after_id) if after_id is not None else None
+        limit = int(limit) if limit is not None else None
+    except ValueError:
+        raise ValueError("after_id and limit must be integers.")
+    if after_id is not None and after_id < 0:
+        raise ValueError("after_id must not be negative.")
+    if limit is not None and not 1 <= limit <= settings.VAULT_PAGE_MAX_LIMIT:
+        raise ValueError(
+            f"limit must be between 1 and {settings.VAULT_PAGE_MAX_LIMIT}."
+        )
+    return after_id, limit
+
+
+def _wants_ciphertext(password):
+    """
+    Whether entries in the response carry their ciphertext. Clients ask with
+    ciphertext=true/false; without the arg only password-less requests get
+    it, as the ciphertext is then all there is to return.
+    """
+    flag = request.args.get("ciphertext")
+    if flag is None:
+        return not password
+    return flag == "true"
+
+
+PASSWORD_HEADER = "X-Vault-Password"
+
+
+def _vault_password():
+    """
+    The vault password of a read request, from the X-Vault-Password header.
+    The `password` query arg is still accepted but deprecated: it puts the
+    password in URLs, and from there in proxy and access logs.
+    """
+    return request.headers.get(PASSWORD_HEADER) or request.args.get("password")
+
+
+def _unlock_tag(vault_service, user_id, password, session_id):
+    """
+    ETag suffix for the outcome of the vault password: none sent, decrypted
+    (".d") or a wrong one (".n", every entry left undecrypted). Checked
+    before any conditional response, so a client-side vault answers 409
+    (ClientSideVaultError) rather than 304.
+    """
+    if not password:
+        return ""
+    return ".d" if vault_service.unlocks(user_id, password, session_id) else ".n"
+
+
+def _vault_etag(user_id, version, unlock_tag=""):
+    # Query args (paging, ciphertext) are part of the URL, so one tag per
+    # user, vault version and password outcome identifies each listing's body.
+    return f"v{user_id}.{version}{unlock_tag}"
+
+
+def _entry_etag(entry_id, version, unlock_tag=""):
+    return f"e{entry_id}.{version}{unlock_tag}"
+
+
+def _with_etag(response, etag):
+    response.set_etag(etag)
+    # Bodies can hold decrypted secrets: never shared caches, always revalidate.
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add(PASSWORD_HEADER)
+    return response
+
+
+def _not_modified(etag):
+    return _with_etag(current_app.response_class(status=304), etag)
+
+
+def _precondition_failed():
+    return jsonify({"error": "Entry was modified; reload it and retry."}), 412
+
+
+def _raw_entry(data):
+    """
+    Already-encrypted entry of a password-less write (client-side vaults):
+    {"encrypted_entry": <base64>} decoded to raw bytes for the service.
+    Returns:
+        dict | None: None if the body carries no ciphertext.
+    Raises:
+        ValueError: If the ciphertext is not base64 (client-facing message).
+    """
+    token = data.get("encrypted_entry")
+    if not isinstance(token, str):
+        return None
+    return {"encrypted_entry": decode_ciphertext(token)}
+
+
+def _redacted(data):
+    # Debug output must not carry the vault password or entry secrets.
+    if not isinstance(data, dict):
+        return data
+    return {k: "***" if k in ("password", "entry") else v for k, v in data.items()}
+
+
+def _entry_json(entry, include_ciphertext):
+    """Drop the raw ciphertext of an entry, or base64-encode it for JSON."""
+    token = entry.pop("encrypted_entry", None)
+    if include_ciphertext and token is not None:
+        entry["encrypted_entry"] = encode_ciphertext(token)
+    return entry
+
+
 @vault_bp.route("/", methods=["GET"])
 def list_entries():
+    """
+    List vault entries.
+    Query args:
+        ciphertext: "true" to include base64 `encrypted_entry` alongside
+            `decrypted` (the default only without a password).
+        after_id, limit: Keyset pagination; pass the previous `next_cursor` as after_id.
+        fields: "metadata" to return only id/created_at/updated_at (never decrypts).
+    Headers:
+        X-Vault-Password: Decrypt entries with this vault password (the
+            `password` query arg also works but is deprecated). Client-side
+            vaults send none and decrypt `encrypted_entry` themselves.
+        If-None-Match: ETag of a previous response; answered with 304 while
+            the vault is unchanged and the password has the same outcome,
+            after the session's key lookup but before any decryption.
+    Returns:
+        200: {"entries": [...], "next_cursor": int | null}, with an ETag
+        304: Not modified
+        400: Invalid pagination arguments
+        409: A password was sent for a client-side vault
+    """
     auth = current_app.config["AUTH_PROVIDER"]
     vault_service = current_app.config["VAULT_SERVICE"]
 
     @auth.require_auth
     def inner():
         user_id = auth.get_identity()
-        password = request.args.get("password")
-        entries = vault_service.list_entries(user_id, password=password)
+        password = _vault_password()
+        try:
+            after_id, limit = _parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        session_id = current_session_id(auth)
+        etag = _vault_etag(
+            user_id,
+            vault_service.vault_version(user_id),
+            _unlock_tag(vault_service, user_id, password, session_id),
+        )
+        if request.if_none_match.contains_weak(etag):
+            return _not_modified(etag)
+        metadata_only = request.args.get("fields") == "metadata"
+        entries = vault_service.list_entries(
+            user_id,
+            password=password,
+            session_id=session_id,
+            after_id=after_id,
+            limit=limit,
+            metadata_only=metadata_only,
+        )
+        # A full page means there may be more; the client resumes after the last id.
+        next_cursor = None
+        if limit is not None and len(entries) == limit:
+            next_cursor = entries[-1]["id"]
+        include_ciphertext = _wants_ciphertext(password)
+        entries = [_entry_json(entry, include_ciphertext) for entry in entries]
+        response = jsonify({"entries": entries, "next_cursor": next_cursor})
+        return _with_etag(response, etag), 200
+
+    return inner()
+
+
+@vault_bp.route("/changes", methods=["GET"])
+def list_changes():
+    """
+    Delta sync: entries created, updated or deleted since a sync token.
+    Query args:
+        since: sync_token from the previous response; 0 or absent for everything.
+        ciphertext: As for GET /api/vault/.
+        limit: Maximum changed entries (default and cap: VAULT_SYNC_MAX_CHANGES).
+        wait: Seconds to hold the request while nothing changed (long-poll;
+            only when served over ASGI, see backend/asgi.py).
+    Returns:
+        200: {"entries": [...], "deleted": [ids], "sync_token": int,
+              "has_more": bool}; with has_more, call again with the new token
+        400: Invalid since or limit
+    """
+    auth = current_app.config["AUTH_PROVIDER"]
+    vault_service = current_app.config["VAULT_SERVICE"]
+
+    @auth.require_auth
+    def inner():
+        user_id = auth.get_identity()
+        password = _vault_password()
+        try:
+            since = int(request.args.get("since", 0))
+            limit = int(request.args.get("limit", settings.VAULT_SYNC_MAX_CHANGES))
+        except ValueError:
+            return jsonify({"error": "since and limit must be integers."}), 400
+        if since < 0:
+            return jsonify({"error": "since must not be negative."}), 400
+        if not 1 <= limit <= settings.VAULT_SYNC_MAX_CHANGES:
+            return (
+                jsonify(
+                    {
+                        "error": "limit must be between 1 and "
+                        f"{settings.VAULT_SYNC_MAX_CHANGES}."
+                    }
+                ),
+                400,
+            )
+        changes = vault_service.changes(
+            user_id,
+            since,
+            password=password,
+            session_id=current_session_id(auth),
+            limit=limit,
+        )
+        include_ciphertext = _wants_ciphertext(password)
+        changes["entries"] = [
+            _entry_json(entry, include_ciphertext) for entry in changes["entries"]
+        ]
+        return jsonify(changes), 200
+
+    return inner()
+
+
+@vault_bp.route("/search", methods=["GET"])
+def search_entries():
+    """
+    Search entries by service, username or url without decrypting the vault.
+    Query args:
+        q: Search text (case-insensitive; urls ignore scheme and "www.").
+        field: "service", "username" or "url"; all three by default.
+        mode: "prefix" (default) or "exact" through the blind index, or
+            "fuzzy" for substring and typo-tolerant matches on every field
+            but the password, from the session's in-memory index (no field).
+        limit: Maximum results (default and cap: VAULT_SEARCH_MAX_RESULTS).
+        ciphertext: As for GET /api/vault/.
+    Headers:
+        X-Vault-Password: Vault password (needed to compute the search tokens).
+    Returns:
+        200: {"entries": [...]} with `decrypted` set on each match
+        400: Missing or invalid arguments
+        403: Wrong vault password
+        409: Client-side vault (search happens in the browser)
+    """
+    auth = current_app.config["AUTH_PROVIDER"]
+    vault_service = current_app.config["VAULT_SERVICE"]
+
+    @auth.require_auth
+    def inner():
+        user_id = auth.get_identity()
+        query = request.args.get("q", "")
+        password = _vault_password()
+        field = request.args.get("field")
+        mode = request.args.get("mode", blind_index.MODE_PREFIX)
+        if not query.strip() or not password:
+            return jsonify({"error": "q and password are required."}), 400
+        if field is not None and field not in blind_index.SEARCH_FIELDS:
+            fields = ", ".join(blind_index.SEARCH_FIELDS)
+            return jsonify({"error": f"field must be one of: {fields}."}), 400
+        modes = (blind_index.MODE_EXACT, blind_index.MODE_PREFIX, MODE_FUZZY)
+        if mode not in modes:
+            return jsonify({"error": "mode must be exact, prefix or fuzzy."}), 400
+        if mode == MODE_FUZZY and field is not None:
+            return jsonify({"error": "field is not supported with mode=fuzzy."}), 400
+        try:
+            limit = int(request.args.get("limit", settings.VAULT_SEARCH_MAX_RESULTS))
+        except ValueError:
+            return jsonify({"error": "limit must be an integer."}), 400
+        if not 1 <= limit <= settings.VAULT_SEARCH_MAX_RESULTS:
+            return (
+                jsonify(
+                    {
+                        "error": "limit must be between 1 and "
+                        f"{settings.VAULT_SEARCH_MAX_RESULTS}."
+                    }
+                ),
+                400,
+            )
+        if mode == MODE_FUZZY:
+            entries = vault_service.fuzzy_search(
+                user_id,
+                password,
+                query,
+                session_id=current_session_id(auth),
+                limit=limit,
+            )
+        else:
+            entries = vault_service.search(
+                user_id,
+                password,
+                query,
+                field=field,
+                mode=mode,
+                session_id=current_session_id(auth),
+                limit=limit,
+            )
+        include_ciphertext = _wants_ciphertext(password)
+        entries = [_entry_json(entry, include_ciphertext) for entry in entries]
         return jsonify({"entries": entries}), 200
 
     return inner()
 
 
+@vault_bp.route("/export", methods=["GET"])
+def export_entries():
+    """
+    Stream the user's vault as newline-delimited JSON (one entry per line).
+    Query args:
+        ciphertext: As for GET /api/vault/.
+    Headers:
+        X-Vault-Password: Decrypt entries with this vault password (key
+            derived once); without it, entries pass through encrypted.
+    Returns:
+        200: application/x-ndjson body
+    """
+    auth = current_app.config["AUTH_PROVIDER"]
+    vault_service = current_app.config["VAULT_SERVICE"]
+
+    @auth.require_auth
+    def inner():
+        user_id = auth.get_identity()
+        password = _vault_password()
+        entries = vault_service.export_entries(
+            user_id,
+            password=password,
+            session_id=current_session_id(auth),
+            batch_size=settings.VAULT_EXPORT_BATCH_SIZE,
+        )
+
+        include_ciphertext = _wants_ciphertext(password)
+
+        def generate():
+            for entry in entries:
+                yield json.dumps(_entry_json(entry, include_ciphertext)) + "\n"
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype="application/x-ndjson",
+            headers={"Content-Disposition": "attachment; filename=vault.ndjson"},
+        )
+
+    return inner()
+
+
+@vault_bp.route("/import", methods=["POST"])
+def import_entries():
+    """
+    Bulk-import plaintext entries, encrypted server-side under one key derivation.
+    Body (application/json): {"password": "...", "entries": [{...}], "atomic": false}
+    Body (application/x-ndjson): one entry object per line; the password goes
+        in X-Vault-Password and `atomic` in the query string. The body is
+        consumed as a stream.
+    Returns:
+        200: {"imported": int, "failed": int, "errors": [{"index": int, "error": str}]}
+        400: Missing password or malformed body
+    """
+    auth = current_app.config["AUTH_PROVIDER"]
+    vault_service = current_app.config["VAULT_SERVICE"]
+
+    @auth.require_auth
+    def inner():
+        user_id = auth.get_identity()
+        if request.mimetype == "application/x-ndjson":
+            password = _vault_password()
+            atomic = request.args.get("atomic") == "true"
+            rows = (line for line in request.stream if line.strip())
+        else:
+            data = request.get_json(force=True, silent=True)
+            if not isinstance(data, dict) or not isinstance(data.get("entries"), list):
+                return jsonify({"error": "Body must be JSON with an 'entries' list."}), 400
+            password = data.get("password")
+            atomic = bool(data.get("atomic"))
+            rows = data["entries"]
+        if not password:
+            return jsonify({"error": "Missing password for encryption"}), 400
+        report = vault_service.import_entries(
+            user_id,
+            rows,
+            password,
+            session_id=current_session_id(auth),
+            chunk_size=settings.VAULT_IMPORT_CHUNK_SIZE,
+            workers=settings.VAULT_IMPORT_WORKERS,
+            atomic=atomic,
+            max_entries=settings.VAULT_IMPORT_MAX_ENTRIES,
+        )
+        return jsonify(report), 200
+
+    return inner()
+
+
+@vault_bp.route("/batch", methods=["POST"])
+def batch_entries():
+    """
+    Run several get/update/delete operations in one round-trip.
+    Body: {"password": "...", "operations": [{"op": "get", "id": 1},
+        {"op": "update", "id": 2, "entry": {...}}, {"op": "delete", "id": 3}]}
+    Updates may send base64 "encrypted_entry" instead of "entry".
+    All valid operations share one key derivation and one transaction.
+    Returns:
+        200: {"results": [{"index", "op", "id", "status", "entry" | "error"}]}
+        400: Malformed body or too many operations
+    """
+    auth = current_app.config["AUTH_PROVIDER"]
+    vault_service = current_app.config["VAULT_SERVICE"]
+
+    @auth.require_auth
+    def inner():
+        user_id = auth.get_identity()
+        data = request.get_json(force=True, silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get("operations"), list):
+            return jsonify({"error": "Body must be JSON with an 'operations' list."}), 400
+        operations = data["operations"]
+        if len(operations) > settings.VAULT_BATCH_MAX_OPERATIONS:
+            return (
+                jsonify(
+                    {
+                        "error": f"At most {settings.VAULT_BATCH_MAX_OPERATIONS} "
+                        "operations per batch."
+                    }
+                ),
+                400,
+            )
+        for operation in operations:
+            if isinstance(operation, dict) and isinstance(
+                operation.get("encrypted_entry"), str
+            ):
+                try:
+                    operation["encrypted_entry"] = decode_ciphertext(
+                        operation["encrypted_entry"]
+                    )
+                except ValueError:
+                    pass  # left as str; the service reports it per operation
+        password = data.get("password")
+        results = vault_service.batch(
+            user_id,
+            operations,
+            password=password,
+            session_id=current_session_id(auth),
+        )
+        include_ciphertext = _wants_ciphertext(password)
+        for result in results:
+            if "entry" in result:
+                _entry_json(result["entry"], include_ciphertext)
+        return jsonify({"results": results}), 200
+
+    return inner()
+
+
+@vault_bp.route("/password", methods=["PUT"])
+def change_password():
+    """
+    Change the vault password by rewrapping the vault's data key.
+    Body: {"old_password": "...", "new_password": "..."}
+    Returns:
+        204: Key rewrapped; existing entries stay readable with the new password.
+        400: Missing passwords
+        403: Wrong old password
+    """
+    auth = current_app.config["AUTH_PROVIDER"]
+    vault_service = current_app.config["VAULT_SERVICE"]
+
+    @auth.require_auth
+    def inner():
+        user_id = auth.get_identity()
+        data = request.get_json(force=True, silent=True) or {}
+        old_password = data.get("old_password")
+        new_password = data.get("new_password")
+        if not old_password or not new_password:
+            return jsonify({"error": "old_password and new_password are required."}), 400
+        vault_service.change_password(
+            user_id, old_password, new_password, session_id=current_session_id(auth)
+        )
+        return "", 204
+
+    return inner()
+
+
+def _key_material_json(user_id, material):
+    return {
+        # Entry ciphertexts under AES-GCM are bound to the user id.
+        "user_id": user_id,
+        "salt": base64.urlsafe_b64encode(material["salt"]).decode(),
+        "kdf": asdict(material["kdf"]),
+        "cipher": material["cipher"],
+        "wrapped_key": material["wrapped_key"],
+        "client_side": material["client_side"],
+    }
+
+
+@vault_bp.route("/key-material", methods=["GET"])
+def get_key_material():
+    """
+    What a client needs to derive the vault key and decrypt entries itself.
+    The wrapped data key is Fernet-encrypted under the key the KDF derives
+    from the vault password and the salt.
+    Returns:
+        200: {"user_id": int, "salt": base64, "kdf": {"scheme", "iterations",
+              "memory_kib", "parallelism"}, "cipher": str,
+              "wrapped_key": str | null, "client_side": bool}
+    """
+    auth = current_app.config["AUTH_PROVIDER"]
+    vault_service = current_app.config["VAULT_SERVICE"]
+
+    @auth.require_auth
+    def inner():
+        user_id = auth.get_identity()
+        material = vault_service.key_material(user_id)
+        return jsonify(_key_material_json(user_id, material)), 200
+
+    return inner()
+
+
+@vault_bp.route("/key-material", methods=["PUT"])
+def set_client_side():
+    """
+    Opt the vault in or out of client-side (zero-knowledge) decryption. In
+    client-side mode requests carrying a vault password are refused with 409;
+    entries are read and written as ciphertext only.
+    Body: {"client_side": bool, "wrapped_key": "..."}; wrapped_key only for a
+        vault without a data key yet (GET returned null), generated and
+        wrapped by the client.
+    Returns:
+        200: The key material, as for GET
+        400: Malformed body
+        409: The vault's KDF or cipher is not available to browsers, or its
+            data key does not match
+    """
+    auth = current_app.config["AUTH_PROVIDER"]
+    vault_service = current_app.config["VAULT_SERVICE"]
+
+    @auth.require_auth
+    def inner():
+        user_id = auth.get_identity()
+        data = request.get_json(force=True, silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get("client_side"), bool):
+            return jsonify({"error": "client_side must be true or false."}), 400
+        wrapped_key = data.get("wrapped_key")
+        if wrapped_key is not None and not isinstance(wrapped_key, str):
+            return jsonify({"error": "wrapped_key must be a string."}), 400
+        try:
+            vault_service.set_client_side(user_id, data["client_side"], wrapped_key)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 409
+        material = vault_service.key_material(user_id)
+        return jsonify(_key_material_json(user_id, material)), 200
+
+    return inner()
+
+
 @vault_bp.route("/", methods=["POST"])
 def add_entry():
+    """
+    Add an entry.
+    Body: {"password": "...", "entry": {...}} to encrypt server-side, or
+        {"encrypted_entry": "<base64>"} with ciphertext made by the client
+        (client-side vaults).
+    Returns:
+        201: The new entry
+        400: Missing body, password or ciphertext
+        409: A password was sent for a client-side vault
+    """
     auth = current_app.config["AUTH_PROVIDER"]
     vault_service = current_app.config["VAULT_SERVICE"]
 
@@ -33,15 +615,25 @@ def add_entry():
         user_id = auth.get_identity()
         try:
             data = request.get_json(force=True, silent=True)
-            print("[DEBUG] POST /api/vault/ data:", data)
+            print("[DEBUG] POST /api/vault/ data:", _redacted(data))
             if not data:
                 return jsonify({"error": "Request body must be JSON."}), 400
             password = data.get("password")
             entry_data = data.get("entry") or data
             if not password:
-                return jsonify({"error": "Missing password for encryption"}), 400
-            entry = vault_service.add_entry(user_id, entry_data, password=password)
-            return jsonify(entry), 201
+                try:
+                    entry_data = _raw_entry(data)
+                except ValueError as e:
+                    return jsonify({"error": str(e)}), 400
+                if entry_data is None:
+                    return jsonify({"error": "Missing password for encryption"}), 400
+            entry = vault_service.add_entry(
+                user_id,
+                entry_data,
+                password=password,
+                session_id=current_session_id(auth),
+            )
+            return jsonify(_entry_json(entry, _wants_ciphertext(password))), 201
         except Exception as e:
             print("[DEBUG] Exception in POST /api/vault/:", e)
             raise
@@ -51,23 +643,62 @@ def add_entry():
 
 @vault_bp.route("/<int:entry_id>", methods=["GET"])
 def get_entry(entry_id):
+    """
+    Get one entry.
+    Headers:
+        X-Vault-Password: Decrypt the entry with this vault password.
+        If-None-Match: ETag of a previous response; answered with 304 while
+            the entry is unchanged and the password has the same outcome,
+            after the session's key lookup but before any decryption.
+    Returns:
+        200: The entry, with an ETag
+        304: Not modified
+        404: Entry not found
+    """
     auth = current_app.config["AUTH_PROVIDER"]
     vault_service = current_app.config["VAULT_SERVICE"]
 
     @auth.require_auth
     def inner():
         user_id = auth.get_identity()
-        password = request.args.get("password")
-        entry = vault_service.get_entry(user_id, entry_id, password=password)
+        password = _vault_password()
+        version = vault_service.entry_version(user_id, entry_id)
+        if version is None:
+            return jsonify({"error": "Entry not found"}), 404
+        session_id = current_session_id(auth)
+        etag = _entry_etag(
+            entry_id,
+            version,
+            _unlock_tag(vault_service, user_id, password, session_id),
+        )
+        if request.if_none_match.contains_weak(etag):
+            return _not_modified(etag)
+        entry = vault_service.get_entry(
+            user_id, entry_id, password=password, session_id=session_id
+        )
         if not entry:
             return jsonify({"error": "Entry not found"}), 404
-        return jsonify(entry), 200
+        response = jsonify(_entry_json(entry, _wants_ciphertext(password)))
+        return _with_etag(response, etag), 200
 
     return inner()
 
 
 @vault_bp.route("/<int:entry_id>", methods=["PUT"])
 def update_entry(entry_id):
+    """
+    Replace an entry with a new plaintext, encrypted under the vault password,
+    or with client-made ciphertext (body as for POST /api/vault/).
+    Headers:
+        If-Match: ETag from a GET of the entry; the update only happens while
+            the entry is still at that version (checked atomically).
+    Returns:
+        200: The updated entry, with its new ETag
+        400: Missing body, password or ciphertext
+        404: Entry not found
+        409: A password was sent for a client-side vault
+        412: If-Match does not match the entry's current version
+    """
     auth = current_app.config["AUTH_PROVIDER"]
     vault_service = current_app.config["VAULT_SERVICE"]
 
@@ -76,19 +707,47 @@ def update_entry(entry_id):
         user_id = auth.get_identity()
         try:
             data = request.get_json(force=True, silent=True)
-            print(f"[DEBUG] PUT /api/vault/{{entry_id}} data:", data)
+            print(f"[DEBUG] PUT /api/vault/{{entry_id}} data:", _redacted(data))
             if not data:
                 return jsonify({"error": "Request body must be JSON."}), 400
             password = data.get("password")
             entry_data = data.get("entry") or data
             if not password:
-                return jsonify({"error": "Missing password for encryption"}), 400
+                try:
+                    entry_data = _raw_entry(data)
+                except ValueError as e:
+                    return jsonify({"error": str(e)}), 400
+                if entry_data is None:
+                    return jsonify({"error": "Missing password for encryption"}), 400
+            expected_version = None
+            if request.if_match:
+                expected_version = vault_service.entry_version(user_id, entry_id)
+                if expected_version is None:
+                    return jsonify({"error": "Entry not found"}), 404
+                # Either representation's tag names the same version.
+                if not any(
+                    request.if_match.contains(
+                        _entry_etag(entry_id, expected_version, unlock_tag)
+                    )
+                    for unlock_tag in ("", ".d", ".n")
+                ):
+                    return _precondition_failed()
             entry = vault_service.update_entry(
-                user_id, entry_id, entry_data, password=password
+                user_id,
+                entry_id,
+                entry_data,
+                password=password,
+                session_id=current_session_id(auth),
+                expected_version=expected_version,
             )
+            version = vault_service.entry_version(user_id, entry_id)
+            if not entry and version is not None and expected_version is not None:
+                # Written by someone else between the check and the update.
+                return _precondition_failed()
             if not entry:
                 return jsonify({"error": "Entry not found"}), 404
-            return jsonify(entry), 200
+            response = jsonify(_entry_json(entry, _wants_ciphertext(password)))
+            return _with_etag(response, _entry_etag(entry_id, version)), 200
         except Exception as e:
             print(f"[DEBUG] Exception in PUT /api/vault/{{entry_id}}:", e)
             raise
@@ -1,25 +1,188 @@
 """
-Vault salt utilities for per-user encryption salt management.
+Vault salt utilities for per-user encryption salt, KDF and cipher management.
+
+Salts never change once created, so they are served from a process-wide LRU
+cache and written through to the database. The KDF, cipher and client-side
+mode change with the vault password or mode and are read from the database
+on every call (one primary-key lookup): a change made in any worker process
+must take effect in all of them.
 """
 
 import os
-import sqlite3
-from backend.utils.db import get_db
+from backend.config import settings
+from backend.utils.cache import CacheStats, TTLCache
+from backend.utils.db import db_connection
+from backend.vault.crypto_utils import (
+    KdfParams,
+    default_vault_cipher,
+    default_vault_kdf,
+)
 
 SALT_TABLE = "user_salts"
+KDF_TABLE = "user_vault_keys"
+
+_salt_cache = TTLCache(settings.SALT_CACHE_MAX_ENTRIES)
 
 
 def get_or_create_user_salt(user_id: int) -> bytes:
-    """Get or create a unique salt for a user (stored in DB)."""
-    db = get_db()
+    """Get or create a unique salt for a user (stored in DB, cached in memory)."""
+    salt = _salt_cache.get(user_id)
+    if salt is not None:
+        return salt
+    with db_connection() as db:
+        salt = _select_salt(db, user_id)
+        if salt is None:
+            # INSERT OR IGNORE makes concurrent first requests race-safe: one
+            # insert wins and every caller reads back the winning salt.
+            db.execute(
+                f"INSERT OR IGNORE INTO {SALT_TABLE} (user_id, salt) VALUES (?, ?)",
+                (user_id, os.urandom(16)),
+            )
+            db.commit()
+            salt = _select_salt(db, user_id)
+    _salt_cache.set(user_id, salt)
+    return salt
+
+
+def _select_salt(db, user_id: int) -> bytes | None:
     cur = db.execute(f"SELECT salt FROM {SALT_TABLE} WHERE user_id = ?", (user_id,))
     row = cur.fetchone()
-    if row:
-        return row[0]
-    # Create new salt
-    salt = os.urandom(16)
-    db.execute(
-        f"INSERT INTO {SALT_TABLE} (user_id, salt) VALUES (?, ?)", (user_id, salt)
+    return bytes(row[0]) if row else None
+
+
+def get_or_create_user_kdf(user_id: int) -> KdfParams:
+    """
+    Get the vault KDF recorded for a user, recording settings.VAULT_KDF (and
+    settings.VAULT_CIPHER) for a new vault. Existing vaults were pinned to the
+    legacy KDF by migration 3.
+    """
+    with db_connection() as db:
+        kdf = _select_kdf(db, user_id)
+        if kdf is None:
+            default = default_vault_kdf()
+            db.execute(
+                f"INSERT OR IGNORE INTO {KDF_TABLE} "
+                "(user_id, kdf, kdf_params, cipher) VALUES (?, ?, ?, ?)",
+                (
+                    user_id,
+                    default.scheme,
+                    default.params_json(),
+                    default_vault_cipher(),
+                ),
+            )
+            db.commit()
+            kdf = _select_kdf(db, user_id)
+    return kdf
+
+
+def _select_kdf(db, user_id: int) -> KdfParams | None:
+    cur = db.execute(
+        f"SELECT kdf, kdf_params FROM {KDF_TABLE} WHERE user_id = ?", (user_id,)
     )
-    db.commit()
-    return salt
+    row = cur.fetchone()
+    return KdfParams.from_record(row[0], row[1]) if row else None
+
+
+def get_or_create_user_cipher(user_id: int) -> str:
+    """Get the cipher new entries of a user's vault are written with."""
+    with db_connection() as db:
+        row = _select_cipher(db, user_id)
+    if row is None:
+        get_or_create_user_kdf(user_id)  # creates the record for a new vault
+        with db_connection() as db:
+            row = _select_cipher(db, user_id)
+    return row[0]
+
+
+def _select_cipher(db, user_id: int):
+    cur = db.execute(f"SELECT cipher FROM {KDF_TABLE} WHERE user_id = ?", (user_id,))
+    return cur.fetchone()
+
+
+def is_client_side_vault(user_id: int) -> bool:
+    """
+    Whether the user's vault is decrypted in the browser (client-side mode).
+    Never cached: once any worker switches a vault to client-side mode, every
+    worker must stop accepting its password.
+    """
+    with db_connection() as db:
+        cur = db.execute(
+            f"SELECT client_side FROM {KDF_TABLE} WHERE user_id = ?", (user_id,)
+        )
+        row = cur.fetchone()
+    return bool(row and row[0])
+
+
+def set_client_side_vault(user_id: int, enabled: bool) -> None:
+    """
+    Switch a vault between server-side and client-side decryption. In
+    client-side mode the server never sees the vault password and only
+    stores and returns ciphertext.
+    """
+    get_or_create_user_kdf(user_id)  # creates the record for a new vault
+    with db_connection() as db:
+        db.execute(
+            f"UPDATE {KDF_TABLE} SET client_side = ? WHERE user_id = ?",
+            (int(enabled), user_id),
+        )
+        db.commit()
+
+
+def get_wrapped_data_key(user_id: int) -> str | None:
+    """Return the user's wrapped data key, or None before the first unlock."""
+    with db_connection() as db:
+        cur = db.execute(
+            f"SELECT wrapped_key FROM {KDF_TABLE} WHERE user_id = ?", (user_id,)
+        )
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+def swap_wrapped_data_key(
+    user_id: int,
+    expected: str | None,
+    wrapped_key: str,
+    kdf: KdfParams | None = None,
+    cipher: str | None = None,
+) -> bool:
+    """
+    Compare-and-set the user's wrapped data key (and optionally its KDF and
+    cipher).
+    Only succeeds while the stored key still equals `expected` (None for a
+    vault without one), so concurrent first unlocks or password changes
+    cannot overwrite each other.
+    Returns:
+        bool: True if this call stored `wrapped_key`.
+    """
+    assignments = ["wrapped_key = ?"]
+    params = [wrapped_key]
+    if kdf is not None:
+        assignments.append("kdf = ?, kdf_params = ?")
+        params += [kdf.scheme, kdf.params_json()]
+    if cipher is not None:
+        assignments.append("cipher = ?")
+        params.append(cipher)
+    with db_connection() as db:
+        cur = db.execute(
+            f"UPDATE {KDF_TABLE} SET {', '.join(assignments)} "
+            "WHERE user_id = ? AND wrapped_key IS ?",
+            (*params, user_id, expected),
+        )
+        db.commit()
+    return cur.rowcount > 0
+
+
+def salt_cache_stats() -> CacheStats:
+    """Hit/miss counters of the salt cache (see CacheStats.hit_ratio)."""
+    return _salt_cache.stats
+
+
+def invalidate_user_salt(user_id: int) -> None:
+    """Forget a cached salt, e.g. after the user is deleted."""
+    _salt_cache.pop(user_id)
+
+
+def clear_salt_cache() -> None:
+    """Empty the salt cache and reset its counters."""
+    _salt_cache.clear()
+    _salt_cache.stats = CacheStats()
@@ -1,55 +1,792 @@
 """
 VaultService: business logic for CRUD vault entries.
-All data is handled as encrypted_entry (string, encrypted JSON).
+All data is handled as encrypted_entry (raw ciphertext bytes, encrypted JSON).
 """
 
+import json
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
-from backend.vault.interfaces import IVaultRepository
-from backend.vault.crypto_utils import encrypt_entry, decrypt_entry
-from backend.vault.salt_utils import get_or_create_user_salt
+from cryptography.fernet import InvalidToken
+
+from backend.config import settings
 
+from backend.vault import blind_index
+from backend.vault.interfaces import IVaultRepository
+from backend.vault.crypto_utils import (
+    CIPHER_CHACHA20_POLY1305,
+    FORMAT_FERNET_LEGACY,
+    KDF_PBKDF2_SHA256,
+    VaultKey,
+    ciphertext_format,
+    default_vault_cipher,
+    default_vault_kdf,
+    derive_vault_key,
+    generate_data_key,
+)
+from backend.vault.decryption import ParallelDecryptor, decrypt_entries_into
+from backend.vault.entry_cache import DecryptedEntryCache
+from backend.vault.exceptions import ClientSideVaultError, InvalidVaultPasswordError
+from backend.vault.key_cache import DerivedKeyCache
+from backend.vault.session_index import SessionSearchIndexes, TrigramIndex
+from backend.vault.salt_utils import (
+    get_or_create_user_cipher,
+    get_or_create_user_kdf,
+    get_or_create_user_salt,
+    get_wrapped_data_key,
+    is_client_side_vault,
+    set_client_side_vault,
+    swap_wrapped_data_key,
+)
 
 
 class VaultService:
-    def __init__(self, repo: IVaultRepository):
+    def __init__(
+        self,
+        repo: IVaultRepository,
+        key_cache: DerivedKeyCache | None = None,
+        decryptor: ParallelDecryptor | None = None,
+        search_indexes: SessionSearchIndexes | None = None,
+        entry_cache: DecryptedEntryCache | None = None,
+    ):
         self.repo = repo
+        self.key_cache = key_cache
+        self.decryptor = decryptor
+        self.search_indexes = search_indexes
+        self.entry_cache = entry_cache
 
-    def list_entries(self, user_id, password=None):
-        entries = self.repo.list_entries(user_id)
-        if password:
-            salt = get_or_create_user_salt(user_id)
-            for entry in entries:
-                try:
-                    entry['decrypted'] = decrypt_entry(entry['encrypted_entry'], password, salt)
-                except Exception:
-                    entry['decrypted'] = None
+    def _vault_key(self, user_id, password, session_id=None) -> VaultKey:
+        """
+        Unlock the user's data key with a vault password.
+        At most one key derivation per request, none on a session cache hit.
+        Cache hits are checked against the stored wrapped key, so a password
+        change in another worker process revokes the old password here too.
+        Raises:
+            InvalidVaultPasswordError: If the password does not unwrap the key.
+            ClientSideVaultError: If the vault is decrypted client-side.
+        """
+        self._refuse_client_side(user_id)
+        salt = get_or_create_user_salt(user_id)
+        kdf = get_or_create_user_kdf(user_id)
+
+        def unlock(pw, s):
+            return self._unlock(user_id, derive_vault_key(pw, s, kdf))
+
+        if self.key_cache is None:
+            return unlock(password, salt)
+        return self.key_cache.get_or_derive(
+            user_id,
+            salt,
+            session_id,
+            password,
+            unlock,
+            kdf=kdf,
+            wrapped_key=get_wrapped_data_key(user_id),
+        )
+
+    @staticmethod
+    def _refuse_client_side(user_id):
+        # The point of the mode is that passwords never reach the server; one
+        # sent anyway is not used to derive anything.
+        if is_client_side_vault(user_id):
+            raise ClientSideVaultError(
+                "This vault is decrypted client-side; send no vault password."
+            )
+
+    def _read_key(self, user_id, password, session_id=None) -> VaultKey | None:
+        # Reads with a wrong password keep returning entries with decrypted=None.
+        try:
+            return self._vault_key(user_id, password, session_id)
+        except InvalidVaultPasswordError:
+            return None
+
+    def unlocks(self, user_id, password, session_id=None) -> bool:
+        """
+        Whether `password` unlocks the user's vault (no derivation on a
+        session cache hit), e.g. to tell a decrypted response from one with
+        every entry left undecrypted.
+        Raises:
+            ClientSideVaultError: If the vault is decrypted client-side.
+        """
+        return self._read_key(user_id, password, session_id) is not None
+
+    def _unlock(self, user_id, password_key: VaultKey) -> VaultKey:
+        wrapped = get_wrapped_data_key(user_id)
+        if wrapped is None:
+            # First unlock: create the data key. A vault with legacy entries
+            # must prove the password first, or a typo would wrap the new key
+            # under the wrong password.
+            for entry in self.repo.list_entries(user_id, limit=1):
+                token = entry["encrypted_entry"]
+                if ciphertext_format(token) == FORMAT_FERNET_LEGACY:
+                    try:
+                        password_key.decrypt(token)
+                    except InvalidToken:
+                        raise InvalidVaultPasswordError("Invalid vault password.")
+                break
+            swap_wrapped_data_key(
+                user_id, None, password_key.wrap(generate_data_key())
+            )
+            # Read back: a concurrent first unlock may have won the swap.
+            wrapped = get_wrapped_data_key(user_id)
+        try:
+            return password_key.unwrap(wrapped, get_or_create_user_cipher(user_id))
+        except InvalidToken:
+            raise InvalidVaultPasswordError("Invalid vault password.")
+
+    def change_password(self, user_id, old_password, new_password, session_id=None):
+        """
+        Rewrap the user's data key under a new vault password.
+        Entries under the data key are untouched; only entries still in the
+        legacy format (encrypted directly under the old password) are
+        re-encrypted, once. The new wrapping uses the current VAULT_KDF, and
+        entries written from then on the current VAULT_CIPHER.
+        Raises:
+            InvalidVaultPasswordError: If `old_password` is wrong, or the key
+                was changed concurrently.
+            ClientSideVaultError: If the vault is decrypted client-side.
+        """
+        self._refuse_client_side(user_id)
+        salt = get_or_create_user_salt(user_id)
+        old_key = derive_vault_key(old_password, salt, get_or_create_user_kdf(user_id))
+        # Unlock uncached (creating the data key if needed), then pin the exact
+        # wrapped key the swap below must replace.
+        self._unlock(user_id, old_key)
+        expected = get_wrapped_data_key(user_id)
+        cipher = default_vault_cipher()
+        try:
+            key = old_key.unwrap(expected, cipher)
+        except InvalidToken:
+            raise InvalidVaultPasswordError("Invalid vault password.")
+
+        upgrades = []
+        for entry in self.repo.iter_entries(user_id):
+            token = entry["encrypted_entry"]
+            if ciphertext_format(token) != FORMAT_FERNET_LEGACY:
+                continue
+            try:
+                upgrades.append(
+                    (
+                        "update",
+                        entry["id"],
+                        key.encrypt(key.decrypt(token), user_id, entry["id"]),
+                    )
+                )
+            except InvalidToken:
+                # Unreadable under the old password too; leave it as it is.
+                continue
+        if upgrades:
+            self.repo.batch(user_id, upgrades)
+
+        kdf = default_vault_kdf()
+        new_key = derive_vault_key(new_password, salt, kdf)
+        swapped = swap_wrapped_data_key(
+            user_id, expected, key.rewrap(new_key), kdf=kdf, cipher=cipher
+        )
+        if self.key_cache is not None:
+            self.key_cache.invalidate_user(user_id)
+        if self.entry_cache is not None:
+            self.entry_cache.invalidate_user(user_id)
+        if not swapped:
+            raise InvalidVaultPasswordError("Vault key changed concurrently.")
+
+    def key_material(self, user_id):
+        """
+        What a client needs to unlock the vault itself: salt, KdfParams,
+        cipher, wrapped data key (None before the first unlock) and whether
+        the vault is in client-side mode. Derives no key.
+        """
+        return {
+            "salt": get_or_create_user_salt(user_id),
+            "kdf": get_or_create_user_kdf(user_id),
+            "cipher": get_or_create_user_cipher(user_id),
+            "wrapped_key": get_wrapped_data_key(user_id),
+            "client_side": is_client_side_vault(user_id),
+        }
+
+    def set_client_side(self, user_id, enabled, wrapped_key=None):
+        """
+        Opt a vault in or out of client-side decryption.
+        Browsers (WebCrypto) have PBKDF2 and AES but neither Argon2id nor
+        ChaCha20-Poly1305, so only PBKDF2 vaults with a Fernet or AES-GCM
+        cipher can opt in; others first change their vault password under a
+        supported VAULT_KDF/VAULT_CIPHER. A vault that was never unlocked has
+        no data key yet: the client generates one and sends it wrapped.
+        Server-side caches of the user's keys and plaintext are dropped.
+        Raises:
+            ValueError: If the vault cannot be switched (client-facing message).
+        """
+        if enabled:
+            if get_or_create_user_kdf(user_id).scheme != KDF_PBKDF2_SHA256:
+                raise ValueError("Client-side vaults need the pbkdf2-sha256 KDF.")
+            if get_or_create_user_cipher(user_id) == CIPHER_CHACHA20_POLY1305:
+                raise ValueError("Client-side vaults cannot use chacha20-poly1305.")
+            current = get_wrapped_data_key(user_id)
+            if current is None:
+                # A wrapped key is a Fernet token; anything else is not one.
+                if ciphertext_format(wrapped_key or "") != FORMAT_FERNET_LEGACY:
+                    raise ValueError(
+                        "The vault has no data key yet; send one as wrapped_key."
+                    )
+                if not swap_wrapped_data_key(user_id, None, wrapped_key):
+                    raise ValueError("Vault key changed concurrently; reload it.")
+            elif wrapped_key is not None and wrapped_key != current:
+                raise ValueError("The vault already has a data key.")
+        set_client_side_vault(user_id, enabled)
+        if self.key_cache is not None:
+            self.key_cache.invalidate_user(user_id)
+        if self.entry_cache is not None:
+            self.entry_cache.invalidate_user(user_id)
+        self._index_invalidate(user_id)
+
+    def list_entries(
+        self,
+        user_id,
+        password=None,
+        session_id=None,
+        after_id=None,
+        limit=None,
+        metadata_only=False,
+    ):
+        """
+        List a page of entries, decrypted when a password is given.
+        With an entry cache and a session, rows already decrypted by the
+        session are served from memory: the page costs one (id, updated_at)
+        query plus reading and decrypting the rows that changed.
+        """
+        if (
+            password
+            and not metadata_only
+            and session_id is not None
+            and self.entry_cache is not None
+        ):
+            versions = self.repo.list_entries(
+                user_id, after_id=after_id, limit=limit, metadata_only=True
+            )
+            if not versions:
+                return []
+            key = self._read_key(user_id, password, session_id)
+            if key is not None:
+                return self._list_cached(user_id, key, session_id, versions)
+        entries = self.repo.list_entries(
+            user_id, after_id=after_id, limit=limit, metadata_only=metadata_only
+        )
+        if password and entries and not metadata_only:
+            key = self._read_key(user_id, password, session_id)
+            self._decrypt_entries(key, user_id, entries)
         return entries
 
-    def add_entry(self, user_id, data, password=None):
+    def _decrypt_entries(self, key, user_id, entries):
+        if self.decryptor is not None:
+            self.decryptor.decrypt_entries(key, user_id, entries)
+        else:
+            decrypt_entries_into(key, user_id, entries)
+
+    def _list_cached(self, user_id, key, session_id, versions, chunk_size=500):
+        """
+        Serve a listing from the session's decrypted entries, reading and
+        decrypting only rows whose (id, updated_at) is not cached yet.
+        """
+        session = self.entry_cache.session(user_id, session_id)
+        found, misses = session.lookup(versions)
+        if misses:
+            updated_at = {row["id"]: row["updated_at"] for row in versions}
+        for start in range(0, len(misses), chunk_size):
+            fetched = self.repo.get_entries(user_id, misses[start:start + chunk_size])
+            self._decrypt_entries(key, user_id, fetched)
+            session.store(updated_at, fetched)
+            found.update((entry["id"], entry) for entry in fetched)
+        # Rows deleted since the version query are left out.
+        return [found[row["id"]] for row in versions if row["id"] in found]
+
+    def vault_version(self, user_id):
+        """
+        Version of the user's whole vault (its change counter). One index
+        seek; no key material is touched, so callers can answer conditional
+        requests before unlocking anything.
+        """
+        return self.repo.get_vault_version(user_id)
+
+    def entry_version(self, user_id, entry_id):
+        """Version of one entry, or None if it does not exist."""
+        return self.repo.get_entry_version(user_id, entry_id)
+
+    def changes(self, user_id, since=0, password=None, session_id=None, limit=None):
+        """
+        Delta sync: entries created, updated or deleted after sync token `since`.
+        Clients store the returned sync_token and pass it on the next call; a
+        token of 0 returns the whole vault. The cost depends on the number of
+        changes, not the vault size.
+        Args:
+            since (int): Change counter value the client is in sync with.
+            limit (int | None): Maximum changed rows per page.
+        Returns:
+            dict: {"entries": [...] (decrypted when a password is given),
+                "deleted": [ids], "sync_token": int, "has_more": bool}.
+                With has_more, call again with the returned sync_token.
+        """
+        rows = self.repo.list_changes(
+            user_id, since, limit=None if limit is None else limit + 1
+        )
+        has_more = limit is not None and len(rows) > limit
+        if has_more:
+            rows = rows[:limit]
+        entries = [
+            {"id": row["id"], "encrypted_entry": row["encrypted_entry"]}
+            for row in rows
+            if not row["deleted"]
+        ]
+        if password and entries:
+            key = self._read_key(user_id, password, session_id)
+            self._decrypt_entries(key, user_id, entries)
+        return {
+            "entries": entries,
+            "deleted": [row["id"] for row in rows if row["deleted"]],
+            "sync_token": rows[-1]["change_seq"] if rows else since,
+            "has_more": has_more,
+        }
+
+    def export_entries(self, user_id, password=None, session_id=None, batch_size=500):
+        """
+        Stream a user's vault for export.
+        Without a password entries pass through encrypted; with one, the key is
+        derived once up front and each entry gains a `decrypted` field.
+        Returns:
+            Iterator[dict]: Entries in id order, read in batches of `batch_size`.
+        """
+        key = self._read_key(user_id, password, session_id) if password else None
+
+        def generate():
+            for entry in self.repo.iter_entries(user_id, batch_size=batch_size):
+                if password:
+                    try:
+                        entry['decrypted'] = key.decrypt(
+                            entry['encrypted_entry'], user_id, entry['id']
+                        )
+                    except Exception:
+                        entry['decrypted'] = None
+                yield entry
+
+        return generate()
+
+    def add_entry(self, user_id, data, password=None, session_id=None):
         # data: dict (plaintext fields)
         if password:
-            salt = get_or_create_user_salt(user_id)
-            encrypted = encrypt_entry(data, password, salt)
-            return self.repo.add_entry(user_id, {"encrypted_entry": encrypted})
+            key = self._vault_key(user_id, password, session_id)
+            plaintext = json.dumps(data).encode()
+            # The ciphertext is bound to the row id, reserved before sealing.
+            (entry_id,) = self.repo.add_sealed_entries(
+                user_id,
+                1,
+                lambda ids: [key.seal(plaintext, user_id, ids[0])],
+                search_tokens=[blind_index.entry_tokens(key, data)],
+            )
+            self._index_upsert(user_id, entry_id, data)
+            return self.repo.get_entry(user_id, entry_id)
         # fallback: expects already encrypted
-        return self.repo.add_entry(user_id, data)
+        entry = self.repo.add_entry(user_id, data)
+        self._index_invalidate(user_id)
+        return entry
+
+    def import_entries(
+        self,
+        user_id,
+        rows,
+        password,
+        session_id=None,
+        chunk_size=500,
+        workers=4,
+        atomic=False,
+        max_entries=None,
+    ):
+        """
+        Bulk-import plaintext entries under one key derivation.
+        Rows are processed `chunk_size` at a time: parsed and serialized, row
+        ids reserved, encrypted across `workers` threads (ciphertexts are bound
+        to the new row ids) without holding the write lock, then inserted in
+        one transaction per chunk.
+        Args:
+            rows: Iterable of entry dicts or raw NDJSON lines (str/bytes).
+            atomic (bool): Insert all rows in a single transaction instead of
+                one transaction per chunk.
+            max_entries (int | None): Stop with an error after this many rows.
+        Returns:
+            dict: {"imported": int, "failed": int, "errors": [{"index", "error"}]}
+        """
+        key = self._vault_key(user_id, password, session_id)
+        errors = []
+        imported = 0
+        pending = []
+        # Read at most one row past the limit, just to detect that it was exceeded.
+        limit = None if max_entries is None else max_entries + 1
+        numbered = enumerate(islice(rows, limit))
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            while True:
+                chunk = list(islice(numbered, chunk_size))
+                if not chunk:
+                    break
+                if max_entries is not None and chunk[-1][0] == max_entries:
+                    chunk.pop()
+                    errors.append(
+                        {
+                            "index": max_entries,
+                            "error": f"Import limit of {max_entries} entries exceeded.",
+                        }
+                    )
+                parsed = self._parse_import_chunk(key, chunk, errors)
+                if atomic:
+                    pending.extend(parsed)
+                elif parsed:
+                    imported += self._insert_sealed(user_id, key, parsed, pool, workers)
+            if atomic and pending:
+                imported = self._insert_sealed(user_id, key, pending, pool, workers)
+        if imported:
+            # Cheaper to rebuild on the next fuzzy search than to index here.
+            self._index_invalidate(user_id)
+        return {"imported": imported, "failed": len(errors), "errors": errors}
+
+    def _insert_sealed(self, user_id, key, parsed, pool, workers):
+        def seal_slice(items):
+            return [
+                key.seal(plaintext, user_id, entry_id) for entry_id, plaintext in items
+            ]
+
+        def seal(ids):
+            items = [
+                (entry_id, plaintext) for entry_id, (plaintext, _) in zip(ids, parsed)
+            ]
+            # One task per worker keeps thread hand-off overhead off the per-entry cost.
+            step = max(-(-len(items) // max(workers, 1)), 1)
+            slices = [items[i:i + step] for i in range(0, len(items), step)]
+            sealed = pool.map(seal_slice, slices)
+            return [token for tokens in sealed for token in tokens]
+
+        tokens = [search_tokens for _, search_tokens in parsed]
+        ids = self.repo.add_sealed_entries(
+            user_id, len(parsed), seal, search_tokens=tokens
+        )
+        return len(ids)
+
+    @staticmethod
+    def _parse_import_chunk(key, chunk, errors):
+        parsed = []
+        for index, row in chunk:
+            try:
+                if isinstance(row, (str, bytes)):
+                    row = json.loads(row)
+            except ValueError:
+                errors.append({"index": index, "error": "Invalid JSON."})
+                continue
+            if not isinstance(row, dict) or not row:
+                errors.append(
+                    {"index": index, "error": "Entry must be a non-empty JSON object."}
+                )
+                continue
+            try:
+                plaintext = json.dumps(row).encode()
+            except (TypeError, ValueError) as e:
+                errors.append({"index": index, "error": f"Encryption failed: {e}"})
+                continue
+            parsed.append((plaintext, blind_index.entry_tokens(key, row)))
+        return parsed
 
-    def get_entry(self, user_id, entry_id, password=None):
+    def get_entry(self, user_id, entry_id, password=None, session_id=None):
         entry = self.repo.get_entry(user_id, entry_id)
         if entry and password:
-            salt = get_or_create_user_salt(user_id)
+            key = self._read_key(user_id, password, session_id)
             try:
-                entry['decrypted'] = decrypt_entry(entry['encrypted_entry'], password, salt)
+                entry['decrypted'] = key.decrypt(
+                    entry['encrypted_entry'], user_id, entry_id
+                )
             except Exception:
                 entry['decrypted'] = None
         return entry
 
-    def update_entry(self, user_id, entry_id, data, password=None):
+    def update_entry(
+        self,
+        user_id,
+        entry_id,
+        data,
+        password=None,
+        session_id=None,
+        expected_version=None,
+    ):
+        """
+        Args:
+            expected_version (int | None): Only update while the entry's
+                version (see entry_version) still equals this value.
+        Returns:
+            dict | None: The updated entry; None if it does not exist or its
+                version no longer matches.
+        """
         if password:
-            salt = get_or_create_user_salt(user_id)
-            encrypted = encrypt_entry(data, password, salt)
-            return self.repo.update_entry(user_id, entry_id, {"encrypted_entry": encrypted})
-        return self.repo.update_entry(user_id, entry_id, data)
+            key = self._vault_key(user_id, password, session_id)
+            encrypted = key.encrypt(data, user_id, entry_id)
+            updated = self.repo.update_entry(
+                user_id,
+                entry_id,
+                {
+                    "encrypted_entry": encrypted,
+                    "search_tokens": blind_index.entry_tokens(key, data),
+                },
+                expected_version=expected_version,
+            )
+            if updated:
+                self._forget_entry(user_id, entry_id)
+                self._index_upsert(user_id, entry_id, data)
+            return updated
+        updated = self.repo.update_entry(
+            user_id, entry_id, data, expected_version=expected_version
+        )
+        if updated:
+            self._forget_entry(user_id, entry_id)
+            self._index_invalidate(user_id)
+        return updated
 
     def delete_entry(self, user_id, entry_id):
-        return self.repo.delete_entry(user_id, entry_id)
+        deleted = self.repo.delete_entry(user_id, entry_id)
+        if deleted:
+            self._forget_entry(user_id, entry_id)
+            if self.search_indexes is not None:
+                self.search_indexes.remove(user_id, entry_id)
+        return deleted
+
+    def _forget_entry(self, user_id, entry_id):
+        # Drop cached plaintext now; an updated_at check alone could let a
+        # write within the same millisecond go unnoticed.
+        if self.entry_cache is not None:
+            self.entry_cache.discard(user_id, entry_id)
+
+    def _index_upsert(self, user_id, entry_id, data):
+        if self.search_indexes is not None:
+            self.search_indexes.upsert(user_id, entry_id, data)
+
+    def _index_invalidate(self, user_id):
+        # Raw ciphertext writes: the plaintext is unknown, so rebuild lazily.
+        if self.search_indexes is not None:
+            self.search_indexes.invalidate_user(user_id)
+
+    def fuzzy_search(self, user_id, password, query, session_id=None, limit=None):
+        """
+        Substring and typo-tolerant search over every non-password field.
+        The session's first fuzzy search decrypts the vault once into an
+        in-memory trigram index; later ones are served from it until the
+        session's index expires or is invalidated. Each search checks the
+        vault version (one index seek) and applies rows changed since the
+        index was built or last refreshed, including writes handled by other
+        worker processes.
+        Returns:
+            list[dict]: {"id", "decrypted"} matches, substring matches first.
+        Raises:
+            InvalidVaultPasswordError: If the password does not unlock the vault.
+        """
+        key = self._vault_key(user_id, password, session_id)
+        # Read before the entries, so writes racing the build are applied by
+        # the next search.
+        version = self.repo.get_vault_version(user_id)
+
+        def build():
+            entries = self.repo.list_entries(user_id)
+            self._decrypt_entries(key, user_id, entries)
+            index = TrigramIndex()
+            readable = [e for e in entries if e['decrypted'] is not None]
+            index.apply_changes(
+                version, [(e['id'], e['decrypted']) for e in readable], ()
+            )
+            return index
+
+        if self.search_indexes is None:
+            index = build()
+        else:
+            index = self.search_indexes.get_or_build(user_id, session_id, build)
+            if index.version < version:
+                self._refresh_index(user_id, key, index)
+        return index.search(query, limit or settings.VAULT_SEARCH_MAX_RESULTS)
+
+    def _refresh_index(self, user_id, key, index):
+        # Decrypts only the rows changed since the index's version; deleted
+        # and unreadable rows leave the index.
+        rows = self.repo.list_changes(user_id, index.version)
+        if not rows:
+            return
+        entries = [
+            {"id": row["id"], "encrypted_entry": row["encrypted_entry"]}
+            for row in rows
+            if not row["deleted"]
+        ]
+        self._decrypt_entries(key, user_id, entries)
+        index.apply_changes(
+            rows[-1]["change_seq"],
+            [(e["id"], e["decrypted"]) for e in entries if e["decrypted"] is not None],
+            [row["id"] for row in rows if row["deleted"]]
+            + [e["id"] for e in entries if e["decrypted"] is None],
+        )
+
+    def search(
+        self,
+        user_id,
+        password,
+        query,
+        field=None,
+        mode=blind_index.MODE_PREFIX,
+        session_id=None,
+        limit=None,
+    ):
+        """
+        Find entries whose service/username/url equals or starts with `query`
+        through the blind index; only matching rows are read and decrypted.
+        Entries without current tokens (written before the index existed, or
+        updated with raw ciphertext) are indexed first, once.
+        Args:
+            field (str | None): One of blind_index.SEARCH_FIELDS; None for all.
+            mode (str): blind_index.MODE_EXACT or MODE_PREFIX.
+            limit (int | None): Maximum number of entries to return.
+        Returns:
+            list[dict]: Matching entries in id order, with `decrypted`.
+        Raises:
+            InvalidVaultPasswordError: If the password does not unlock the vault.
+        """
+        fields = (field,) if field else blind_index.SEARCH_FIELDS
+        key = self._vault_key(user_id, password, session_id)
+        self._index_unindexed(user_id, key)
+        tokens = blind_index.query_tokens(key, query, fields, mode)
+        # A truncated prefix over-matches; filter before applying the limit.
+        truncated = blind_index.is_truncated(query, fields, mode)
+        ids = self.repo.search_entry_ids(
+            user_id, tokens, limit=None if truncated else limit
+        )
+        results = []
+        for entry in self.repo.get_entries(user_id, ids):
+            try:
+                entry['decrypted'] = key.decrypt(
+                    entry['encrypted_entry'], user_id, entry['id']
+                )
+            except Exception:
+                continue
+            if blind_index.matches(entry['decrypted'], query, fields, mode):
+                results.append(entry)
+        return results if limit is None else results[:limit]
+
+    def _index_unindexed(self, user_id, key, batch_size=None):
+        batch_size = batch_size or settings.VAULT_SEARCH_REINDEX_BATCH
+        while True:
+            entries = self.repo.list_unindexed_entries(user_id, batch_size)
+            if not entries:
+                return
+            indexed = []
+            for entry in entries:
+                try:
+                    data = key.decrypt(entry['encrypted_entry'], user_id, entry['id'])
+                except Exception:
+                    # Unreadable with this key: index as having no searchable fields.
+                    data = None
+                indexed.append(
+                    (
+                        entry['id'],
+                        entry['encrypted_entry'],
+                        blind_index.entry_tokens(key, data),
+                    )
+                )
+            self.repo.set_search_tokens(user_id, indexed)
+            if len(entries) < batch_size:
+                return
+
+    def batch(self, user_id, operations, password=None, session_id=None):
+        """
+        Run many get/update/delete operations with one key derivation and one
+        repository transaction.
+        Args:
+            operations (list[dict]): {"op": "get" | "update" | "delete", "id": int}
+                plus "entry" (plaintext dict, needs password) or
+                "encrypted_entry" (raw ciphertext bytes) for updates.
+        Returns:
+            list[dict]: One result per operation, in order, with "index", "op",
+                "id", an HTTP-like "status" and "entry" or "error".
+        """
+        results = [None] * len(operations)
+        planned = []
+        needs_key = False
+        for index, operation in enumerate(operations):
+            error = self._validate_batch_operation(operation, password)
+            if error:
+                results[index] = {
+                    "index": index,
+                    "op": operation.get("op") if isinstance(operation, dict) else None,
+                    "id": operation.get("id") if isinstance(operation, dict) else None,
+                    "status": 400,
+                    "error": error,
+                }
+                continue
+            planned.append((index, operation))
+            if password and (operation["op"] == "get" or "entry" in operation):
+                needs_key = True
+
+        key = self._vault_key(user_id, password, session_id) if needs_key else None
+        repo_ops = []
+        for index, operation in planned:
+            encrypted = None
+            if operation["op"] == "update":
+                encrypted = (
+                    key.encrypt(operation["entry"], user_id, operation["id"])
+                    if "entry" in operation
+                    else operation["encrypted_entry"]
+                )
+            if operation["op"] == "update" and "entry" in operation:
+                repo_ops.append(
+                    (
+                        "update",
+                        operation["id"],
+                        encrypted,
+                        blind_index.entry_tokens(key, operation["entry"]),
+                    )
+                )
+            else:
+                repo_ops.append((operation["op"], operation["id"], encrypted))
+
+        outcomes = self.repo.batch(user_id, repo_ops) if repo_ops else []
+        for (index, operation), outcome in zip(planned, outcomes):
+            result = {"index": index, "op": operation["op"], "id": operation["id"]}
+            if not outcome:
+                result.update(status=404, error="Entry not found")
+            elif operation["op"] == "delete":
+                self._forget_entry(user_id, operation["id"])
+                if self.search_indexes is not None:
+                    self.search_indexes.remove(user_id, operation["id"])
+                result["status"] = 204
+            elif operation["op"] == "update":
+                self._forget_entry(user_id, operation["id"])
+                if "entry" in operation:
+                    self._index_upsert(user_id, operation["id"], operation["entry"])
+                else:
+                    self._index_invalidate(user_id)
+                result.update(status=200, entry=outcome)
+            else:
+                if operation["op"] == "get" and key is not None:
+                    try:
+                        outcome['decrypted'] = key.decrypt(
+                            outcome['encrypted_entry'], user_id, operation["id"]
+                        )
+                    except Exception:
+                        outcome['decrypted'] = None
+                result.update(status=200, entry=outcome)
+            results[index] = result
+        return results
+
+    @staticmethod
+    def _validate_batch_operation(operation, password):
+        if not isinstance(operation, dict):
+            return "Operation must be a JSON object."
+        if operation.get("op") not in ("get", "update", "delete"):
+            return "op must be one of: get, update, delete."
+        entry_id = operation.get("id")
+        if not isinstance(entry_id, int) or isinstance(entry_id, bool):
+            return "id must be an integer."
+        if operation["op"] == "update":
+            if "entry" in operation:
+                if not isinstance(operation["entry"], dict):
+                    return "entry must be a JSON object."
+                if not password:
+                    return "Missing password for encryption"
+            elif not isinstance(operation.get("encrypted_entry"), bytes):
+                return "update needs 'entry' or base64 'encrypted_entry'."
+        return None
@@ -0,0 +1,262 @@
+"""
+Per-session in-memory search index over decrypted vault entries.
+
+When a session first runs a fuzzy search, its vault is decrypted once and
+kept in a TrigramIndex for the session's idle TTL. VaultService updates
+every live index of a user on add, update and delete, and each index records
+the vault version it reflects: writes handled by other worker processes are
+applied from the change feed before the next search, so later searches only
+decrypt what changed. Indexes live in process memory only and drop their
+plaintext when they are evicted, expire or are invalidated (e.g. logout).
+"""
+
+import heapq
+import math
+import threading
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Callable, Hashable, Optional
+
+from backend.config import settings
+from backend.utils.cache import TTLCache
+from backend.vault.blind_index import normalize
+
+MODE_FUZZY = "fuzzy"
+
+# Never indexed, so a search can not match on (or reveal) stored passwords.
+UNINDEXED_FIELDS = frozenset({"password"})
+
+
+def _texts(data) -> list[str]:
+    if not isinstance(data, dict):
+        return []
+    return [
+        text
+        for field, value in data.items()
+        if field not in UNINDEXED_FIELDS
+        for text in (normalize(field, value),)
+        if text
+    ]
+
+
+def _trigrams(text: str, padded: bool = True) -> set[str]:
+    # Padding makes word starts and short values produce trigrams too.
+    if padded:
+        text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    Inverted trigram index of one vault's decrypted entries.
+
+    Substring matches are found by intersecting posting sets and confirmed
+    on the text; when they do not fill the limit, entries sharing at least
+    `min_similarity` of the query's trigrams are added as typo-tolerant
+    matches, best first.
+    """
+
+    def __init__(
+        self, min_similarity: float = settings.VAULT_SEARCH_FUZZY_MIN_SIMILARITY
+    ) -> None:
+        self._min_similarity = min_similarity
+        # Vault version (change counter) the entries reflect; see apply_changes.
+        self.version = 0
+        self._lock = threading.Lock()
+        self._entries: dict[int, dict] = {}
+        self._texts: dict[int, list[str]] = {}
+        self._postings: "defaultdict[str, set[int]]" = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def upsert(self, entry_id: int, data) -> None:
+        with self._lock:
+            self._upsert(entry_id, data)
+
+    def _upsert(self, entry_id: int, data) -> None:
+        self._remove(entry_id)
+        texts = _texts(data)
+        self._entries[entry_id] = data
+        self._texts[entry_id] = texts
+        for gram in set().union(*(_trigrams(t) for t in texts)):
+            self._postings[gram].add(entry_id)
+
+    def remove(self, entry_id: int) -> None:
+        with self._lock:
+            self._remove(entry_id)
+
+    def _remove(self, entry_id: int) -> None:
+        texts = self._texts.pop(entry_id, None)
+        self._entries.pop(entry_id, None)
+        if texts is None:
+            return
+        for gram in set().union(*(_trigrams(t) for t in texts)):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(entry_id)
+                if not posting:
+                    del self._postings[gram]
+
+    def apply_changes(self, version: int, upserts, removed) -> None:
+        """
+        Bring the index up to vault `version` with the rows changed since its
+        own: `upserts` as (entry_id, data) and `removed` entry ids. Changes
+        read by a slower, overlapping caller that are older than the index are
+        ignored.
+        """
+        with self._lock:
+            if version <= self.version:
+                return
+            for entry_id in removed:
+                self._remove(entry_id)
+            for entry_id, data in upserts:
+                self._upsert(entry_id, data)
+            self.version = version
+
+    def clear(self) -> None:
+        """Drop every entry (and with it the decrypted plaintext)."""
+        with self._lock:
+            self._entries.clear()
+            self._texts.clear()
+            self._postings.clear()
+
+    def search(self, query: str, limit: int = 20) -> list[dict]:
+        """
+        Returns:
+            list[dict]: Up to `limit` {"id", "decrypted"} results, substring
+                matches (in id order) before fuzzy ones (best first).
+        """
+        needle = normalize("", query)
+        if not needle:
+            return []
+        with self._lock:
+            matches = self._substring_matches(needle)
+            found = heapq.nsmallest(limit, matches)
+            if len(found) < limit:
+                found += self._fuzzy_matches(needle, matches, limit - len(found))
+            return [
+                {"id": entry_id, "decrypted": self._entries[entry_id]}
+                for entry_id in found
+            ]
+
+    def _substring_matches(self, needle: str) -> set[int]:
+        if len(needle) < 3:
+            # Every one or two character substring lies inside some padded
+            # trigram of its text, so the union of those postings is exact.
+            return set().union(
+                *(ids for gram, ids in self._postings.items() if needle in gram)
+            )
+        postings = sorted(
+            (self._postings.get(g, ()) for g in _trigrams(needle, padded=False)),
+            key=len,
+        )
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return {
+            entry_id
+            for entry_id in candidates
+            if any(needle in text for text in self._texts[entry_id])
+        }
+
+    def _fuzzy_matches(self, needle: str, exclude: set, limit: int) -> list[int]:
+        postings = sorted(
+            (self._postings.get(g, ()) for g in _trigrams(needle)), key=len
+        )
+        wanted = math.ceil(self._min_similarity * len(postings))
+        # An entry in `wanted` of the postings is in at least one of the
+        # len - wanted + 1 smallest, so only those are scored.
+        head = len(postings) - wanted + 1
+        counts = Counter(chain.from_iterable(postings[:head]))
+        scored = (
+            (shared + sum(entry_id in posting for posting in postings[head:]), entry_id)
+            for entry_id, shared in counts.items()
+            if entry_id not in exclude
+        )
+        best = heapq.nsmallest(
+            limit,
+            ((-shared, entry_id) for shared, entry_id in scored if shared >= wanted),
+        )
+        return [entry_id for _, entry_id in best]
+
+
+class SessionSearchIndexes:
+    """Bounded, idle-expiring TrigramIndex per (user_id, session_id)."""
+
+    def __init__(
+        self,
+        max_sessions: int = settings.VAULT_SEARCH_INDEX_MAX_SESSIONS,
+        ttl_seconds: float = settings.VAULT_SEARCH_INDEX_TTL_SECONDS,
+        clock: Optional[Callable[[], float]] = None,
+    ) -> None:
+        kwargs = {"clock": clock} if clock is not None else {}
+        self._cache = TTLCache(
+            max_sessions, ttl_seconds, on_evict=lambda _, index: index.clear(), **kwargs
+        )
+        self._lock = threading.Lock()
+        # user_id -> [builds in flight, changes since the first began]. A
+        # build that overlapped a change is used once but not cached. Users
+        # leave the dict when their last build finishes, so it stays bounded
+        # by concurrent builds rather than growing with every user seen.
+        self._builds: dict[int, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get_or_build(
+        self,
+        user_id: int,
+        session_id: Hashable,
+        build: Callable[[], TrigramIndex],
+    ) -> TrigramIndex:
+        """Return the session's index, building it with `build()` on a miss."""
+        key = (user_id, session_id)
+        index = self._cache.get(key)
+        if index is not None:
+            return index
+        with self._lock:
+            state = self._builds.setdefault(user_id, [0, 0])
+            state[0] += 1
+            version = state[1]
+        try:
+            index = build()
+            with self._lock:
+                if state[1] == version and session_id is not None:
+                    self._cache.set(key, index)
+        finally:
+            with self._lock:
+                state[0] -= 1
+                if not state[0]:
+                    del self._builds[user_id]
+        return index
+
+    def _changed(self, user_id: int) -> None:
+        with self._lock:
+            state = self._builds.get(user_id)
+            if state is not None:
+                state[1] += 1
+
+    def _live(self, user_id: int) -> list[TrigramIndex]:
+        self._changed(user_id)
+        return self._cache.values_where(lambda k: k[0] == user_id)
+
+    def upsert(self, user_id: int, entry_id: int, data) -> None:
+        """Apply an added or updated entry to every live index of the user."""
+        for index in self._live(user_id):
+            index.upsert(entry_id, data)
+
+    def remove(self, user_id: int, entry_id: int) -> None:
+        for index in self._live(user_id):
+            index.remove(entry_id)
+
+    def invalidate_user(self, user_id: int) -> int:
+        """Drop the user's indexes (e.g. after a write whose plaintext is unknown)."""
+        self._changed(user_id)
+        return self._cache.discard_where(lambda k: k[0] == user_id)
+
+    def invalidate_session(self, user_id: int, session_id: Hashable) -> int:
+        return self._cache.discard_where(
+            lambda k: k[0] == user_id and k[1] == session_id
+        )
+
+    def clear(self) -> None:
+        self._cache.clear()
@@ -0,0 +1,116 @@
+"""
+Benchmark: concurrent read/write throughput per database profile.
+
+Each profile gets a fresh database file. One writer thread inserts vault rows
+(one commit per row, like VaultRepository.add_entry) while reader threads
+list a user's entries. Compare ops/s between "legacy" (rollback journal) and
+"production" (WAL + tuned PRAGMAs).
+
+Run from the project root:
+    PYTHONPATH=. python benchmarks/bench_db_profile.py --seconds 3 --readers 4
+"""
+
+import argparse
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from backend.config import settings
+from backend.utils.db import apply_db_profile, get_db_profile
+
+
+def connect(path: str, profile: dict) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    apply_db_profile(conn, profile)
+    return conn
+
+
+def run_profile(name: str, seconds: float, readers: int) -> tuple[int, int, int]:
+    profile = get_db_profile(name)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.db")
+        setup = connect(path, profile)
+        setup.execute(
+            "CREATE TABLE vault (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "user_id INTEGER NOT NULL, encrypted_entry BLOB NOT NULL)"
+        )
+        setup.executemany(
+            "INSERT INTO vault (user_id, encrypted_entry) VALUES (?, ?)",
+            [(i % 50, b"x" * 200) for i in range(5000)],
+        )
+        setup.commit()
+        setup.close()
+
+        stop = threading.Event()
+        counts = {"reads": 0, "writes": 0, "busy": 0}
+        lock = threading.Lock()
+
+        def writer():
+            conn = connect(path, profile)
+            n = 0
+            while not stop.is_set():
+                try:
+                    conn.execute(
+                        "INSERT INTO vault (user_id, encrypted_entry) VALUES (?, ?)",
+                        (n % 50, "y" * 200),
+                    )
+                    conn.commit()
+                    n += 1
+                except sqlite3.OperationalError:
+                    with lock:
+                        counts["busy"] += 1
+            with lock:
+                counts["writes"] += n
+            conn.close()
+
+        def reader(user_id):
+            conn = connect(path, profile)
+            n = 0
+            while not stop.is_set():
+                try:
+                    conn.execute(
+                        "SELECT id, encrypted_entry FROM vault WHERE user_id = ?",
+                        (user_id,),
+                    ).fetchall()
+                    n += 1
+                except sqlite3.OperationalError:
+                    with lock:
+                        counts["busy"] += 1
+            with lock:
+                counts["reads"] += n
+            conn.close()
+
+        threads = [threading.Thread(target=writer)] + [
+            threading.Thread(target=reader, args=(i,)) for i in range(readers)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        return counts["reads"], counts["writes"], counts["busy"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument(
+        "--profiles", nargs="+", default=sorted(settings.DB_PROFILES)
+    )
+    args = parser.parse_args()
+
+    print(f"{'profile':>12} {'reads/s':>10} {'writes/s':>10} {'busy errs':>10}")
+    for name in args.profiles:
+        reads, writes, busy = run_profile(name, args.seconds, args.readers)
+        print(
+            f"{name:>12} {reads / args.seconds:>10.0f} "
+            f"{writes / args.seconds:>10.0f} {busy:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: repeat GET /api/vault/?password= listings with the entry cache.
+
+Lists a vault of `--entries` rows in one session, the way a polling dashboard
+does: cold (every row decrypted), warm with nothing changed (one
+id/updated_at query, no decryption), and warm after `--changed` rows were
+updated. The uncached service is shown for comparison. Both services use a
+derived key cache, so the KDF is out of the numbers.
+
+Run from the project root:
+    PYTHONPATH=. python benchmarks/bench_entry_cache.py --entries 5000 --changed 10
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+from backend.tests.vault.conftest import patched_key_material
+from backend.vault.entry_cache import DecryptedEntryCache
+from backend.vault.key_cache import DerivedKeyCache
+from backend.vault.repository import VaultRepository
+from backend.vault.services import VaultService
+from database.migrations import migrate
+
+PASSWORD = "benchmark-password"
+SESSION = "bench-session"
+
+
+def build_service(entries: int, entry_cache) -> VaultService:
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    service = VaultService(
+        VaultRepository(conn), key_cache=DerivedKeyCache(), entry_cache=entry_cache
+    )
+    service.import_entries(
+        1,
+        (
+            {"service": f"svc{i}", "username": "u", "password": "p" * 16}
+            for i in range(entries)
+        ),
+        PASSWORD,
+        session_id=SESSION,
+        workers=1,
+    )
+    return service
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--changed", type=int, default=10)
+    args = parser.parse_args()
+
+    with patched_key_material(os.urandom(16)):
+        for label, cache in (("uncached", None), ("cached", DecryptedEntryCache())):
+            service = build_service(args.entries, cache)
+
+            def listing():
+                service.list_entries(1, password=PASSWORD, session_id=SESSION)
+
+            cold = timed(listing)
+            warm = min(timed(listing) for _ in range(5))
+            for entry_id in range(1, args.changed + 1):
+                service.update_entry(
+                    1, entry_id, {"service": "changed"}, PASSWORD, SESSION
+                )
+            changed = timed(listing)
+            print(
+                f"{label:>9}: cold {cold:>8.1f} ms, warm {warm:>8.1f} ms, "
+                f"after {args.changed} updates {changed:>8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
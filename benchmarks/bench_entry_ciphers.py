@@ -0,0 +1,105 @@
+"""
+Benchmark: vault entry encrypt/decrypt throughput per cipher.
+
+Compares the previous path (cryptography's Fernet with its base64 framing, as
+entries were stored before the BLOB migration), the raw-bytes Fernet envelope
+format, AES-256-GCM and ChaCha20-Poly1305. Every case runs for a typical entry
+(a few hundred bytes of JSON) and a large one (e.g. long notes), and reports
+operations and MB of plaintext per second.
+
+Run from the project root:
+    PYTHONPATH=. python benchmarks/bench_entry_ciphers.py --seconds 1 --sizes 256 65536
+"""
+
+import argparse
+import json
+import time
+
+from cryptography.fernet import Fernet
+
+from backend.vault.crypto_utils import (
+    CIPHER_AES_GCM,
+    CIPHER_CHACHA20_POLY1305,
+    CIPHER_FERNET,
+    VaultKey,
+    generate_data_key,
+)
+
+USER_ID = 1
+ENTRY_ID = 42
+
+
+def entry_of_size(size: int) -> dict:
+    entry = {"service": "github", "username": "octocat", "password": "p" * 24}
+    padding = size - len(json.dumps(entry)) - len(', "notes": ""')
+    entry["notes"] = "n" * max(padding, 0)
+    return entry
+
+
+def fernet_base64_case(data: dict):
+    fernet = Fernet(generate_data_key())
+
+    def encrypt():
+        return fernet.encrypt(json.dumps(data).encode()).decode()
+
+    token = encrypt()
+
+    def decrypt():
+        return json.loads(fernet.decrypt(token.encode()))
+
+    return encrypt, decrypt
+
+
+def vault_key_case(cipher: str, data: dict):
+    key = VaultKey(Fernet.generate_key(), generate_data_key(), cipher)
+
+    def encrypt():
+        return key.encrypt(data, USER_ID, ENTRY_ID)
+
+    token = encrypt()
+
+    def decrypt():
+        return key.decrypt(token, USER_ID, ENTRY_ID)
+
+    return encrypt, decrypt
+
+
+def ops_per_second(fn, seconds: float) -> float:
+    ops = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            fn()
+        ops += 50
+    return ops / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 65536])
+    args = parser.parse_args()
+
+    print(
+        f"{'cipher':<28} {'bytes':>7} {'enc ops/s':>11} {'enc MB/s':>9} "
+        f"{'dec ops/s':>11} {'dec MB/s':>9}"
+    )
+    for size in args.sizes:
+        data = entry_of_size(size)
+        plaintext_bytes = len(json.dumps(data))
+        cases = [("fernet (base64, previous)", fernet_base64_case(data))]
+        for cipher in (CIPHER_FERNET, CIPHER_AES_GCM, CIPHER_CHACHA20_POLY1305):
+            cases.append((cipher, vault_key_case(cipher, data)))
+        for label, (encrypt, decrypt) in cases:
+            enc = ops_per_second(encrypt, args.seconds)
+            dec = ops_per_second(decrypt, args.seconds)
+            print(
+                f"{label:<28} {plaintext_bytes:>7} {enc:>11.0f} "
+                f"{enc * plaintext_bytes / 1e6:>9.1f} {dec:>11.0f} "
+                f"{dec * plaintext_bytes / 1e6:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
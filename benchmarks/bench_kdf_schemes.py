@@ -0,0 +1,102 @@
+"""
+Benchmark: login (password hash verify) and vault unlock (key derivation) latency per scheme.
+
+Each scheme runs at the configured cost and at the OWASP Password Storage
+Cheat Sheet minimums, which that guide treats as equivalent security margins:
+bcrypt cost 10, PBKDF2-SHA256 600000 iterations, Argon2id m=19 MiB, t=2, p=1.
+Argon2id is additionally run with every --lanes value; extra lanes only cut
+wall time when the host has spare cores.
+
+Run from the project root:
+    PYTHONPATH=. python benchmarks/bench_kdf_schemes.py --repeat 3 --lanes 1 2 4
+"""
+
+import argparse
+import os
+import time
+
+from backend.auth.hashing import Argon2idPasswordHasher, BcryptPasswordHasher
+from backend.config import settings
+from backend.vault.crypto_utils import KdfParams, derive_key
+
+PASSWORD = "benchmark-password"
+
+
+def best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def login_cases(lanes: list[int]) -> list[tuple[str, object]]:
+    cases = [
+        (f"bcrypt cost={settings.BCRYPT_ROUNDS}", BcryptPasswordHasher()),
+        ("bcrypt cost=10 (OWASP)", BcryptPasswordHasher(rounds=10)),
+        ("argon2id m=19MiB t=2 p=1 (OWASP)", Argon2idPasswordHasher(19456, 2, 1)),
+    ]
+    for p in lanes:
+        cases.append(
+            (
+                f"argon2id m={settings.ARGON2_MEMORY_KIB // 1024}MiB "
+                f"t={settings.ARGON2_TIME_COST} p={p}",
+                Argon2idPasswordHasher(
+                    settings.ARGON2_MEMORY_KIB, settings.ARGON2_TIME_COST, p
+                ),
+            )
+        )
+    return cases
+
+
+def unlock_cases(lanes: list[int]) -> list[tuple[str, KdfParams]]:
+    cases = [
+        (
+            f"pbkdf2-sha256 i={settings.VAULT_PBKDF2_ITERATIONS}",
+            KdfParams(iterations=settings.VAULT_PBKDF2_ITERATIONS),
+        ),
+        ("pbkdf2-sha256 i=600000 (OWASP)", KdfParams(iterations=600000)),
+        (
+            "argon2id m=19MiB t=2 p=1 (OWASP)",
+            KdfParams("argon2id", iterations=2, memory_kib=19456, parallelism=1),
+        ),
+    ]
+    for p in lanes:
+        cases.append(
+            (
+                f"argon2id m={settings.VAULT_ARGON2_MEMORY_KIB // 1024}MiB "
+                f"t={settings.VAULT_ARGON2_TIME_COST} p={p}",
+                KdfParams(
+                    "argon2id",
+                    iterations=settings.VAULT_ARGON2_TIME_COST,
+                    memory_kib=settings.VAULT_ARGON2_MEMORY_KIB,
+                    parallelism=p,
+                ),
+            )
+        )
+    return cases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--lanes", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    print(f"host cores: {os.cpu_count()}")
+    print("login (verify):")
+    for label, hasher in login_cases(args.lanes):
+        stored = hasher.hash(PASSWORD)
+        ms = best_ms(lambda: hasher.verify(PASSWORD, stored), args.repeat)
+        print(f"  {label:<36} {ms:>9.1f} ms")
+
+    salt = os.urandom(16)
+    print("unlock (derive vault key):")
+    for label, kdf in unlock_cases(args.lanes):
+        ms = best_ms(lambda: derive_key(PASSWORD, salt, kdf), args.repeat)
+        print(f"  {label:<36} {ms:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Benchmark: per-request vault key cost with and without the session key cache.
+
+A miss pays the full PBKDF2 derivation; a hit is a dictionary lookup plus one
+HMAC over the password.
+
+Run from the project root:
+    PYTHONPATH=. python benchmarks/bench_key_cache.py --requests 1000
+"""
+
+import argparse
+import os
+import time
+
+from backend.vault.crypto_utils import derive_vault_key
+from backend.vault.key_cache import DerivedKeyCache
+
+PASSWORD = "benchmark-password"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    salt = os.urandom(16)
+    cache = DerivedKeyCache()
+
+    start = time.perf_counter()
+    cache.get_or_derive(1, salt, "session", PASSWORD, derive_vault_key)
+    miss = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        cache.get_or_derive(1, salt, "session", PASSWORD, derive_vault_key)
+    hit = (time.perf_counter() - start) / args.requests
+
+    print(f"miss (derive): {miss * 1000:10.1f} ms")
+    print(f"hit  (cached): {hit * 1_000_000:10.1f} us")
+    print(f"hit ratio:     {cache.stats.hit_ratio:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
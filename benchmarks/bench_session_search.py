@@ -0,0 +1,81 @@
+"""
+Benchmark: fuzzy search latency on a session's in-memory trigram index.
+
+Builds a TrigramIndex over `--entries` synthetic decrypted entries (the
+one-off cost of a session's first fuzzy search, minus decryption) and then
+times repeated searches for substring, typo and short queries. No query
+decrypts anything; latency only depends on the index.
+
+Run from the project root:
+    PYTHONPATH=. python benchmarks/bench_session_search.py --entries 10000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from backend.vault.session_index import TrigramIndex
+
+SYLLABLES = [c + v for c in "bcdfgklmnprstvz" for v in "aeiou"]
+DOMAINS = ["gmail.com", "outlook.com", "proton.me", "example.org", "work.io"]
+
+
+def word(rng: random.Random, syllables: int) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables))
+
+
+def entries(n: int, rng: random.Random):
+    for i in range(n):
+        name = word(rng, rng.randint(2, 4))
+        yield i + 1, {
+            "service": name.title(),
+            "username": f"{word(rng, 3)}@{rng.choice(DOMAINS)}",
+            "url": f"https://www.{name}.com/login",
+            "notes": " ".join(word(rng, 3) for _ in range(3)),
+            "password": "p" * 16,
+        }
+
+
+def queries(rows: list) -> dict:
+    # Look for services that are in the vault, like a user would.
+    first, second = rows[0][1]["service"], rows[1][1]["service"]
+    return {
+        "substring": first[1:6],
+        "typo": second[:2] + second[3] + second[2] + second[4:],
+        "short": "ba",
+        "miss": "xqxqxq",
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    index = TrigramIndex()
+    start = time.perf_counter()
+    rows = list(entries(args.entries, rng))
+    for entry_id, data in rows:
+        index.upsert(entry_id, data)
+    build = time.perf_counter() - start
+    print(f"{'build':>10}: {build * 1000:>9.1f} ms for {args.entries} entries")
+
+    for label, query in queries(rows).items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            found = index.search(query, args.limit)
+            timings.append(time.perf_counter() - start)
+        print(
+            f"{label:>10}: median {statistics.median(timings) * 1000:>7.3f} ms, "
+            f"p95 {sorted(timings)[int(len(timings) * 0.95)] * 1000:>7.3f} ms "
+            f"({len(found)} results)"
+        )
+
+
+if __name__ == "__main__":
+    main()
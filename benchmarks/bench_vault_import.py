@@ -0,0 +1,80 @@
+"""
+Benchmark: bulk import throughput in entries per second.
+
+Compares VaultService.import_entries (one key derivation, parallel encryption,
+executemany per chunk) against the old path of one add_entry call per entry
+(which re-derives the key and commits every row), on a WAL database file.
+
+Run from the project root:
+    PYTHONPATH=. python benchmarks/bench_vault_import.py --entries 5000 --single 20
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from backend.tests.vault.conftest import patched_key_material
+from backend.utils.db import apply_db_profile
+from backend.vault.repository import VaultRepository
+from backend.vault.services import VaultService
+from database.migrations import migrate
+
+PASSWORD = "benchmark-password"
+
+
+def make_service(path: str) -> VaultService:
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    apply_db_profile(conn)
+    migrate(conn)
+    return VaultService(VaultRepository(conn))
+
+
+def rows(n: int):
+    return (
+        {"service": f"svc{i}", "username": f"user{i}", "password": "p" * 16}
+        for i in range(n)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument(
+        "--single", type=int, default=20, help="Entries for the one-by-one baseline."
+    )
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    salt = os.urandom(16)
+    with tempfile.TemporaryDirectory() as tmp, patched_key_material(salt):
+        service = make_service(str(Path(tmp) / "single.db"))
+        start = time.perf_counter()
+        for row in rows(args.single):
+            service.add_entry(1, row, password=PASSWORD)
+        elapsed = time.perf_counter() - start
+        print(f"{'one-by-one':>22}: {args.single / elapsed:>10.1f} entries/s")
+
+        for workers in args.workers:
+            for atomic in (False, True):
+                service = make_service(str(Path(tmp) / f"bulk-{workers}-{atomic}.db"))
+                start = time.perf_counter()
+                report = service.import_entries(
+                    1,
+                    rows(args.entries),
+                    PASSWORD,
+                    chunk_size=args.chunk_size,
+                    workers=workers,
+                    atomic=atomic,
+                )
+                elapsed = time.perf_counter() - start
+                label = f"bulk w={workers} {'atomic' if atomic else 'chunked'}"
+                print(f"{label:>22}: {report['imported'] / elapsed:>10.1f} entries/s")
+
+
+if __name__ == "__main__":
+    main()
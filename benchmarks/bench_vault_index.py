@@ -0,0 +1,82 @@
+"""
+Benchmark: per-user vault listing latency versus total table size.
+
+Fills the vault table with `--rows` rows spread across `--users` users and
+times the VaultRepository list query for random users, with and without the
+idx_vault_user_id_id index. The table grows in steps by adding users, so the
+per-user vault size (rows / users) stays fixed while the table gets bigger.
+With the index, list latency stays flat; without it, it grows with the table.
+
+Run from the project root:
+    PYTHONPATH=. python benchmarks/bench_vault_index.py --rows 1000000 --users 10000
+"""
+
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from database.init_db import (
+    CREATE_USERS_TABLE_SQL,
+    CREATE_VAULT_TABLE_SQL,
+    CREATE_VAULT_INDEXES_SQL,
+)
+
+LIST_SQL = "SELECT id, encrypted_entry FROM vault WHERE user_id = ? ORDER BY id"
+
+
+def fill(conn: sqlite3.Connection, first_user: int, users: int, per_user: int) -> None:
+    payload = b"x" * 120
+    rows = users * per_user
+    batch = 50_000
+    for start in range(0, rows, batch):
+        conn.executemany(
+            "INSERT INTO vault (user_id, encrypted_entry) VALUES (?, ?)",
+            (
+                (first_user + i % users, payload)
+                for i in range(start, min(start + batch, rows))
+            ),
+        )
+    conn.commit()
+
+
+def time_lists(conn: sqlite3.Connection, users: int, samples: int) -> float:
+    picks = [random.randrange(users) for _ in range(samples)]
+    start = time.perf_counter()
+    for user_id in picks:
+        conn.execute(LIST_SQL, (user_id,)).fetchall()
+    return (time.perf_counter() - start) / samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--steps", type=int, default=4)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(str(Path(tmp) / "bench.db"))
+        conn.execute(CREATE_USERS_TABLE_SQL)
+        conn.execute(CREATE_VAULT_TABLE_SQL)
+        print(f"{'rows':>10} {'rows/user':>10} {'no index ms':>12} {'index ms':>10}")
+        per_user = max(args.rows // args.users, 1)
+        step_users = max(args.users // args.steps, 1)
+        for n in range(1, args.steps + 1):
+            fill(conn, (n - 1) * step_users, step_users, per_user)
+            users = n * step_users
+            conn.execute("DROP INDEX IF EXISTS idx_vault_user_id_id")
+            scan = time_lists(conn, users, max(args.samples // 20, 3))
+            conn.execute(CREATE_VAULT_INDEXES_SQL)
+            seek = time_lists(conn, users, args.samples)
+            print(
+                f"{users * per_user:>10} {per_user:>10} "
+                f"{scan * 1000:>12.2f} {seek * 1000:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
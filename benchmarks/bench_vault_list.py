@@ -0,0 +1,84 @@
+"""
+Benchmark: GET /api/vault/ decryption latency versus vault size.
+
+VaultService.list_entries derives the vault key once per request, so the
+PBKDF2 cost is paid once and the per-entry cost is a single decrypt.
+List latency should therefore stay roughly flat as the entry count grows.
+Each --workers value runs the listing through a ParallelDecryptor with that
+many threads (1 decrypts inline); --cipher picks the entry cipher.
+
+Run from the project root:
+    PYTHONPATH=. python benchmarks/bench_vault_list.py --sizes 1 10 100 300
+    PYTHONPATH=. python benchmarks/bench_vault_list.py --sizes 5000 --workers 1 2 4
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+from backend.tests.vault.conftest import patched_key_material
+from backend.vault.crypto_utils import CIPHER_FERNET
+from backend.vault.decryption import ParallelDecryptor
+from backend.vault.repository import VaultRepository
+from backend.vault.services import VaultService
+from database.migrations import migrate
+
+PASSWORD = "benchmark-password"
+
+
+def build_service(
+    size: int, salt: bytes, decryptor: ParallelDecryptor
+) -> VaultService:
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    service = VaultService(VaultRepository(conn), decryptor=decryptor)
+    # Unlock once so entries are written under the user's data key and cipher.
+    key = service._vault_key(1, PASSWORD)
+    conn.executemany(
+        "INSERT INTO vault (id, user_id, encrypted_entry, change_seq) "
+        "VALUES (?1, 1, ?2, ?1)",
+        [
+            (
+                i,
+                key.encrypt(
+                    {"service": f"svc{i}", "username": "u", "password": "p"}, 1, i
+                ),
+            )
+            for i in range(1, size + 1)
+        ],
+    )
+    conn.commit()
+    return service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 300])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1])
+    parser.add_argument("--cipher", default=CIPHER_FERNET)
+    args = parser.parse_args()
+
+    salt = os.urandom(16)
+    print(f"{'entries':>8} {'workers':>8} {'best ms':>10} {'ms/entry':>10}")
+    for workers in args.workers:
+        decryptor = ParallelDecryptor(max_workers=workers, threshold=1)
+        for size in args.sizes:
+            with patched_key_material(salt, cipher=args.cipher):
+                service = build_service(size, salt, decryptor)
+                best = float("inf")
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    service.list_entries(1, password=PASSWORD)
+                    best = min(best, time.perf_counter() - start)
+            print(
+                f"{size:>8} {workers:>8} {best * 1000:>10.1f} "
+                f"{best * 1000 / size:>10.3f}"
+            )
+        decryptor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
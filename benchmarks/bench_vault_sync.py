@@ -0,0 +1,74 @@
+"""
+Benchmark: client refresh cost, full listing versus delta sync.
+
+Fills one user's vault with `--entries` rows among `--users` users, changes
+`--changed` of them (half updates, half deletes) and times a refresh that
+downloads the whole vault (GET /api/vault/) against one that asks only for
+changes since the previous sync token (GET /api/vault/changes), both without
+decryption. Delta latency should track the number of changes, not the vault.
+
+Run from the project root:
+    PYTHONPATH=. python benchmarks/bench_vault_sync.py --entries 1000 10000 100000
+"""
+
+import argparse
+import sqlite3
+import time
+
+from backend.vault.repository import VaultRepository
+from backend.vault.services import VaultService
+from database.migrations import migrate
+
+
+def build_service(entries: int, users: int) -> VaultService:
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    repo = VaultRepository(conn)
+    payload = b"x" * 200
+
+    def seal(ids):
+        return [payload] * len(ids)
+
+    repo.add_sealed_entries(1, entries, seal)
+    for user_id in range(2, users + 1):
+        repo.add_sealed_entries(user_id, entries // users, seal)
+    return VaultService(repo)
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--changed", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'full ms':>10} {'delta ms':>10} {'changes':>8}")
+    for entries in args.entries:
+        service = build_service(entries, args.users)
+        token = service.changes(1)["sync_token"]
+        ids = [e["id"] for e in service.list_entries(1, limit=args.changed)]
+        for i, entry_id in enumerate(ids):
+            if i % 2:
+                service.delete_entry(1, entry_id)
+            else:
+                service.update_entry(1, entry_id, {"encrypted_entry": b"y" * 200})
+        full = best_of(lambda: service.list_entries(1), args.repeat)
+        delta = best_of(lambda: service.changes(1, token), args.repeat)
+        changes = service.changes(1, token)
+        count = len(changes["entries"]) + len(changes["deleted"])
+        print(f"{entries:>8} {full:>10.2f} {delta:>10.3f} {count:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,23 @@
 """
 SQLite database initialization for password manager.
-Creates users table if not exists.
+Creates the schema by applying all pending migrations (see
+database/migrations.py) and applies the configured
+database performance profile (see backend/config/settings.py).
 
 Follows SOLID principles and PEP8.
 """
 
 import sqlite3
 import os
+import sys
 from pathlib import Path
 
+if __package__ in (None, ""):
+    # Allow `python database/init_db.py` from the project root.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.utils.db import apply_db_profile
+
 DB_PATH = Path(__file__).parent / "password_manager.db"
 
 CREATE_USERS_TABLE_SQL = """
@@ -19,17 +28,27 @@ CREATE TABLE IF NOT EXISTS users (
 );
 """
 
+# encrypted_entry holds raw ciphertext bytes (see crypto_utils). Databases
+# created before that keep the TEXT declaration; migration 5 converts their
+# values to BLOBs, which TEXT affinity stores unchanged.
 CREATE_VAULT_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS vault (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     user_id INTEGER NOT NULL,
-    encrypted_entry TEXT NOT NULL,
+    encrypted_entry BLOB NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 """
 
+# Every vault query filters on user_id (and optionally id). The composite index
+# turns those full-table scans into range seeks over one user's rows and yields
+# them already in id order; it also covers id-only lookups.
+CREATE_VAULT_INDEXES_SQL = """
+CREATE INDEX IF NOT EXISTS idx_vault_user_id_id ON vault (user_id, id);
+"""
+
 CREATE_SALTS_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS user_salts (
     user_id INTEGER PRIMARY KEY,
@@ -38,6 +57,85 @@ CREATE TABLE IF NOT EXISTS user_salts (
 );
 """
 
+# Per-user vault key derivation record: the KDF name and its JSON parameters.
+# Users without a row predate the table and use PBKDF2-SHA256 (390000 rounds).
+CREATE_VAULT_KEYS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS user_vault_keys (
+    user_id INTEGER PRIMARY KEY,
+    kdf TEXT NOT NULL,
+    kdf_params TEXT NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+"""
+
+# The user's random data key, Fernet-wrapped under the password-derived key.
+# NULL until the vault is first unlocked (see crypto_utils, envelope format).
+ADD_VAULT_WRAPPED_KEY_SQL = """
+ALTER TABLE user_vault_keys ADD COLUMN wrapped_key TEXT;
+"""
+
+# Cipher new entries of the vault are written with (see crypto_utils). Vaults
+# that predate the column use Fernet.
+ADD_VAULT_CIPHER_SQL = """
+ALTER TABLE user_vault_keys ADD COLUMN cipher TEXT NOT NULL DEFAULT 'fernet';
+"""
+
+# Blind search index: keyed HMAC tokens of normalized entry fields (see
+# backend/vault/blind_index.py). Lookups seek on (user_id, token).
+CREATE_SEARCH_TOKENS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS vault_search_tokens (
+    user_id INTEGER NOT NULL,
+    token BLOB NOT NULL,
+    entry_id INTEGER NOT NULL,
+    PRIMARY KEY (user_id, token, entry_id)
+) WITHOUT ROWID;
+"""
+
+CREATE_SEARCH_TOKENS_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_vault_search_tokens_entry
+ON vault_search_tokens (entry_id);
+"""
+
+# 1 once an entry's search tokens match its current ciphertext. Tokens need
+# the user's data key, so older entries are indexed on the user's first search.
+ADD_VAULT_SEARCH_INDEXED_SQL = """
+ALTER TABLE vault ADD COLUMN search_indexed INTEGER NOT NULL DEFAULT 0;
+"""
+
+
+# Delta sync: change_seq is a per-user counter stamped on every insert, update
+# and delete (deletes leave a tombstone with deleted = 1 and no ciphertext).
+# Clients ask for rows with change_seq above the last value they saw, a
+# range seek on (user_id, change_seq).
+ADD_VAULT_CHANGE_SEQ_SQL = """
+ALTER TABLE vault ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0;
+"""
+
+ADD_VAULT_DELETED_SQL = """
+ALTER TABLE vault ADD COLUMN deleted INTEGER NOT NULL DEFAULT 0;
+"""
+
+CREATE_VAULT_CHANGES_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_vault_user_change_seq ON vault (user_id, change_seq);
+"""
+
+
+# Every keyword search first asks for the user's entries still lacking search
+# tokens. Once a vault is indexed there are none, and this partial index holds
+# only rows that are not yet indexed, so the check is one probe instead of a
+# pass over all the user's rows.
+CREATE_VAULT_UNINDEXED_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_vault_unindexed ON vault (user_id)
+WHERE search_indexed = 0 AND deleted = 0;
+"""
+
+
+# Client-side (zero-knowledge) vaults: the browser derives the key and
+# decrypts; the server only stores ciphertext and refuses vault passwords.
+ADD_VAULT_CLIENT_SIDE_SQL = """
+ALTER TABLE user_vault_keys ADD COLUMN client_side INTEGER NOT NULL DEFAULT 0;
+"""
+
 
 def get_db_connection():
     """Get a SQLite connection to the database."""
@@ -46,16 +144,21 @@ def get_db_connection():
     return conn
 
 
-def initialize_database():
-    """Initialize the database and create required tables if not present."""
+def initialize_database(profile=None):
+    """
+    Initialize the database and create required tables if not present.
+    Args:
+        profile (dict | None): PRAGMA profile; defaults to settings.DB_PROFILE.
+            journal_mode is persistent, so WAL set here sticks to the file.
+    """
     if not DB_PATH.exists():
         # Ensure parent directory exists
         DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    from database.migrations import migrate
+
     with get_db_connection() as conn:
-        conn.execute(CREATE_USERS_TABLE_SQL)
-        conn.execute(CREATE_VAULT_TABLE_SQL)
-        conn.execute(CREATE_SALTS_TABLE_SQL)
-        conn.commit()
+        apply_db_profile(conn, profile)
+        migrate(conn)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,366 @@
+"""
+Versioned schema migrations for the password manager database.
+
+The schema version lives in `PRAGMA user_version`. Each migration runs in its
+own IMMEDIATE transaction together with the version bump, so a failed
+migration leaves the database at the previous version. Migrations that touch
+many rows set `transactional=False` and use run_batched(), which commits in
+small chunks so the service keeps serving requests during the upgrade; such
+migrations must be idempotent because an interrupted run is simply repeated.
+
+Usage (from the project root):
+    python -m database.migrations             # upgrade to the latest version
+    python -m database.migrations --status    # show current/latest version
+    python -m database.migrations --target 2  # upgrade up to version 2
+"""
+
+import argparse
+import logging
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+if __package__ in (None, ""):
+    # Allow `python database/migrations.py` from the project root.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.config import settings
+from database.init_db import (
+    CREATE_USERS_TABLE_SQL,
+    CREATE_VAULT_TABLE_SQL,
+    CREATE_VAULT_INDEXES_SQL,
+    CREATE_SALTS_TABLE_SQL,
+    CREATE_VAULT_KEYS_TABLE_SQL,
+    ADD_VAULT_WRAPPED_KEY_SQL,
+    ADD_VAULT_CIPHER_SQL,
+    CREATE_SEARCH_TOKENS_TABLE_SQL,
+    CREATE_SEARCH_TOKENS_INDEX_SQL,
+    ADD_VAULT_SEARCH_INDEXED_SQL,
+    ADD_VAULT_CHANGE_SEQ_SQL,
+    ADD_VAULT_DELETED_SQL,
+    CREATE_VAULT_CHANGES_INDEX_SQL,
+    ADD_VAULT_CLIENT_SIDE_SQL,
+    CREATE_VAULT_UNINDEXED_INDEX_SQL,
+)
+
+logger = logging.getLogger("migrations")
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+    # False for batched backfills that commit on their own via run_batched().
+    transactional: bool = True
+
+
+def _create_base_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(CREATE_USERS_TABLE_SQL)
+    conn.execute(CREATE_VAULT_TABLE_SQL)
+    conn.execute(CREATE_SALTS_TABLE_SQL)
+
+
+def _create_vault_indexes(conn: sqlite3.Connection) -> None:
+    conn.execute(CREATE_VAULT_INDEXES_SQL)
+
+
+def _create_vault_keys(conn: sqlite3.Connection) -> None:
+    from backend.vault.crypto_utils import LEGACY_KDF
+
+    conn.execute(CREATE_VAULT_KEYS_TABLE_SQL)
+    # Vaults that already have a salt were encrypted under the legacy KDF; pin
+    # it so changing settings.VAULT_KDF only affects new vaults.
+    conn.execute(
+        "INSERT OR IGNORE INTO user_vault_keys (user_id, kdf, kdf_params) "
+        "SELECT user_id, ?, ? FROM user_salts",
+        (LEGACY_KDF.scheme, LEGACY_KDF.params_json()),
+    )
+
+
+def _add_wrapped_key(conn: sqlite3.Connection) -> None:
+    conn.execute(ADD_VAULT_WRAPPED_KEY_SQL)
+
+
+def _add_vault_cipher(conn: sqlite3.Connection) -> None:
+    conn.execute(ADD_VAULT_CIPHER_SQL)
+
+
+def _create_search_index(conn: sqlite3.Connection) -> None:
+    conn.execute(CREATE_SEARCH_TOKENS_TABLE_SQL)
+    conn.execute(CREATE_SEARCH_TOKENS_INDEX_SQL)
+    conn.execute(ADD_VAULT_SEARCH_INDEXED_SQL)
+
+
+def _add_vault_change_tracking(conn: sqlite3.Connection) -> None:
+    # Adding columns does not rewrite rows; existing rows get change_seq 0
+    # until _number_existing_changes backfills them.
+    conn.execute(ADD_VAULT_CHANGE_SEQ_SQL)
+    conn.execute(ADD_VAULT_DELETED_SQL)
+    conn.execute(CREATE_VAULT_CHANGES_INDEX_SQL)
+
+
+def _add_vault_client_side(conn: sqlite3.Connection) -> None:
+    conn.execute(ADD_VAULT_CLIENT_SIDE_SQL)
+
+
+def _index_unindexed_entries(conn: sqlite3.Connection) -> None:
+    conn.execute(CREATE_VAULT_UNINDEXED_INDEX_SQL)
+
+
+def _number_existing_changes(conn: sqlite3.Connection) -> None:
+    # Ids are unique, and live writes stamp values above sqlite_sequence (the
+    # highest id ever assigned), so existing rows get distinct sequence
+    # numbers below every value stamped while or after this runs. Rows already
+    # stamped (change_seq > 0, including ones a full sync numbered early) are
+    # left alone, so an interrupted run can repeat.
+    def stamp(c, ids):
+        placeholders = ",".join("?" * len(ids))
+        c.execute(
+            f"UPDATE vault SET change_seq = id WHERE id IN ({placeholders}) "
+            "AND change_seq = 0",
+            ids,
+        )
+
+    run_batched(
+        conn,
+        "SELECT id FROM vault WHERE id > ? AND change_seq = 0 ORDER BY id LIMIT ?",
+        stamp,
+    )
+
+
+def _vault_ciphertext_to_blob(conn: sqlite3.Connection) -> None:
+    from backend.vault.crypto_utils import decode_ciphertext
+
+    def convert(c, ids):
+        placeholders = ",".join("?" * len(ids))
+        rows = c.execute(
+            f"SELECT id, encrypted_entry FROM vault WHERE id IN ({placeholders}) "
+            "AND typeof(encrypted_entry) = 'text'",
+            ids,
+        ).fetchall()
+        updates = []
+        for entry_id, token in rows:
+            try:
+                updates.append((decode_ciphertext(token), entry_id))
+            except ValueError:
+                # Not base64: unreadable either way, so leave it untouched.
+                continue
+        c.executemany("UPDATE vault SET encrypted_entry = ? WHERE id = ?", updates)
+
+    run_batched(
+        conn,
+        "SELECT id FROM vault WHERE id > ? AND typeof(encrypted_entry) = 'text' "
+        "ORDER BY id LIMIT ?",
+        convert,
+    )
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "Base schema: users, vault, user_salts", _create_base_schema),
+    Migration(2, "Index vault by (user_id, id)", _create_vault_indexes),
+    Migration(3, "Per-user vault KDF record: user_vault_keys", _create_vault_keys),
+    Migration(4, "Wrapped per-user data key for envelope encryption", _add_wrapped_key),
+    Migration(
+        5,
+        "Store vault ciphertext as binary BLOBs instead of base64 TEXT",
+        _vault_ciphertext_to_blob,
+        transactional=False,
+    ),
+    Migration(6, "Per-user vault entry cipher", _add_vault_cipher),
+    Migration(7, "Blind search index: vault_search_tokens", _create_search_index),
+    Migration(
+        8, "Vault change counter and delete tombstones", _add_vault_change_tracking
+    ),
+    Migration(9, "Opt-in client-side vault decryption", _add_vault_client_side),
+    Migration(
+        10,
+        "Number existing vault rows for delta sync",
+        _number_existing_changes,
+        transactional=False,
+    ),
+    Migration(
+        11, "Partial index of entries without search tokens", _index_unindexed_entries
+    ),
+]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def latest_version(migrations: Sequence[Migration] = MIGRATIONS) -> int:
+    return max((m.version for m in migrations), default=0)
+
+
+def pending_migrations(
+    conn: sqlite3.Connection,
+    target: Optional[int] = None,
+    migrations: Sequence[Migration] = MIGRATIONS,
+) -> list[Migration]:
+    current = get_schema_version(conn)
+    target = latest_version(migrations) if target is None else target
+    return sorted(
+        (m for m in migrations if current < m.version <= target),
+        key=lambda m: m.version,
+    )
+
+
+def migrate(
+    conn: sqlite3.Connection,
+    target: Optional[int] = None,
+    migrations: Sequence[Migration] = MIGRATIONS,
+) -> list[int]:
+    """
+    Apply pending migrations in version order.
+    Args:
+        conn: Connection to the database (must not be inside a transaction).
+        target (int | None): Highest version to apply; defaults to the latest.
+        migrations: Migration list, injectable for tests.
+    Returns:
+        list[int]: Versions applied by this call.
+    """
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError("Duplicate migration versions.")
+    if conn.in_transaction:
+        conn.commit()
+    applied = []
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None  # explicit BEGIN/COMMIT below
+    try:
+        for migration in pending_migrations(conn, target, migrations):
+            logger.info(f"Applying migration {migration.version}: {migration.description}")
+            if migration.transactional:
+                if not _apply_in_transaction(conn, migration):
+                    continue
+            else:
+                migration.apply(conn)
+                _set_version(conn, migration.version)
+            applied.append(migration.version)
+    finally:
+        conn.isolation_level = previous_isolation
+    return applied
+
+
+def _apply_in_transaction(conn: sqlite3.Connection, migration: Migration) -> bool:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Another process may have applied it while we waited for the lock.
+        if get_schema_version(conn) >= migration.version:
+            conn.execute("COMMIT")
+            return False
+        migration.apply(conn)
+        conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+        conn.execute("COMMIT")
+        return True
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _set_version(conn: sqlite3.Connection, version: int) -> None:
+    conn.execute("BEGIN IMMEDIATE")
+    if get_schema_version(conn) < version:
+        conn.execute(f"PRAGMA user_version = {int(version)}")
+    conn.execute("COMMIT")
+
+
+def run_batched(
+    conn: sqlite3.Connection,
+    select_ids_sql: str,
+    apply_batch: Callable[[sqlite3.Connection, list], None],
+    batch_size: Optional[int] = None,
+    pause_seconds: Optional[float] = None,
+) -> int:
+    """
+    Run a backfill as a series of short transactions.
+    Args:
+        conn: Connection in autocommit mode (as inside migrate()).
+        select_ids_sql (str): Query returning the next ids to process in
+            ascending order; bound with (last_id, batch_size), e.g.
+            "SELECT id FROM vault WHERE id > ? AND x IS NULL ORDER BY id LIMIT ?".
+        apply_batch: Called with (conn, ids) inside the batch transaction.
+        batch_size (int | None): Rows per transaction (settings.MIGRATION_BATCH_SIZE).
+        pause_seconds (float | None): Sleep between batches
+            (settings.MIGRATION_BATCH_PAUSE_SECONDS).
+    Returns:
+        int: Number of rows processed.
+    """
+    batch_size = batch_size or settings.MIGRATION_BATCH_SIZE
+    if pause_seconds is None:
+        pause_seconds = settings.MIGRATION_BATCH_PAUSE_SECONDS
+    last_id = 0
+    total = 0
+    while True:
+        ids = [row[0] for row in conn.execute(select_ids_sql, (last_id, batch_size))]
+        if not ids:
+            return total
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            apply_batch(conn, ids)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        total += len(ids)
+        last_id = ids[-1]
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+
+def run_startup_migrations(db_connection, app_logger=None) -> list[int]:
+    """
+    Apply pending migrations through an IDatabaseConnection at app startup.
+    A missing database file is logged and skipped (run init_db to create it).
+    """
+    log = app_logger or logger
+    try:
+        conn = db_connection.get_connection()
+    except FileNotFoundError as e:
+        log.warning(f"Skipping startup migrations: {e}")
+        return []
+    try:
+        applied = migrate(conn)
+        if applied:
+            log.info(f"Applied migrations: {applied}")
+        return applied
+    finally:
+        conn.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from database.init_db import DB_PATH
+    from backend.utils.db import apply_db_profile
+
+    parser = argparse.ArgumentParser(description="Apply database schema migrations.")
+    parser.add_argument("--db", default=str(DB_PATH), help="Path to the SQLite file.")
+    parser.add_argument("--target", type=int, help="Highest version to apply.")
+    parser.add_argument(
+        "--status", action="store_true", help="Show versions and exit."
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    conn = sqlite3.connect(args.db)
+    try:
+        apply_db_profile(conn)
+        if args.status:
+            pending = pending_migrations(conn, args.target)
+            print(f"Current version: {get_schema_version(conn)}")
+            print(f"Latest version:  {latest_version()}")
+            for m in pending:
+                print(f"  pending {m.version}: {m.description}")
+            return 0
+        applied = migrate(conn, args.target)
+        print(f"Applied: {applied or 'nothing'}; now at version {get_schema_version(conn)}")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
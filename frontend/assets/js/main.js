@@ -222,5 +222,319 @@ function setupFormHandling() {
     }
 }
 
+/* ------------------------------------------------------------------------
+ * Client-side vault (zero-knowledge mode)
+ *
+ * The browser derives the vault key and decrypts entries with WebCrypto; the
+ * server only stores and returns ciphertext and never sees the vault
+ * password. Formats match backend/vault/crypto_utils.py:
+ *   0x80  Fernet token under the password-derived key (legacy entries)
+ *   0x02  format byte + Fernet token under the data key
+ *   0x03  format byte + 12-byte nonce + AES-256-GCM ciphertext and tag
+ * The data key itself is a Fernet token under the password-derived key.
+ * ---------------------------------------------------------------------- */
+
+const VAULT_API = '/api/vault';
+const FORMAT_FERNET_LEGACY = 0x80;
+const FORMAT_FERNET_ENVELOPE = 0x02;
+const FORMAT_AES_GCM = 0x03;
+
+const textEncoder = new TextEncoder();
+const textDecoder = new TextDecoder();
+
+/**
+ * Decode base64 or base64url, with or without padding
+ * @param {string} text - Encoded bytes
+ * @returns {Uint8Array} The decoded bytes
+ */
+function base64ToBytes(text) {
+    const b64 = text.replace(/-/g, '+').replace(/_/g, '/');
+    const binary = atob(b64 + '='.repeat((4 - b64.length % 4) % 4));
+    return Uint8Array.from(binary, c => c.charCodeAt(0));
+}
+
+/**
+ * Encode bytes as padded base64url (the form the API and Fernet use)
+ * @param {Uint8Array} bytes - Bytes to encode
+ * @returns {string} The encoded text
+ */
+function bytesToBase64(bytes) {
+    let binary = '';
+    bytes.forEach(b => { binary += String.fromCharCode(b); });
+    return btoa(binary).replace(/\+/g, '-').replace(/\//g, '_');
+}
+
+/**
+ * Concatenate byte arrays
+ * @param {...Uint8Array} parts - Arrays to join
+ * @returns {Uint8Array} The joined bytes
+ */
+function concatBytes(...parts) {
+    const out = new Uint8Array(parts.reduce((n, p) => n + p.length, 0));
+    let offset = 0;
+    parts.forEach(p => { out.set(p, offset); offset += p.length; });
+    return out;
+}
+
+/**
+ * Derive the 32-byte password key with PBKDF2-SHA256 (browsers have no Argon2id)
+ * @param {string} password - Vault password
+ * @param {Uint8Array} salt - The user's salt
+ * @param {{scheme: string, iterations: number}} kdf - KDF recorded for the vault
+ * @returns {Promise<Uint8Array>} The raw Fernet key
+ */
+async function deriveVaultKey(password, salt, kdf) {
+    if (kdf.scheme !== 'pbkdf2-sha256') {
+        throw new Error(`Unsupported vault KDF in the browser: ${kdf.scheme}`);
+    }
+    const material = await crypto.subtle.importKey(
+        'raw', textEncoder.encode(password), 'PBKDF2', false, ['deriveBits']
+    );
+    const bits = await crypto.subtle.deriveBits(
+        { name: 'PBKDF2', hash: 'SHA-256', salt, iterations: kdf.iterations },
+        material,
+        256
+    );
+    return new Uint8Array(bits);
+}
+
+/**
+ * Import the signing (HMAC-SHA256) and encryption (AES-128-CBC) halves of a Fernet key
+ * @param {Uint8Array} key - Raw 32-byte Fernet key
+ * @returns {Promise<{signing: CryptoKey, encryption: CryptoKey}>} The keys
+ */
+async function importFernetKey(key) {
+    const [signing, encryption] = await Promise.all([
+        crypto.subtle.importKey(
+            'raw', key.slice(0, 16), { name: 'HMAC', hash: 'SHA-256' }, false,
+            ['sign', 'verify']
+        ),
+        crypto.subtle.importKey(
+            'raw', key.slice(16), 'AES-CBC', false, ['encrypt', 'decrypt']
+        ),
+    ]);
+    return { signing, encryption };
+}
+
+/**
+ * Decrypt a raw Fernet token (version, timestamp, IV, ciphertext, HMAC)
+ * @param {{signing: CryptoKey, encryption: CryptoKey}} key - From importFernetKey
+ * @param {Uint8Array} token - Raw token bytes
+ * @returns {Promise<Uint8Array>} The plaintext
+ */
+async function fernetDecrypt(key, token) {
+    if (token.length < 57 || token[0] !== FORMAT_FERNET_LEGACY) {
+        throw new Error('Invalid Fernet token');
+    }
+    const body = token.slice(0, -32);
+    const valid = await crypto.subtle.verify('HMAC', key.signing, token.slice(-32), body);
+    if (!valid) {
+        throw new Error('Invalid Fernet token');
+    }
+    const plaintext = await crypto.subtle.decrypt(
+        { name: 'AES-CBC', iv: body.slice(9, 25) }, key.encryption, body.slice(25)
+    );
+    return new Uint8Array(plaintext);
+}
+
+/**
+ * Encrypt to a raw Fernet token
+ * @param {{signing: CryptoKey, encryption: CryptoKey}} key - From importFernetKey
+ * @param {Uint8Array} plaintext - Bytes to encrypt
+ * @returns {Promise<Uint8Array>} The token
+ */
+async function fernetEncrypt(key, plaintext) {
+    const header = new Uint8Array(9);
+    const view = new DataView(header.buffer);
+    view.setUint8(0, FORMAT_FERNET_LEGACY);
+    view.setBigUint64(1, BigInt(Math.floor(Date.now() / 1000)));
+    const iv = crypto.getRandomValues(new Uint8Array(16));
+    const ciphertext = await crypto.subtle.encrypt(
+        { name: 'AES-CBC', iv }, key.encryption, plaintext
+    );
+    const body = concatBytes(header, iv, new Uint8Array(ciphertext));
+    const mac = await crypto.subtle.sign('HMAC', key.signing, body);
+    return concatBytes(body, new Uint8Array(mac));
+}
+
+/**
+ * Unlock a vault from its key material (GET /api/vault/key-material)
+ * @param {string} password - Vault password; never sent to the server
+ * @param {Object} material - The key material response
+ * @returns {Promise<Object>} Handle for decryptEntry/encryptEntry
+ */
+async function unlockVault(password, material) {
+    const passwordKey = await importFernetKey(
+        await deriveVaultKey(password, base64ToBytes(material.salt), material.kdf)
+    );
+    const vault = { userId: material.user_id, passwordKey, dataKey: null, aesGcmKey: null };
+    if (material.wrapped_key) {
+        // The wrapped plaintext is the data key in its base64 (Fernet key) form.
+        let dataKeyText;
+        try {
+            dataKeyText = await fernetDecrypt(passwordKey, base64ToBytes(material.wrapped_key));
+        } catch (e) {
+            throw new Error('Invalid vault password');
+        }
+        const dataKey = base64ToBytes(textDecoder.decode(dataKeyText));
+        vault.dataKey = await importFernetKey(dataKey);
+        const hkdf = await crypto.subtle.importKey('raw', dataKey, 'HKDF', false, ['deriveKey']);
+        vault.aesGcmKey = await crypto.subtle.deriveKey(
+            {
+                name: 'HKDF',
+                hash: 'SHA-256',
+                salt: new Uint8Array(32),
+                info: textEncoder.encode('vault-entry/aes-256-gcm'),
+            },
+            hkdf,
+            { name: 'AES-GCM', length: 256 },
+            false,
+            ['decrypt']
+        );
+    }
+    return vault;
+}
+
+/**
+ * Create a data key and wrap it under the password key, for a vault that has none yet
+ * @param {string} password - Vault password
+ * @param {Object} material - The key material response
+ * @returns {Promise<string>} The wrapped key, as PUT /api/vault/key-material takes it
+ */
+async function createWrappedDataKey(password, material) {
+    const passwordKey = await importFernetKey(
+        await deriveVaultKey(password, base64ToBytes(material.salt), material.kdf)
+    );
+    const dataKey = bytesToBase64(crypto.getRandomValues(new Uint8Array(32)));
+    return bytesToBase64(await fernetEncrypt(passwordKey, textEncoder.encode(dataKey)));
+}
+
+/**
+ * Decrypt a stored entry of any browser-supported format
+ * @param {Object} vault - From unlockVault
+ * @param {{id: number, encrypted_entry: string}} entry - Entry as the API returns it
+ * @returns {Promise<Object>} The plaintext entry fields
+ */
+async function decryptEntry(vault, entry) {
+    const token = base64ToBytes(entry.encrypted_entry);
+    let plaintext;
+    if (token[0] === FORMAT_FERNET_LEGACY) {
+        plaintext = await fernetDecrypt(vault.passwordKey, token);
+    } else if (token[0] === FORMAT_FERNET_ENVELOPE && vault.dataKey) {
+        plaintext = await fernetDecrypt(vault.dataKey, token.slice(1));
+    } else if (token[0] === FORMAT_AES_GCM && vault.aesGcmKey) {
+        // Associated data binds (format, user id, entry id), as struct ">BQQ".
+        const ad = new DataView(new ArrayBuffer(17));
+        ad.setUint8(0, FORMAT_AES_GCM);
+        ad.setBigUint64(1, BigInt(vault.userId));
+        ad.setBigUint64(9, BigInt(entry.id));
+        plaintext = new Uint8Array(await crypto.subtle.decrypt(
+            { name: 'AES-GCM', iv: token.slice(1, 13), additionalData: ad.buffer },
+            vault.aesGcmKey,
+            token.slice(13)
+        ));
+    } else {
+        throw new Error(`Unsupported vault entry format: ${token[0]}`);
+    }
+    return JSON.parse(textDecoder.decode(plaintext));
+}
+
+/**
+ * Encrypt entry fields for the API, in the envelope (0x02) format
+ * @param {Object} vault - From unlockVault
+ * @param {Object} fields - Plaintext entry fields
+ * @returns {Promise<string>} Base64 ciphertext for `encrypted_entry`
+ */
+async function encryptEntry(vault, fields) {
+    if (!vault.dataKey) {
+        throw new Error('Vault has no data key yet');
+    }
+    const token = await fernetEncrypt(vault.dataKey, textEncoder.encode(JSON.stringify(fields)));
+    return bytesToBase64(concatBytes(Uint8Array.of(FORMAT_FERNET_ENVELOPE), token));
+}
+
+/**
+ * Call the vault API with the session's access token
+ * @param {string} path - Path below /api/vault
+ * @param {string} token - JWT access token
+ * @param {Object} options - fetch() options; a `body` object is sent as JSON
+ * @returns {Promise<Object|null>} The JSON response, null for 204/304
+ */
+async function vaultRequest(path, token, options = {}) {
+    const headers = { Authorization: `Bearer ${token}` };
+    let body = options.body;
+    if (body !== undefined) {
+        headers['Content-Type'] = 'application/json';
+        body = JSON.stringify(body);
+    }
+    const response = await fetch(VAULT_API + path, { ...options, headers, body });
+    if (!response.ok) {
+        const error = await response.json().catch(() => ({}));
+        throw new Error(error.error || `Vault request failed (${response.status})`);
+    }
+    return response.status === 204 ? null : response.json();
+}
+
+/**
+ * Switch the vault to client-side decryption and unlock it locally
+ * @param {string} token - JWT access token
+ * @param {string} password - Vault password
+ * @returns {Promise<Object>} Handle for decryptEntry/encryptEntry
+ */
+async function enableClientSideVault(token, password) {
+    let material = await vaultRequest('/key-material', token);
+    const body = { client_side: true };
+    if (!material.wrapped_key) {
+        body.wrapped_key = await createWrappedDataKey(password, material);
+    } else {
+        // Check the password before opting in; a typo would lock the user out.
+        await unlockVault(password, material);
+    }
+    material = await vaultRequest('/key-material', token, { method: 'PUT', body });
+    return unlockVault(password, material);
+}
+
+/**
+ * List and decrypt all entries; the request carries no password
+ * @param {Object} vault - From unlockVault
+ * @param {string} token - JWT access token
+ * @returns {Promise<Array<Object>>} Entries with a `decrypted` field
+ */
+async function listVaultEntries(vault, token) {
+    const { entries } = await vaultRequest('/', token);
+    return Promise.all(entries.map(async entry => {
+        try {
+            return { ...entry, decrypted: await decryptEntry(vault, entry) };
+        } catch (e) {
+            return { ...entry, decrypted: null };
+        }
+    }));
+}
+
+/**
+ * Encrypt and store a new entry
+ * @param {Object} vault - From unlockVault
+ * @param {string} token - JWT access token
+ * @param {Object} fields - Plaintext entry fields
+ * @returns {Promise<Object>} The stored entry
+ */
+async function addVaultEntry(vault, token, fields) {
+    const encrypted_entry = await encryptEntry(vault, fields);
+    return vaultRequest('/', token, { method: 'POST', body: { encrypted_entry } });
+}
+
+/**
+ * Encrypt and replace an entry
+ * @param {Object} vault - From unlockVault
+ * @param {string} token - JWT access token
+ * @param {number} entryId - Entry to replace
+ * @param {Object} fields - Plaintext entry fields
+ * @returns {Promise<Object>} The stored entry
+ */
+async function updateVaultEntry(vault, token, entryId, fields) {
+    const encrypted_entry = await encryptEntry(vault, fields);
+    return vaultRequest(`/${entryId}`, token, { method: 'PUT', body: { encrypted_entry } });
+}
+
 // Initialize when DOM is loaded
 window.addEventListener('DOMContentLoaded', initializeApp);